@@ -1,11 +1,15 @@
-from typing import List, Tuple
+from typing import AsyncIterator, Iterable, List, Tuple
 from yarl import URL
 
 from . import authorization
 from . import order as _order
+from . import signing
 from . import util
 
 
+DEFAULT_AUTHORIZATION_CONCURRENCY = 10
+
+
 class Account:
     def __init__(
             self,
@@ -26,10 +30,63 @@ class Account:
         self.client = client
         self.private_key = private_key
         self.account_href = account_href
+        # These depend only on the key, and are needed for every request or
+        # challenge, so work them out once.
+        self.alg = signing.alg_for_key(private_key)
+        self.thumbprint = util.acme_b64encode(private_key.thumbprint())
+
+    def key_authorization(self, token: str) -> str:
+        """The key authorization for a challenge token (RFC 8555, 8.1)."""
+        return f'{token}.{self.thumbprint}'
 
     async def new_order(
-            self, identifiers,
+            self,
+            identifiers,
+            *,
+            concurrency: int = DEFAULT_AUTHORIZATION_CONCURRENCY,
+            authz_index=None,
     ) -> Tuple[URL, _order.Order, List[Tuple[URL, authorization.Authorization]]]:
+        """Create a new order, and fetch its authorizations.
+
+        Up to ``concurrency`` authorizations are fetched at once; they are
+        returned in the same order as ``order.authorization_urls``. To start
+        work on each authorization as soon as it arrives, use
+        ``new_order_only`` followed by ``iter_authorizations``.
+
+        If an ``authz_index.AuthorizationIndex`` is given, authorizations it
+        knows to be valid are taken from it instead of being fetched, and
+        valid ones that are fetched are added to it.
+        """
+        order_href, order = await self.new_order_only(identifiers)
+        if authz_index is None:
+            authorizations = await self.fetch_authorizations(
+                order.authorization_urls,
+                concurrency=concurrency,
+            )
+            return order_href, order, authorizations
+
+        known = {}
+        for authz_url in order.authorization_urls:
+            authz = authz_index.lookup_url(self.account_href, authz_url)
+            if authz is not None:
+                known[authz_url] = authz
+        fetched = await self.fetch_authorizations(
+            [url for url in order.authorization_urls if url not in known],
+            concurrency=concurrency,
+        )
+        for authz_url, authz in fetched:
+            authz_index.add(self.account_href, authz_url, authz)
+            known[authz_url] = authz
+        authorizations = [
+            (authz_url, known[authz_url])
+            for authz_url in order.authorization_urls
+        ]
+        return order_href, order, authorizations
+
+    async def new_order_only(
+            self, identifiers,
+    ) -> Tuple[URL, _order.Order]:
+        """Create a new order, without fetching its authorizations."""
         json_data = {
             'identifiers': [
                 identifier.to_json() for identifier in identifiers
@@ -45,46 +102,98 @@ class Account:
         order_href = URL(response_headers['Location'])
 
         order = _order.Order.from_json(response_json)
+        return order_href, order
 
-        authorizations = []
-        for authorization_url in order.authorization_urls:
-            auth_json = await self.client._get(str(authorization_url))
-            authorizations.append((
-                authorization_url,
-                authorization.authorization_from_json(auth_json),
-            ))
+    async def fetch_authorizations(
+            self,
+            authorization_urls: Iterable[URL],
+            *,
+            concurrency: int = DEFAULT_AUTHORIZATION_CONCURRENCY,
+    ) -> List[Tuple[URL, authorization.Authorization]]:
+        """Fetch authorizations concurrently, preserving their order."""
+        return await util.map_ordered(
+            self._fetch_authorization,
+            authorization_urls,
+            concurrency,
+        )
 
-        return order_href, order, authorizations
+    async def iter_authorizations(
+            self,
+            authorization_urls: Iterable[URL],
+            *,
+            concurrency: int = DEFAULT_AUTHORIZATION_CONCURRENCY,
+    ) -> AsyncIterator[Tuple[URL, authorization.Authorization]]:
+        """Fetch authorizations concurrently, yielding each as it arrives.
+
+        Results come back in completion order, not the order of
+        ``authorization_urls``.
+        """
+        async for _, result in util.map_unordered(
+                self._fetch_authorization,
+                authorization_urls,
+                concurrency,
+        ):
+            yield result
+
+    async def _fetch_authorization(
+            self, authorization_url: URL,
+    ) -> Tuple[URL, authorization.Authorization]:
+        auth_json = await self.client._get(str(authorization_url), 'authz')
+        return (
+            authorization_url,
+            authorization.authorization_from_json(auth_json),
+        )
 
     async def begin_http_01_challenge(self, challenge):
-        return await self._post_with_key_id(str(challenge.url), b'{}')
+        return await self.respond_to_challenge(challenge)
+
+    async def respond_to_challenge(self, challenge):
+        """Tell the server that a challenge is ready to be validated."""
+        return await self._post_with_key_id(
+            str(challenge.url), b'{}', kind='challenge',
+        )
 
-    async def finalize_order(self, finalize_order_url, csr_data: bytes):
+    async def finalize_order(
+            self, finalize_order_url, csr_data: bytes, *, order_url=None,
+    ):
         """Finalize an order by uploading a CSR to be signed.
 
         :param csr_data:
             The CSR to sign; this should be an X.509 CSR in DER format.
+        :param order_url:
+            The order's own URL, if known; any cached GET of it is dropped,
+            whether or not finalization succeeds.
         """
         response_status, response_headers, response_json = \
             await self._post_json_with_key_id(
                 str(finalize_order_url),
                 {'csr': util.acme_b64encode(csr_data)},
+                kind='finalize',
+                related=(str(order_url),) if order_url is not None else (),
             )
 
         return _order.Order.from_json(response_json)
 
-    async def _post_with_key_id(self, url, data):
+    async def _post_with_key_id(self, url, data, kind=None, related=()):
         return await self.client._post_with_key_id(
             url,
             data,
             self.private_key,
             self.account_href,
+            self.alg,
+            kind,
+            related,
         )
 
-    async def _post_json_with_key_id(self, url, json_data):
+    async def _post_json_with_key_id(
+            self, url, json_data, kind=None, related=(),
+    ):
         return await self.client._post_json_with_key_id(
             url,
             json_data,
             self.private_key,
             self.account_href,
+            self.alg,
+            kind,
+            related,
         )
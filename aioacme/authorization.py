@@ -1,6 +1,6 @@
 from datetime import datetime
 import enum
-from typing import Any, List, Optional
+from typing import Any, Optional, Tuple
 
 import attr
 
@@ -25,30 +25,30 @@ class AuthorizationStatus(enum.Enum):
     @staticmethod
     def from_json(json_) -> 'AuthorizationStatus':
         validation.type_check(json_, str)
-        if json_ == 'pending':
-            return AuthorizationStatus.PENDING
-        elif json_ == 'valid':
-            return AuthorizationStatus.VALID
-        elif json_ == 'invalid':
-            return AuthorizationStatus.INVALID
-        elif json_ == 'deactivated':
-            return AuthorizationStatus.DEACTIVATED
-        elif json_ == 'expired':
-            return AuthorizationStatus.EXPIRED
-        elif json_ == 'revoked':
-            return AuthorizationStatus.REVOKED
-        else:
+        try:
+            return _AUTHORIZATION_STATUSES[json_]
+        except KeyError:
             raise validation.ValidationError(
                 f'Got unknown value {json_!r} for an AuthorizationStatus.'
-            )
+            ) from None
 
 
-@attr.s
+_AUTHORIZATION_STATUSES = {
+    'pending': AuthorizationStatus.PENDING,
+    'valid': AuthorizationStatus.VALID,
+    'invalid': AuthorizationStatus.INVALID,
+    'deactivated': AuthorizationStatus.DEACTIVATED,
+    'expired': AuthorizationStatus.EXPIRED,
+    'revoked': AuthorizationStatus.REVOKED,
+}
+
+
+@attr.s(slots=True, frozen=True)
 class Authorization:
     identifier: Identifier = attr.ib()
     status: AuthorizationStatus = attr.ib()
     expires: Optional[datetime] = attr.ib()
-    challenges: List[Any] = attr.ib()
+    challenges: Tuple[Any, ...] = attr.ib()
     wildcard: bool = attr.ib()
 
 
@@ -60,11 +60,11 @@ def wildcard_from_json(value):
 
 
 def challenges_from_json(json_):
-    return validation.deserialize_list(
+    return tuple(validation.deserialize_list(
         json_,
         challenge.challenge_from_json,
         'challenge',
-    )
+    ))
 
 
 _AUTHORIZATION_SCHEMA = {
@@ -72,20 +72,20 @@ _AUTHORIZATION_SCHEMA = {
     'status': AuthorizationStatus.from_json,
     OptionalKey('expires'): validation.datetime_from_json,
     'challenges': challenges_from_json,
-    OptionalKey('wildcard'): wildcard_from_json,
+    OptionalKey('wildcard', default=False): wildcard_from_json,
 }
+_AUTHORIZATION_PARSER = validation.CompiledSchema(
+    _AUTHORIZATION_SCHEMA,
+    'Authorization',
+)
 
 
 def authorization_from_json(json_):
+    return Authorization(**_AUTHORIZATION_PARSER.parse(json_))
 
-    def _make_authorization(**validated_json):
-        if validated_json['wildcard'] is None:
-            validated_json['wildcard'] = False
-        return Authorization(**validated_json)
 
-    return validation.deserialize_dict(
-        json_,
-        _AUTHORIZATION_SCHEMA,
-        _make_authorization,
-        'Authorization',
-    )
+class LazyAuthorization(validation.LazyView):
+    """An ``Authorization`` whose fields are only deserialized when read."""
+    __slots__ = ()
+    _parser = _AUTHORIZATION_PARSER
+    _type = Authorization
@@ -0,0 +1,117 @@
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .authorization import Authorization, AuthorizationStatus
+from .identifier import DnsName, Identifier
+
+
+class AuthorizationIndex:
+    """Remembers which authorizations an account holds that are still valid.
+
+    Authorizations are looked up by account and identifier, or by account
+    and authorization URL, and are forgotten ``margin`` seconds before they
+    expire, so that one isn't relied on just as the server lets it lapse.
+    Only ``VALID`` authorizations with an ``expires`` time are kept.
+    """
+
+    def __init__(
+            self,
+            *,
+            margin: float = 60 * 60,
+            clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.margin = margin
+        self._clock = clock
+        # (account_href, authorization URL) -> (evict_at, identifier key,
+        # authorization)
+        self._by_url: Dict[Tuple[str, str], tuple] = {}
+        # (account_href, identifier key) -> authorization URL
+        self._by_identifier: Dict[Tuple[str, tuple], str] = {}
+        self._evictions: List[Tuple[float, str, str]] = []
+
+    def __len__(self) -> int:
+        self.evict_expired()
+        return len(self._by_url)
+
+    def add(self, account_href: str, authz_url, authz: Authorization) -> bool:
+        """Record ``authz``, if it is valid. Returns whether it was kept."""
+        if authz.status is not AuthorizationStatus.VALID \
+                or authz.expires is None:
+            return False
+        evict_at = authz.expires.timestamp() - self.margin
+        if evict_at <= self._clock():
+            return False
+
+        authz_url = str(authz_url)
+        key = _identifier_key(authz.identifier, authz.wildcard)
+        self._forget(account_href, authz_url)
+        old_url = self._by_identifier.get((account_href, key))
+        if old_url is not None:
+            old_evict_at, _, _ = self._by_url[(account_href, old_url)]
+            if old_evict_at >= evict_at:
+                # Keep whichever lasts longer.
+                return True
+            self._forget(account_href, old_url)
+
+        self._by_url[(account_href, authz_url)] = (evict_at, key, authz)
+        self._by_identifier[(account_href, key)] = authz_url
+        heapq.heappush(self._evictions, (evict_at, account_href, authz_url))
+        return True
+
+    def lookup(
+            self, account_href: str, identifier: Identifier,
+    ) -> Optional[Tuple[str, Authorization]]:
+        """Find a valid authorization for an identifier as requested in an
+        order (so ``*.example.com`` finds the wildcard authorization).
+        """
+        self.evict_expired()
+        key = _order_identifier_key(identifier)
+        authz_url = self._by_identifier.get((account_href, key))
+        if authz_url is None:
+            return None
+        _, _, authz = self._by_url[(account_href, authz_url)]
+        return authz_url, authz
+
+    def lookup_url(
+            self, account_href: str, authz_url,
+    ) -> Optional[Authorization]:
+        self.evict_expired()
+        entry = self._by_url.get((account_href, str(authz_url)))
+        return entry[2] if entry is not None else None
+
+    def discard(self, account_href: str, authz_url) -> None:
+        """Forget an authorization, e.g. after it was deactivated."""
+        self._forget(account_href, str(authz_url))
+
+    def evict_expired(self) -> None:
+        now = self._clock()
+        while self._evictions and self._evictions[0][0] <= now:
+            evict_at, account_href, authz_url = \
+                heapq.heappop(self._evictions)
+            entry = self._by_url.get((account_href, authz_url))
+            # Skip heap entries left over from authorizations that have since
+            # been replaced or discarded.
+            if entry is not None and entry[0] == evict_at:
+                self._forget(account_href, authz_url)
+
+    def _forget(self, account_href: str, authz_url: str) -> None:
+        entry = self._by_url.pop((account_href, authz_url), None)
+        if entry is None:
+            return
+        _, key, _ = entry
+        if self._by_identifier.get((account_href, key)) == authz_url:
+            del self._by_identifier[(account_href, key)]
+
+
+def _identifier_key(identifier: Identifier, wildcard: bool) -> tuple:
+    if isinstance(identifier, DnsName):
+        return ('dns', identifier.domain_name.lower(), wildcard)
+    return (identifier.type, repr(identifier.value), wildcard)
+
+
+def _order_identifier_key(identifier: Identifier) -> tuple:
+    if isinstance(identifier, DnsName) \
+            and identifier.domain_name.startswith('*.'):
+        return _identifier_key(DnsName(identifier.domain_name[2:]), True)
+    return _identifier_key(identifier, False)
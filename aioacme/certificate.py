@@ -0,0 +1,201 @@
+import asyncio
+import os
+import tempfile
+from typing import AsyncIterator, List, Optional
+
+from yarl import URL
+
+from . import util
+
+
+_PEM_BEGIN = b'-----BEGIN CERTIFICATE-----'
+_PEM_END = b'-----END CERTIFICATE-----'
+
+
+async def iter_pem_certificates(
+        chunks: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    """Split a stream of PEM data into one PEM certificate at a time.
+
+    Only the certificate currently being read is held in memory.
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            end = buffer.find(_PEM_END)
+            if end == -1:
+                break
+            start = buffer.find(_PEM_BEGIN)
+            if start == -1 or start > end:
+                raise ValueError('Malformed PEM certificate chain.')
+            end += len(_PEM_END)
+            yield bytes(buffer[start:end]) + b'\n'
+            del buffer[:end]
+    if buffer.strip():
+        raise ValueError('Truncated PEM certificate chain.')
+
+
+def issuer_common_name(pem: bytes) -> Optional[str]:
+    """The common name of a PEM certificate's issuer, if it has one and the
+    certificate can be parsed.
+    """
+    # cryptography comes in with josepy, but only this needs it here.
+    from cryptography import x509
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.x509.oid import NameOID
+
+    try:
+        cert = x509.load_pem_x509_certificate(pem, default_backend())
+    except ValueError:
+        return None
+    names = cert.issuer.get_attributes_for_oid(NameOID.COMMON_NAME)
+    return names[0].value if names else None
+
+
+def certificate_id(pem: bytes) -> str:
+    """The ARI certificate identifier (RFC 9773, section 4.1) of a PEM
+    certificate: its authority key identifier and serial number.
+    """
+    from cryptography import x509
+    from cryptography.hazmat.backends import default_backend
+
+    cert = x509.load_pem_x509_certificate(pem, default_backend())
+    aki = cert.extensions.get_extension_for_class(
+        x509.AuthorityKeyIdentifier,
+    ).value.key_identifier
+    serial = cert.serial_number
+    # The serial's DER encoding, without tag and length: big-endian, with a
+    # leading zero byte if the top bit would otherwise be set.
+    serial_bytes = serial.to_bytes(serial.bit_length() // 8 + 1, 'big')
+    return f'{util.acme_b64encode(aki)}.{util.acme_b64encode(serial_bytes)}'
+
+
+class CertificateStream:
+    """A certificate chain being downloaded; use as an async context manager.
+
+    ``alternate_urls`` lists the other chains the server offers for the same
+    certificate (RFC 8555, section 7.4.2).
+    """
+
+    def __init__(self, client, url) -> None:
+        self.client = client
+        self.url = str(url)
+        self.alternate_urls: List[str] = []
+        self._response_cm = None
+        self._response = None
+
+    async def __aenter__(self) -> 'CertificateStream':
+        headers = [self.client._user_agent_header()]
+        self._response_cm = self.client.aiohttp_client.get(
+            self.url, headers=headers,
+        )
+        with self.client._span('certificate', 'GET', self.url) as span:
+            response = await self._response_cm.__aenter__()
+            span.status = response.status
+            try:
+                self.client._collect_nonce(response)
+                response.raise_for_status()
+            except BaseException:
+                await self._response_cm.__aexit__(None, None, None)
+                raise
+        self._response = response
+        self.alternate_urls = [
+            str(response.url.join(URL(link_url)))
+            for link_url, params in util.parse_link_headers(
+                response.headers.getall('Link', ()),
+            )
+            if params.get('rel') == 'alternate'
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._response_cm.__aexit__(exc_type, exc, tb)
+
+    def iter_chunks(self, chunk_size: int = 16 * 1024) -> AsyncIterator[bytes]:
+        return self._response.content.iter_chunked(chunk_size)
+
+    def iter_certificates(self) -> AsyncIterator[bytes]:
+        """Yield each certificate in the chain, leaf first, as PEM."""
+        return iter_pem_certificates(self.iter_chunks())
+
+    async def save(self, path: str) -> Optional[bytes]:
+        """Write the chain to ``path``; returns the last certificate's PEM."""
+        last = None
+        with open(path, 'wb') as chain_file:
+            async for cert in self.iter_certificates():
+                chain_file.write(cert)
+                last = cert
+        return last
+
+
+async def download_certificate(
+        client,
+        url,
+        path: str,
+        *,
+        preferred_issuer: Optional[str] = None,
+) -> str:
+    """Download a certificate chain to ``path``; returns the URL it came from.
+
+    With ``preferred_issuer``, the default chain and every alternate chain
+    are downloaded concurrently, each straight to its own temporary file, and
+    the first chain whose topmost certificate was issued by a CA with that
+    common name is moved to ``path``. If none match, or none can be parsed,
+    the default chain is used.
+    """
+    if preferred_issuer is None:
+        async with CertificateStream(client, url) as stream:
+            await _save_atomically(stream, path)
+        return stream.url
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_paths = []
+
+    async def fetch(chain_url, stream=None):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.chain-')
+        os.close(fd)
+        tmp_paths.append(tmp_path)
+        if stream is None:
+            async with CertificateStream(client, chain_url) as stream:
+                last = await stream.save(tmp_path)
+        else:
+            last = await stream.save(tmp_path)
+        issuer = issuer_common_name(last) if last is not None else None
+        return chain_url, tmp_path, issuer
+
+    try:
+        async with CertificateStream(client, url) as default_stream:
+            chains = await asyncio.gather(
+                fetch(default_stream.url, default_stream),
+                *(
+                    fetch(alternate_url)
+                    for alternate_url in default_stream.alternate_urls
+                ),
+            )
+        chosen = next(
+            (chain for chain in chains if chain[2] == preferred_issuer),
+            chains[0],
+        )
+        chosen_url, chosen_path, _ = chosen
+        os.replace(chosen_path, path)
+        tmp_paths.remove(chosen_path)
+        return chosen_url
+    finally:
+        for tmp_path in tmp_paths:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+async def _save_atomically(stream: CertificateStream, path: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.chain-')
+    os.close(fd)
+    try:
+        await stream.save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
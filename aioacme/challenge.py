@@ -1,5 +1,6 @@
 from datetime import datetime
 import enum
+import sys
 from typing import Optional
 
 import attr
@@ -23,30 +24,32 @@ class ChallengeStatus(enum.Enum):
     @staticmethod
     def from_json(json_) -> 'ChallengeStatus':
         validation.type_check(json_, str)
-        if json_ == 'pending':
-            return ChallengeStatus.PENDING
-        elif json_ == 'processing':
-            return ChallengeStatus.PROCESSING
-        elif json_ == 'valid':
-            return ChallengeStatus.VALID
-        elif json_ == 'invalid':
-            return ChallengeStatus.INVALID
-        else:
+        try:
+            return _CHALLENGE_STATUSES[json_]
+        except KeyError:
             raise validation.ValidationError(
                 f'Got unknown value {json_!r} for a ChallengeStatus.'
-            )
+            ) from None
 
 
-@attr.s
+_CHALLENGE_STATUSES = {
+    'pending': ChallengeStatus.PENDING,
+    'processing': ChallengeStatus.PROCESSING,
+    'valid': ChallengeStatus.VALID,
+    'invalid': ChallengeStatus.INVALID,
+}
+
+
+@attr.s(slots=True, frozen=True)
 class Challenge:
     type: str = attr.ib()
     url: URL = attr.ib()
     status: ChallengeStatus = attr.ib()
     validated: Optional[datetime] = attr.ib()
-    error: Optional[problem.Problem] = attr.ib()
+    error: Optional[problem.Problem] = attr.ib(hash=False)
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class Http01Challenge(Challenge):
     token: str = attr.ib()
 
@@ -55,27 +58,33 @@ class Http01Challenge(Challenge):
         return f'{self.token}.{util.acme_b64encode(thumbprint)}'
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class Dns01Challenge(Challenge):
     token = attr.ib()
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class TlsAlpn01Challenge(Challenge):
     token = attr.ib()
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class UnknownChallenge(Challenge):
-    extra_json = attr.ib()
+    extra_json = attr.ib(hash=False)
 
 
 def token_from_json(json_) -> str:
     return validation.type_check(json_, str)
 
 
+def challenge_type_from_json(json_) -> str:
+    # There are only a handful of challenge types, so share one copy of each
+    # among all the challenges we parse.
+    return sys.intern(validation.is_string(json_))
+
+
 _CHALLENGE_BASE_SCHEMA = {
-    'type': validation.is_string,
+    'type': challenge_type_from_json,
     'url': validation.url_from_json,
     'status': ChallengeStatus.from_json,
     OptionalKey('validated'): validation.datetime_from_json,
@@ -92,44 +101,50 @@ _TLS_ALPN_01_SCHEMA = {
 }
 
 
-def challenge_from_json(json_) -> Challenge:
-    validated_base = validation.deserialize_dict(
-        json_,
-        _CHALLENGE_BASE_SCHEMA,
-        lambda **dct: dct,
-        'Challenge',
-    )
-
-    challenge_type: str = validated_base['type']
-    if challenge_type == 'http-01':
-        return validation.deserialize_dict(
-            json_,
-            _HTTP_01_SCHEMA,
-            lambda **dct: Http01Challenge(**validated_base, **dct),
-            'Http01Challenge',
-        )
-    elif challenge_type == 'dns-01':
-        return validation.deserialize_dict(
-            json_,
-            _DNS_01_SCHEMA,
-            lambda **dct: Dns01Challenge(**validated_base, **dct),
-            'Dns01Challenge',
-        )
-    elif challenge_type == 'tls-alpn-01':
-        return validation.deserialize_dict(
-            json_,
+_CHALLENGE_BASE_PARSER = validation.CompiledSchema(
+    _CHALLENGE_BASE_SCHEMA,
+    'Challenge',
+)
+# Each known challenge type, with the parser for all of its fields (base
+# fields first) and the class to build.
+_CHALLENGE_PARSERS = {
+    'http-01': (
+        validation.CompiledSchema(
+            _HTTP_01_SCHEMA, 'Http01Challenge', base=_CHALLENGE_BASE_PARSER,
+        ),
+        Http01Challenge,
+    ),
+    'dns-01': (
+        validation.CompiledSchema(
+            _DNS_01_SCHEMA, 'Dns01Challenge', base=_CHALLENGE_BASE_PARSER,
+        ),
+        Dns01Challenge,
+    ),
+    'tls-alpn-01': (
+        validation.CompiledSchema(
             _TLS_ALPN_01_SCHEMA,
-            lambda **dct: TlsAlpn01Challenge(**validated_base, **dct),
             'TlsAlpn01Challenge',
-        )
-    else:
-        for key in _CHALLENGE_BASE_SCHEMA:
-            field_name = \
-                key.field_name if isinstance(key, OptionalKey) else key
-            delete_if_exists(json_, field_name)
-        return UnknownChallenge(extra_json=json_, **validated_base)
-
-
-def delete_if_exists(dct, key):
-    if key in dct:
-        del dct[key]
+            base=_CHALLENGE_BASE_PARSER,
+        ),
+        TlsAlpn01Challenge,
+    ),
+}
+_CHALLENGE_BASE_FIELDS = frozenset(
+    key.field_name if isinstance(key, OptionalKey) else key
+    for key in _CHALLENGE_BASE_SCHEMA
+)
+
+
+def challenge_from_json(json_) -> Challenge:
+    challenge_type = json_.get('type') if isinstance(json_, dict) else None
+    try:
+        parser, challenge_cls = _CHALLENGE_PARSERS[challenge_type]
+    except (KeyError, TypeError):
+        # Unknown (or invalid) type; the base parser reports any errors.
+        validated = _CHALLENGE_BASE_PARSER.parse(json_)
+        extra_json = {
+            key: value for key, value in json_.items()
+            if key not in _CHALLENGE_BASE_FIELDS
+        }
+        return UnknownChallenge(extra_json=extra_json, **validated)
+    return challenge_cls(**parser.parse(json_))
@@ -1,14 +1,32 @@
-import json
+import asyncio
+import contextlib
+import logging
+import time
 from typing import Any, List, Optional
 
 import aiohttp
-import josepy.jws
 from yarl import URL
 
+from .errors import ErrorResponse, NotSupported, ProtocolError
+from .signing import AcmeHeader, AcmeJws, AcmeSignature
 from . import account
 from . import authorization
+from . import certificate as _certificate
+from . import codec as _codec
+from . import dircache as _dircache
+from . import metrics as _metrics
+from . import nonce as _nonce
 from . import order as _order
+from . import poll as _poll
 from . import problem as _problem
+from . import ratelimit
+from . import renewal as _renewal
+from . import signing
+from . import singleflight
+from . import util
+
+
+logger = logging.getLogger(__name__)
 
 
 class AcmeClient:
@@ -19,65 +37,284 @@ class AcmeClient:
             full_user_agent: str,
             aiohttp_client,
             aiohttp_client_is_owned: bool,
+            signer: Optional[signing.Signer] = None,
+            directory_cache: Optional[_dircache.DirectoryCache] = None,
+            rate_limits=None,
+            retry_policy: Optional[ratelimit.RetryPolicy] = None,
+            codec: Optional[_codec.JsonCodec] = None,
+            get_cache_ttl: float = 0.0,
     ) -> None:
         self.directory_url = directory_url
         self.directory = directory
         self.aiohttp_client = aiohttp_client
         self.aiohttp_client_is_owned = aiohttp_client_is_owned
+        self.codec = codec if codec is not None else _codec.default_codec()
         self.user_agent = full_user_agent
-        self.next_nonce = None
+        self.nonces = _nonce.NoncePool(self._fetch_nonce)
+        self.signer = signer if signer is not None else signing.InlineSigner()
+        self.poller = None
+        self.directory_cache = directory_cache
+        self._directory_refresh = None
+        self.rate_limiter = ratelimit.RateLimiter.for_directory(
+            directory_url, rate_limits,
+        )
+        self.retry_policy = retry_policy if retry_policy is not None \
+            else ratelimit.RetryPolicy()
+        # Each gets a metrics.Span for every request; see add_tracer.
+        self.tracers: List[_metrics.Tracer] = []
+        self.get_cache = singleflight.GetCoalescer(get_cache_ttl)
+
+    def add_tracer(self, tracer: _metrics.Tracer) -> None:
+        """Have ``tracer`` receive a ``metrics.Span`` for every request."""
+        self.tracers.append(tracer)
+
+    @contextlib.contextmanager
+    def _span(self, kind: Optional[str], method: str, url: str, span=None):
+        if span is None:
+            span = _metrics.Span(
+                kind=self._endpoint_kind(url, kind, method),
+                method=method,
+                url=url,
+            )
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as err:
+            span.error = err
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            for tracer in self.tracers:
+                tracer.on_span(span)
+
+    def _endpoint_kind(self, url: str, kind: Optional[str], method: str):
+        if kind is not None:
+            return kind
+        endpoint = self.directory.endpoint_for_url(url)
+        if endpoint is not None:
+            return _DIRECTORY_ENDPOINTS[endpoint]
+        return method.lower()
 
     async def close(self):
+        if self._directory_refresh is not None:
+            self._directory_refresh.cancel()
+        if self.poller is not None:
+            await self.poller.close()
+        await self.nonces.close()
+        await self.signer.close()
         if self.aiohttp_client_is_owned:
-            self.aiohttp_client.close()
+            await self.aiohttp_client.close()
+
+    async def _fetch_nonce(self) -> str:
+        try:
+            return await self._head_new_nonce()
+        except aiohttp.ClientResponseError as err:
+            if err.status != 404 or self.directory_cache is None:
+                raise
+        # Our cached directory may be out of date.
+        await self.refresh_directory()
+        return await self._head_new_nonce()
+
+    async def _head_new_nonce(self) -> str:
+        headers = [('User-Agent', self.user_agent)]
+        url = self.directory.new_nonce_url
+        with self._span('newNonce', 'HEAD', url) as span:
+            async with self.aiohttp_client.head(url, headers=headers) \
+                    as response:
+                span.status = response.status
+                response.raise_for_status()
+                return response.headers['Replay-Nonce']
+
+    async def refresh_directory(self) -> 'Directory':
+        """Fetch the directory again, updating the cache if there is one."""
+        self.directory = await _fetch_directory(
+            self.aiohttp_client, self.directory_url, self.user_agent,
+            self.codec,
+        )
+        if self.directory_cache is not None:
+            self.directory_cache.store(
+                self.directory_url, self.directory.to_json(),
+            )
+        return self.directory
+
+    def _revalidate_directory(self) -> None:
+        """Refresh the directory in the background."""
+        async def revalidate():
+            try:
+                await self.refresh_directory()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The cached copy is still usable; a request that fails
+                # against it will refresh it again.
+                logger.warning(
+                    'Failed to revalidate ACME directory %s',
+                    self.directory_url,
+                    exc_info=True,
+                )
+
+        self._directory_refresh = asyncio.ensure_future(revalidate())
+
+    async def _refresh_stale_endpoint(self, url: str) -> Optional[str]:
+        if self.directory_cache is None:
+            return None
+        endpoint = self.directory.endpoint_for_url(url)
+        if endpoint is None:
+            return None
+        await self.refresh_directory()
+        return getattr(self.directory, endpoint)
 
     async def refresh_nonce(self) -> None:
-        headers = [('User-Agent', self.user_agent)]
-        async with self.aiohttp_client.head(
-                self.directory.new_nonce_url,
-                headers=headers,
-        ) as response:
-            response.raise_for_status()
-            self.next_nonce = response.headers['Replay-Nonce']
+        self.nonces.put(await self._fetch_nonce())
 
     async def consume_nonce(self) -> str:
-        if self.next_nonce is None:
-            await self.refresh_nonce()
-        nonce = self.next_nonce
-        self.next_nonce = None
-        return nonce
-
-    async def _get(self, url: str):
-        headers = [('User-Agent', self.user_agent)]
-        async with self.aiohttp_client.get(url, headers=headers) as response:
-            response.raise_for_status()
-            return await response.json()
-
-    async def _post(self, url: str, data: bytes, headers):
-        async with self.aiohttp_client.post(url, data=data, headers=headers) \
-                as response:
-            if 400 <= response.status:
+        return await self.nonces.get()
+
+    def _collect_nonce(self, response) -> None:
+        self.nonces.put(response.headers.get('Replay-Nonce'))
+
+    async def _get(self, url: str, kind: Optional[str] = None):
+        _, json_data = await self._get_with_headers(url, kind)
+        return json_data
+
+    async def _post(self, url: str, data: bytes, headers, span=None):
+        with self._span(None, 'POST', url, span) as span:
+            span.request_bytes = len(data)
+            async with self.aiohttp_client.post(
+                    url, data=data, headers=headers,
+            ) as response:
+                span.status = response.status
                 body = await response.read()
-                if response.headers['Content-Type'] == 'application/problem+json':
-                    json_ = json.loads(body)
-                    problem = _problem.from_json(json_)
-                    if problem is not None:
-                        raise problem
-                raise ErrorResponse(response.status, response.headers, body)
-
-            self.next_nonce = response.headers['Replay-Nonce']
-
-            if response.headers['Content-Type'] == 'application/json' \
-                    or response_headers['Content-Type'].endswith('+json'):
-                json_ = await response.json()
-                return response.status, response.headers, json_
-            else:
-                raise ProtocolError(
-                    'Response body was not JSON.',
-                    response.status,
-                    response.headers,
-                    await response.read(),
+                span.response_bytes = len(body)
+                return self._handle_post_response(response, body)
+
+    def _handle_post_response(self, response, body: bytes):
+        self._collect_nonce(response)
+        if 400 <= response.status:
+            retry_after = util.parse_retry_after(
+                response.headers.get('Retry-After'),
+            )
+            content_type = response.headers.get('Content-Type')
+            if content_type == 'application/problem+json':
+                json_ = self.codec.loads(body)
+                problem = _problem.from_json(json_)
+                if problem is not None:
+                    problem.http_status = response.status
+                    problem.retry_after = retry_after
+                    problem.http_headers = response.headers
+                    raise problem
+            raise ErrorResponse(
+                response.status, response.headers, body, retry_after,
+            )
+
+        content_type = response.headers.get('Content-Type', '')
+        if content_type == 'application/json' \
+                or content_type.endswith('+json'):
+            json_ = self.codec.loads(body)
+            return response.status, response.headers, json_
+        else:
+            raise ProtocolError(
+                'Response body was not JSON.',
+                response.status,
+                response.headers,
+                body,
+            )
+
+    async def _post_signed(
+            self, url: str, sign, kind: Optional[str] = None, related=(),
+    ):
+        """POST a JWS built by ``await sign(nonce, url)``.
+
+        Requests wait their turn at ``rate_limiter``, if there is one. Failed
+        requests are signed again with a fresh nonce and retried as
+        ``retry_policy`` allows; a ``rateLimited`` problem also holds back
+        other requests to the same kind of endpoint until its
+        ``Retry-After``. If the directory came from a cache and ``url`` is one
+        of its endpoints that no longer exists, the directory is refetched
+        and the request retried, once, at the new endpoint.
+
+        Whether or not it succeeds, the POST drops any cached GET of the
+        ``related`` URLs, and of those its response points at; see
+        ``_invalidate_after_post``.
+        """
+        headers = [
+            ('Content-Type', 'application/jose+json'),
+            ('User-Agent', self.user_agent),
+        ]
+        attempt = 0
+        retried_directory = False
+        while True:
+            attempt += 1
+            span = _metrics.Span(
+                kind=self._endpoint_kind(url, kind, 'POST'),
+                method='POST',
+                url=url,
+            )
+            if self.rate_limiter is not None:
+                waiting_start = time.perf_counter()
+                await self.rate_limiter.acquire(span.kind)
+                span.rate_limit_wait = time.perf_counter() - waiting_start
+            start = time.perf_counter()
+            nonce, from_pool = await self.nonces.get_with_source()
+            span.nonce_source = _metrics.NONCE_FROM_POOL if from_pool \
+                else _metrics.NONCE_FROM_FETCH
+            signing_start = time.perf_counter()
+            span.nonce_wait = signing_start - start
+            data = await sign(nonce, url)
+            span.sign_time = time.perf_counter() - signing_start
+            try:
+                result = await self._post(url, data, headers, span)
+            except (_problem.Problem, ErrorResponse) as err:
+                # A POST that was refused may still have changed the
+                # resources behind it: the authorization of a challenge
+                # that failed, an order that finalizing invalidated.
+                self._invalidate_after_post(url, err.http_headers, related)
+                if _is_not_found(err) and not retried_directory:
+                    retried_directory = True
+                    new_url = await self._refresh_stale_endpoint(url)
+                    if new_url is not None:
+                        url = new_url
+                        continue
+                delay = self.retry_policy.delay_for(
+                    err, attempt, span.kind,
                 )
+                if delay is None:
+                    raise
+                logger.debug(
+                    'Retrying POST to %s in %.2fs after %r', url, delay, err,
+                )
+                if ratelimit.is_rate_limited(err) \
+                        and self.rate_limiter is not None:
+                    self.rate_limiter.pause(span.kind, delay)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                continue
+            self._invalidate_after_post(url, result[1], related)
+            return result
+
+    def _invalidate_after_post(
+            self, url: str, response_headers, related=(),
+    ) -> None:
+        # A POST may change what it was sent to, the resources the caller
+        # says it affects, and what the response points at: the order a
+        # finalize URL belongs to, or the authorization a challenge is "up"
+        # from.
+        self.invalidate(url)
+        for related_url in related:
+            self.invalidate(related_url)
+        if response_headers is None:
+            return
+        location = response_headers.get('Location')
+        if location is not None:
+            self.invalidate(str(URL(url).join(URL(location))))
+        links = util.parse_link_headers(response_headers.getall('Link', ()))
+        for link_url, params in links:
+            if params.get('rel') == 'up':
+                self.invalidate(str(URL(url).join(URL(link_url))))
+
+    def invalidate(self, url) -> None:
+        """Drop any cached GET response for ``url``; see ``get_cache``."""
+        self.get_cache.invalidate(str(url))
 
     async def _post_with_key_id(
             self,
@@ -85,23 +322,24 @@ class AcmeClient:
             data: bytes,
             private_key,
             account_href: str,
+            alg=None,
+            kind: Optional[str] = None,
+            related=(),
     ):
-        headers = [
-            ('Content-Type', 'application/jose+json'),
-            ('User-Agent', self.user_agent),
-        ]
-        nonce = await self.consume_nonce()
-        jws_data = AcmeJws.sign(
-            data,
-            key=private_key,
-            alg=josepy.jwa.RS256,
-            protect=frozenset(('alg', 'url', 'kid', 'nonce')),
-            include_jwk=False,
-            url=url,
-            kid=account_href,
-            nonce=nonce,
-        ).json_dumps().encode('utf-8')
-        return await self._post(url, jws_data, headers)
+        if alg is None:
+            alg = signing.alg_for_key(private_key)
+
+        async def sign(nonce, url):
+            return await self.signer.sign(signing.SignRequest(
+                payload=data,
+                key=private_key,
+                alg=alg,
+                url=url,
+                nonce=nonce,
+                kid=account_href,
+            ))
+
+        return await self._post_signed(url, sign, kind, related)
 
     async def _post_json_with_key_id(
             self,
@@ -109,12 +347,18 @@ class AcmeClient:
             json_data,
             private_key,
             account_href: str,
+            alg=None,
+            kind: Optional[str] = None,
+            related=(),
     ):
         return await self._post_with_key_id(
             url,
-            json.dumps(json_data).encode('utf-8'),
+            self.codec.dumps(json_data),
             private_key,
             account_href,
+            alg,
+            kind,
+            related,
         )
 
     async def new_account(
@@ -124,11 +368,6 @@ class AcmeClient:
             terms_of_service_agreed: Optional[bool] = None,
             external_account_binding: Optional[Any] = None,
     ):
-        headers = [
-            ('Content-Type', 'application/jose+json'),
-            self._user_agent_header(),
-        ]
-
         json_data = {}
         if contacts is not None:
             json_data['contacts'] = [str(contact) for contact in contacts]
@@ -137,112 +376,241 @@ class AcmeClient:
         if external_account_binding is not None:
             json_data['externalAccountBinding'] = external_account_binding
 
-        nonce = await self.consume_nonce()
-        jws_data = AcmeJws.sign(
-            json.dumps(json_data).encode('utf-8'),
-            key=key,
-            alg=josepy.jwa.RS256,
-            protect=frozenset(('alg', 'url', 'jwk', 'nonce')),
-            url=self.directory.new_account_url,
-            nonce=nonce,
-        ).json_dumps().encode('utf-8')
-
-        async with self.aiohttp_client.post(
-                self.directory.new_account_url,
-                data=jws_data,
-                headers=headers,
-        ) as response:
-            response.raise_for_status()
-            self.next_nonce = response.headers['Replay-Nonce']
-            account_href = response.headers['Location']
-            return account.Account(self, key, account_href)
+        return await self._post_with_jwk(
+            self.codec.dumps(json_data),
+            key,
+        )
 
     async def existing_account_from_key(self, key):
-        headers = [
-            ('Content-Type', 'application/jose+json'),
-            ('User-Agent', self.user_agent),
-        ]
         json_data = b'{"onlyReturnExisting": true}'
-        nonce = await self.consume_nonce()
-        jws_data = AcmeJws.sign(
-            json_data,
-            key=key,
-            alg=josepy.jwa.RS256,
-            protect=frozenset(('alg', 'url', 'jwk', 'nonce')),
-            url=self.directory.new_account_url,
-            nonce=nonce,
-        ).json_dumps().encode('utf-8')
-
-        async with self.aiohttp_client.post(
-                self.directory.new_account_url,
-                data=jws_data,
-                headers=headers,
-        ) as response:
-            response.raise_for_status()
-            self.next_nonce = response.headers['Replay-Nonce']
-            account_href = response.headers['Location']
-            return account.Account(self, key, account_href)
-
-    async def get(self, url):
+        return await self._post_with_jwk(json_data, key)
+
+    async def _post_with_jwk(self, data: bytes, key):
+        url = self.directory.new_account_url
+
+        async def sign(nonce, url):
+            return await self.signer.sign(signing.SignRequest(
+                payload=data,
+                key=key,
+                alg=signing.alg_for_key(key),
+                url=url,
+                nonce=nonce,
+            ))
+
+        _, response_headers, _ = await self._post_signed(url, sign)
+        account_href = response_headers['Location']
+        return account.Account(self, key, account_href)
+
+    async def get(self, url, kind: Optional[str] = None):
         headers = [self._user_agent_header()]
-        async with self.aiohttp_client.get(
-                str(url), headers=headers,
-        ) as response:
-            response.raise_for_status()
-            return await response.read()
+        url = str(url)
+        with self._span(kind, 'GET', url) as span:
+            async with self.aiohttp_client.get(url, headers=headers) \
+                    as response:
+                span.status = response.status
+                self._collect_nonce(response)
+                response.raise_for_status()
+                body = await response.read()
+                span.response_bytes = len(body)
+                return body
+
+    def open_certificate(self, url) -> _certificate.CertificateStream:
+        """Stream a certificate chain; use as ``async with``."""
+        return _certificate.CertificateStream(self, url)
+
+    async def download_certificate(
+            self, url, path: str, *, preferred_issuer: Optional[str] = None,
+    ) -> str:
+        """Stream a certificate chain to a file; see
+        ``certificate.download_certificate``.
+        """
+        return await _certificate.download_certificate(
+            self, url, path, preferred_issuer=preferred_issuer,
+        )
 
-    async def fetch_order(self, order_url):
+    async def _get_with_headers(
+            self,
+            url: str,
+            kind: Optional[str] = None,
+            *,
+            use_cache: bool = True,
+    ):
+        """GET ``url``, returning the response headers and decoded body.
+
+        Concurrent GETs of the same URL share one request, and with a
+        ``get_cache_ttl`` the response is reused for that long, until a POST
+        through this client invalidates it.
+        """
+        return await self.get_cache.fetch(
+            url,
+            lambda: self._fetch_with_headers(url, kind),
+            use_cache=use_cache,
+        )
+
+    async def _fetch_with_headers(self, url: str, kind: Optional[str]):
         headers = [self._user_agent_header()]
-        async with self.aiohttp_client.get(
-                str(order_url), headers=headers,
-        ) as response:
-            response.raise_for_status()
-            json_data = await response.json()
-            return _order.Order.from_json(json_data)
-
-    async def fetch_authorization(self, authorization_url):
-        headers = [
-            self._user_agent_header(),
-        ]
-        async with self.aiohttp_client.get(
-                str(authorization_url),
-                headers=headers,
-        ) as response:
-            response.raise_for_status()
-            json_data = await response.json()
-            return authorization.authorization_from_json(json_data)
+        with self._span(kind, 'GET', url) as span:
+            async with self.aiohttp_client.get(url, headers=headers) \
+                    as response:
+                span.status = response.status
+                self._collect_nonce(response)
+                response.raise_for_status()
+                body = await response.read()
+                span.response_bytes = len(body)
+                return response.headers, self.codec.loads(body)
+
+    async def fetch_order(self, order_url, *, lazy: bool = False):
+        """Fetch an order. With ``lazy``, returns an ``order.LazyOrder``,
+        which only deserializes the fields that are read; cheaper when only
+        the status is wanted.
+        """
+        _, json_data = await self._get_with_headers(str(order_url), 'order')
+        if lazy:
+            return _order.LazyOrder(json_data)
+        return _order.Order.from_json(json_data)
+
+    async def fetch_authorization(
+            self, authorization_url, *, lazy: bool = False,
+    ):
+        """Fetch an authorization; ``lazy`` is as for ``fetch_order``."""
+        _, json_data = await self._get_with_headers(
+            str(authorization_url), 'authz',
+        )
+        if lazy:
+            return authorization.LazyAuthorization(json_data)
+        return authorization.authorization_from_json(json_data)
+
+    async def renewal_info(self, cert_id: str) -> _renewal.RenewalInfo:
+        """Fetch the ARI renewal window for a certificate, given its
+        ``certificate.certificate_id``.
+        """
+        if self.directory.renewal_info_url is None:
+            raise NotSupported(
+                'The server does not offer renewal information (ARI).'
+            )
+        url = f'{self.directory.renewal_info_url.rstrip("/")}/{cert_id}'
+        headers, json_data = await self._get_with_headers(url, 'renewalInfo')
+        return _renewal.RenewalInfo.from_json(
+            json_data,
+            retry_after=util.parse_retry_after(headers.get('Retry-After')),
+        )
+
+    async def renewal_infos(
+            self, cert_ids, *, concurrency: int = 10,
+    ) -> List[_renewal.RenewalInfo]:
+        """``renewal_info`` for each of ``cert_ids``, ``concurrency`` at a
+        time, in the same order.
+        """
+        return await util.map_ordered(
+            self.renewal_info, cert_ids, concurrency,
+        )
+
+    async def wait_for(self, url, *statuses, timeout=None):
+        """Poll an order or authorization until it reaches one of ``statuses``.
+
+        All waits on a client share one ``poll.Poller``; see
+        ``Poller.wait_for``. To tune polling, set ``client.poller`` to a
+        ``Poller`` of your own before the first wait.
+        """
+        if self.poller is None:
+            self.poller = _poll.Poller(self)
+        return await self.poller.wait_for(url, *statuses, timeout=timeout)
 
     def _user_agent_header(self):
         return ('User-Agent', self.user_agent)
 
 
-async def new_client(url, user_agent, aiohttp_client=None):
+async def new_client(
+        url,
+        user_agent,
+        aiohttp_client=None,
+        signer=None,
+        directory_cache=None,
+        rate_limits=None,
+        retry_policy=None,
+        codec=None,
+        get_cache_ttl: float = 0.0,
+):
+    """Create a client for the ACME server whose directory is at ``url``.
+
+    If ``directory_cache`` is given and holds a copy of the directory, the
+    client is returned without waiting on the network. A copy older than the
+    cache's TTL is still used, but is refetched in the background.
+
+    ``rate_limits`` is a ``ratelimit.RateLimits``, or a dict of them keyed
+    by directory URL (``None`` keying the fallback). By default there are
+    no client-side limits.
+
+    ``codec`` is the ``codec.JsonCodec`` used for bodies; by default, the
+    fastest one installed.
+
+    GETs of orders, authorizations and renewal information are coalesced,
+    so concurrent callers share one request. With ``get_cache_ttl``,
+    responses are also reused for that many seconds, or until a POST to
+    the resource; keep it short, as changes made by the server itself are
+    not seen until it runs out.
+    """
     if aiohttp_client is None:
         aiohttp_client = aiohttp.ClientSession()
         aiohttp_client_is_owned = True
     else:
         aiohttp_client_is_owned = False
+    if codec is None:
+        codec = _codec.default_codec()
 
     try:
         full_user_agent = user_agent + ' aioacme/0.0.1.dev0'
-        headers = [('User-Agent', full_user_agent)]
-        async with aiohttp_client.get(url, headers=headers) as response:
-            response.raise_for_status()
-            directory_data = await response.json()
+        cached = None
+        if directory_cache is not None:
+            cached = directory_cache.load(url)
+        if cached is not None:
+            directory_data, is_fresh = cached
             directory = Directory.from_json(directory_data)
-            return AcmeClient(
-                url,
-                directory,
-                full_user_agent,
-                aiohttp_client,
-                aiohttp_client_is_owned,
+        else:
+            directory = await _fetch_directory(
+                aiohttp_client, url, full_user_agent, codec,
             )
+            is_fresh = True
+            if directory_cache is not None:
+                directory_cache.store(url, directory.to_json())
+        client = AcmeClient(
+            url,
+            directory,
+            full_user_agent,
+            aiohttp_client,
+            aiohttp_client_is_owned,
+            signer,
+            directory_cache,
+            rate_limits,
+            retry_policy,
+            codec,
+            get_cache_ttl,
+        )
+        if not is_fresh:
+            client._revalidate_directory()
+        return client
     except:  # noqa: We're cleaning up resources here.
         if aiohttp_client_is_owned:
             await aiohttp_client.close()
         raise
 
 
+async def _fetch_directory(
+        aiohttp_client, url, user_agent, codec,
+) -> 'Directory':
+    headers = [('User-Agent', user_agent)]
+    async with aiohttp_client.get(url, headers=headers) as response:
+        response.raise_for_status()
+        directory_data = codec.loads(await response.read())
+        return Directory.from_json(directory_data)
+
+
+def _is_not_found(err) -> bool:
+    if isinstance(err, ErrorResponse):
+        return err.http_status == 404
+    return getattr(err, 'status', None) == 404
+
+
 class Directory:
     def __init__(
             self,
@@ -252,12 +620,15 @@ class Directory:
             new_nonce_url: str,
             new_order_url: str,
             revoke_certificate_url: str,
+            renewal_info_url: Optional[str] = None,
     ) -> None:
         self.key_change_url = key_change_url
         self.new_account_url = new_account_url
         self.new_nonce_url = new_nonce_url
         self.new_order_url = new_order_url
         self.revoke_certificate_url = revoke_certificate_url
+        # Only set if the server supports ARI (RFC 9773).
+        self.renewal_info_url = renewal_info_url
 
     @staticmethod
     def from_json(data):
@@ -266,6 +637,7 @@ class Directory:
         new_nonce_url = data['newNonce']
         new_order_url = data['newOrder']
         revoke_certificate_url = data['revokeCert']
+        renewal_info_url = data.get('renewalInfo')
 
         return Directory(
             key_change_url=key_change_url,
@@ -273,19 +645,31 @@ class Directory:
             new_nonce_url=new_nonce_url,
             new_order_url=new_order_url,
             revoke_certificate_url=revoke_certificate_url,
+            renewal_info_url=renewal_info_url,
         )
 
-
-class AcmeHeader(josepy.jws.Header):
-    nonce = josepy.json_util.Field('nonce', omitempty=True)
-    url = josepy.json_util.Field('url', omitempty=True)
-
-
-class AcmeSignature(josepy.jws.Signature):
-    header_cls = AcmeHeader
-    __slots__ = ('combined',)
-
-
-class AcmeJws(josepy.jws.JWS):
-    signature_cls = AcmeSignature
-    __slots__ = ('payload', 'signatures')
+    def to_json(self):
+        data = {
+            json_name: getattr(self, attr_name)
+            for attr_name, json_name in _DIRECTORY_ENDPOINTS.items()
+        }
+        if self.renewal_info_url is not None:
+            data['renewalInfo'] = self.renewal_info_url
+        return data
+
+    def endpoint_for_url(self, url: str) -> Optional[str]:
+        """The attribute name of the endpoint at ``url``, if any."""
+        for attr_name in _DIRECTORY_ENDPOINTS:
+            if getattr(self, attr_name) == str(url):
+                return attr_name
+        return None
+
+
+# Directory attribute names, and the fields they come from in the JSON.
+_DIRECTORY_ENDPOINTS = {
+    'key_change_url': 'keyChange',
+    'new_account_url': 'newAccount',
+    'new_nonce_url': 'newNonce',
+    'new_order_url': 'newOrder',
+    'revoke_certificate_url': 'revokeCert',
+}
@@ -0,0 +1,70 @@
+"""JSON encoding and decoding for request and response bodies.
+
+Everything here works in bytes: bodies are encoded straight to the bytes
+that are sent, and decoded straight from the bytes that were read.
+"""
+
+import json
+from typing import Any
+
+
+class JsonCodec:
+    name = 'abstract'
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class StdlibCodec(JsonCodec):
+    name = 'json'
+
+    def __init__(self) -> None:
+        # Escaping to ASCII is faster than not, and ASCII is valid UTF-8.
+        self._encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        # json.loads would take the bytes, but then sniffs their encoding;
+        # RFC 8259 says it is always UTF-8, and decoding that is cheaper.
+        return json.loads(data.decode('utf-8'))
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        import orjson
+        # orjson works in bytes natively, so these are its own functions.
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+
+    def __init__(self) -> None:
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._ujson.dumps(
+            obj, ensure_ascii=False, escape_forward_slashes=False,
+        ).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return self._ujson.loads(data)
+
+
+def default_codec() -> JsonCodec:
+    """The fastest codec available: orjson, then ujson, then the stdlib."""
+    for codec_type in (OrjsonCodec, UjsonCodec):
+        try:
+            return codec_type()
+        except ImportError:
+            pass
+    return StdlibCodec()
@@ -0,0 +1,223 @@
+"""Certificate signing requests, and the private keys that go with them."""
+
+import asyncio
+import collections
+import concurrent.futures
+from typing import Deque, Optional, Sequence, Set, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.x509.oid import NameOID
+
+from .identifier import DnsName, Identifier
+
+
+_EC_CURVES = {
+    256: ec.SECP256R1,
+    384: ec.SECP384R1,
+}
+
+
+def generate_private_key_der(key_type: str = 'rsa', key_size: int = 2048):
+    """Generate a private key, returned as unencrypted PKCS#8 DER so that
+    it can come back from another process.
+    """
+    if key_type == 'rsa':
+        key = rsa.generate_private_key(65537, key_size, default_backend())
+    elif key_type == 'ec' and key_size in _EC_CURVES:
+        curve = _EC_CURVES[key_size]()
+        key = ec.generate_private_key(curve, default_backend())
+    else:
+        raise ValueError(f'Unsupported key: {key_type} {key_size}')
+    return key.private_bytes(
+        serialization.Encoding.DER,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+class PrivateKeyPool:
+    """Private keys generated ahead of time in an executor.
+
+    The pool is kept topped up to ``depth`` keys, generating up to that many
+    at once, so ``get`` only waits when more keys are taken in a burst than
+    the pool holds. Keys are generated in ``executor``, which should be a
+    process pool, as generating RSA keys is CPU bound; see
+    ``process_pool_key_pool``.
+
+    The pool can be made outside of any event loop; it starts filling when
+    ``start`` or ``get`` is first called. If it is later used from another
+    loop (say, a second ``asyncio.run``), keys already generated are kept,
+    but those still being generated for the old loop are given up on.
+    """
+
+    def __init__(
+            self,
+            executor: Optional[concurrent.futures.Executor] = None,
+            *,
+            depth: int = 16,
+            key_type: str = 'rsa',
+            key_size: int = 2048,
+            executor_is_owned: bool = False,
+    ) -> None:
+        if depth < 1:
+            raise ValueError(f'depth must be at least 1, got {depth!r}')
+        self.executor = executor
+        self.executor_is_owned = executor_is_owned
+        self.depth = depth
+        self.key_type = key_type
+        self.key_size = key_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._keys: Deque = collections.deque()
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._jobs: Set[asyncio.Future] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def start(self) -> None:
+        """Start filling the pool, ahead of the first ``get``. Must be called
+        from the event loop.
+        """
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            # Anything pending belongs to the old loop, which won't run it.
+            for job in self._jobs:
+                job.remove_done_callback(self._on_generated)
+            self._jobs.clear()
+            self._waiters.clear()
+            self._loop = loop
+            self._fill()
+
+    async def get(self):
+        """Take a private key, waiting for one to be generated if none are
+        ready.
+        """
+        self.start()
+        if self._keys:
+            key = self._keys.popleft()
+            self._fill()
+            return key
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            self._fill()
+        except BaseException:
+            self._waiters.remove(waiter)
+            raise
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() \
+                    and waiter.exception() is None:
+                self._put(waiter.result())
+            raise
+
+    async def close(self) -> None:
+        for job in list(self._jobs):
+            job.cancel()
+        err = RuntimeError('PrivateKeyPool was closed.')
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_exception(err)
+        self._waiters.clear()
+        if self.executor_is_owned:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.executor.shutdown)
+
+    def _wanted(self) -> int:
+        live_waiters = sum(1 for waiter in self._waiters if not waiter.done())
+        return live_waiters + self.depth - len(self._keys) - len(self._jobs)
+
+    def _fill(self) -> None:
+        for _ in range(self._wanted()):
+            job = self._loop.run_in_executor(
+                self.executor,
+                generate_private_key_der,
+                self.key_type,
+                self.key_size,
+            )
+            self._jobs.add(job)
+            job.add_done_callback(self._on_generated)
+
+    def _on_generated(self, job: asyncio.Future) -> None:
+        self._jobs.discard(job)
+        if job.cancelled():
+            return
+        err = job.exception()
+        if err is not None:
+            # Don't spin on a failing executor; let the waiters see why.
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(err)
+            return
+        self._put(serialization.load_der_private_key(
+            job.result(), None, default_backend(),
+        ))
+
+    def _put(self, key) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(key)
+                return
+        self._keys.append(key)
+
+
+def process_pool_key_pool(
+        max_workers: Optional[int] = None, **kwargs,
+) -> PrivateKeyPool:
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    return PrivateKeyPool(executor, executor_is_owned=True, **kwargs)
+
+
+def build_csr(identifiers: Sequence[Identifier], key) -> bytes:
+    """A DER CSR for ``identifiers``, signed with ``key``.
+
+    Every identifier goes in the subjectAltName extension; the first is
+    also the subject's common name, if it is short enough to be one.
+    """
+    names = []
+    for identifier in identifiers:
+        if not isinstance(identifier, DnsName):
+            raise ValueError(f'Cannot put {identifier!r} in a CSR.')
+        names.append(identifier.domain_name)
+    if not names:
+        raise ValueError('A CSR needs at least one identifier.')
+
+    subject = []
+    if len(names[0]) <= 64:
+        subject.append(x509.NameAttribute(NameOID.COMMON_NAME, names[0]))
+    csr = (
+        x509.CertificateSigningRequestBuilder()
+        .subject_name(x509.Name(subject))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName(n) for n in names]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256(), default_backend())
+    )
+    return csr.public_bytes(serialization.Encoding.DER)
+
+
+class CsrBuilder:
+    """Builds CSRs for identifiers, each with a fresh key from a pool."""
+
+    def __init__(self, key_pool: PrivateKeyPool) -> None:
+        self.key_pool = key_pool
+
+    async def build(
+            self, identifiers: Sequence[Identifier],
+    ) -> Tuple[bytes, bytes]:
+        """Returns ``(private key, CSR)``: the key as PEM, the CSR as DER."""
+        key = await self.key_pool.get()
+        csr = build_csr(identifiers, key)
+        key_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        return key_pem, csr
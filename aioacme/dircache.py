@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class DirectoryCache:
+    """Keeps copies of ACME directories in a JSON file on disk.
+
+    Each entry is keyed by the directory URL. Entries older than ``ttl``
+    seconds are still returned by ``load``, but flagged as stale, so that the
+    caller can use them straight away and refetch in the background.
+    """
+
+    def __init__(self, path: str, *, ttl: float = 24 * 60 * 60) -> None:
+        self.path = path
+        self.ttl = ttl
+
+    def load(self, directory_url: str) -> Optional[Tuple[Any, bool]]:
+        """Return ``(directory_json, is_fresh)``, or ``None`` if not cached."""
+        entry = self._read().get(directory_url)
+        if not isinstance(entry, dict) or 'directory' not in entry:
+            return None
+        fetched_at = entry.get('fetched_at', 0)
+        is_fresh = time.time() - fetched_at < self.ttl
+        return entry['directory'], is_fresh
+
+    def store(self, directory_url: str, directory_json) -> None:
+        entries = self._read()
+        entries[directory_url] = {
+            'fetched_at': time.time(),
+            'directory': directory_json,
+        }
+        self._write(entries)
+
+    def invalidate(self, directory_url: str) -> None:
+        entries = self._read()
+        if entries.pop(directory_url, None) is not None:
+            self._write(entries)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError):
+            # A missing or corrupt cache is just an empty one.
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: Dict[str, Any]) -> None:
+        # Write to a temporary file and rename it into place, so that
+        # concurrent readers never see a partly-written cache.
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.dircache-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                json.dump(entries, tmp_file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
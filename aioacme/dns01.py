@@ -0,0 +1,260 @@
+"""Answering DNS-01 challenges (RFC 8555, section 8.4) in batches."""
+
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import attr
+
+from .authorization import Authorization
+from .challenge import Challenge, ChallengeStatus, Dns01Challenge
+from .issuance import ChallengeSolver
+from . import util
+
+
+RECORD_NAME_PREFIX = '_acme-challenge.'
+
+
+def record_name(domain_name: str) -> str:
+    """The name to put a DNS-01 TXT record at, for ``domain_name``."""
+    if domain_name.startswith('*.'):
+        domain_name = domain_name[2:]
+    return RECORD_NAME_PREFIX + domain_name.rstrip('.')
+
+
+def txt_record_value(key_authorization: str) -> str:
+    """The TXT record value for a challenge's key authorization."""
+    digest = hashlib.sha256(key_authorization.encode('ascii')).digest()
+    return util.acme_b64encode(digest)
+
+
+@attr.s(slots=True, frozen=True)
+class TxtRecord:
+    name: str = attr.ib()
+    value: str = attr.ib()
+
+
+class DnsProvider:
+    """Adds and removes TXT records in some DNS service.
+
+    Records come in batches that all belong to the same zone, as chosen by
+    ``zone_for``, so that providers can make one API call per batch.
+    """
+
+    def zone_for(self, name: str) -> str:
+        """The zone that holds ``name``; by default, its last two labels."""
+        return '.'.join(name.rstrip('.').split('.')[-2:])
+
+    async def add_records(self, zone: str, records: List[TxtRecord]) -> None:
+        raise NotImplementedError
+
+    async def remove_records(
+            self, zone: str, records: List[TxtRecord],
+    ) -> None:
+        raise NotImplementedError
+
+    async def wait_for_propagation(self, records: List[TxtRecord]) -> None:
+        """Wait until ``records``, just added, are visible to the CA."""
+        pass
+
+
+def group_by_zone(
+        provider: DnsProvider, records: Iterable[TxtRecord],
+) -> Dict[str, List[TxtRecord]]:
+    zones: Dict[str, List[TxtRecord]] = collections.defaultdict(list)
+    for record in records:
+        zones[provider.zone_for(record.name)].append(record)
+    return zones
+
+
+async def add_records(provider: DnsProvider, records: List[TxtRecord]) -> None:
+    """Add ``records`` zone by zone, concurrently, then wait once for all of
+    them to propagate.
+    """
+    await asyncio.gather(*(
+        provider.add_records(zone, zone_records)
+        for zone, zone_records in group_by_zone(provider, records).items()
+    ))
+    await provider.wait_for_propagation(records)
+
+
+async def remove_records(
+        provider: DnsProvider, records: List[TxtRecord],
+) -> None:
+    await asyncio.gather(*(
+        provider.remove_records(zone, zone_records)
+        for zone, zone_records in group_by_zone(provider, records).items()
+    ))
+
+
+class _Batcher:
+    """Gathers the items passed to ``submit`` within ``window`` seconds of
+    each other, and hands them to ``fn`` as one list.
+    """
+
+    def __init__(
+            self, fn: Callable[[List[Any]], Any], window: float,
+    ) -> None:
+        self.fn = fn
+        self.window = window
+        self._queue: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+
+    async def submit(self, item) -> None:
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._queue.append((item, future))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        await future
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        queue, self._queue = self._queue, []
+        job = asyncio.ensure_future(self.fn([item for item, _ in queue]))
+        job.add_done_callback(
+            lambda job: _deliver(job, [future for _, future in queue])
+        )
+
+
+def _deliver(job: asyncio.Future, futures: List[asyncio.Future]) -> None:
+    err = asyncio.CancelledError() if job.cancelled() else job.exception()
+    for future in futures:
+        if future.done():
+            continue
+        if err is not None:
+            future.set_exception(err)
+        else:
+            future.set_result(None)
+
+
+class Dns01Solver(ChallengeSolver):
+    """A ``ChallengeSolver`` for DNS-01 challenges.
+
+    Records provisioned within ``batch_window`` seconds of each other are
+    added together, one call per zone, with a single propagation wait for
+    the whole batch; every challenge in the batch is then triggered at
+    once. A batch of N names therefore costs one propagation delay, not N.
+    Removals are batched the same way.
+    """
+
+    def __init__(
+            self, provider: DnsProvider, *, batch_window: float = 0.1,
+    ) -> None:
+        self.provider = provider
+        self._adds = _Batcher(
+            lambda records: add_records(provider, records), batch_window,
+        )
+        self._removals = _Batcher(
+            lambda records: remove_records(provider, records), batch_window,
+        )
+
+    def select(self, authz: Authorization) -> Optional[Challenge]:
+        for challenge in authz.challenges:
+            if isinstance(challenge, Dns01Challenge) \
+                    and challenge.status is not ChallengeStatus.INVALID:
+                return challenge
+        return None
+
+    def record_for(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> TxtRecord:
+        return TxtRecord(
+            name=record_name(authz.identifier.domain_name),
+            value=txt_record_value(account.key_authorization(challenge.token)),
+        )
+
+    async def provision(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        await self._adds.submit(self.record_for(account, authz, challenge))
+
+    async def cleanup(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        await self._removals.submit(self.record_for(account, authz, challenge))
+
+
+class MemoryDnsProvider(DnsProvider):
+    """A ``DnsProvider`` keeping TXT records in memory.
+
+    With a ``path``, the records are also kept in that JSON file, so that
+    other processes can see them; it is read when the provider is created
+    and rewritten after every batch.
+
+    :param zones: Zones to group records by; names in none of them fall
+        back to ``DnsProvider.zone_for``.
+    :param propagation_delay: Seconds that ``wait_for_propagation`` takes.
+    """
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            *,
+            zones=(),
+            propagation_delay: float = 0.0,
+    ) -> None:
+        self.path = path
+        # Longest first, so that the most specific zone wins.
+        self.zones = sorted(zones, key=len, reverse=True)
+        self.propagation_delay = propagation_delay
+        self.records: Dict[str, Set[str]] = collections.defaultdict(set)
+        # (method, zone, number of records) for every call, in order.
+        self.calls: List[Tuple[str, str, int]] = []
+        self.propagation_waits = 0
+        if path is not None and os.path.exists(path):
+            with open(path) as records_file:
+                for name, values in json.load(records_file).items():
+                    self.records[name].update(values)
+
+    def zone_for(self, name: str) -> str:
+        name = name.rstrip('.')
+        for zone in self.zones:
+            if name == zone or name.endswith('.' + zone):
+                return zone
+        return super().zone_for(name)
+
+    def txt_values(self, name: str) -> Set[str]:
+        return set(self.records.get(name, ()))
+
+    async def add_records(self, zone, records) -> None:
+        self.calls.append(('add', zone, len(records)))
+        for record in records:
+            self.records[record.name].add(record.value)
+        self._save()
+
+    async def remove_records(self, zone, records) -> None:
+        self.calls.append(('remove', zone, len(records)))
+        for record in records:
+            values = self.records.get(record.name)
+            if values is not None:
+                values.discard(record.value)
+                if not values:
+                    del self.records[record.name]
+        self._save()
+
+    async def wait_for_propagation(self, records) -> None:
+        self.propagation_waits += 1
+        if self.propagation_delay:
+            await asyncio.sleep(self.propagation_delay)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.dns-')
+        try:
+            with os.fdopen(fd, 'w') as records_file:
+                json.dump(
+                    {name: sorted(values) for name, values
+                     in self.records.items()},
+                    records_file,
+                )
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
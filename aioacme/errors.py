@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class AcmeBaseError(Exception):
     pass
 
@@ -20,10 +23,12 @@ class ErrorResponse(AcmeBaseError):
             http_status: int,
             http_headers,
             http_body: bytes,
+            retry_after: Optional[float] = None,
     ) -> None:
         self.http_status = http_status
         self.http_headers = http_headers
         self.http_body = http_body
+        self.retry_after = retry_after
         super().__init__(http_status, http_headers, http_body)
 
 
@@ -40,3 +45,16 @@ class ProtocolError(AcmeBaseError):
         self.http_headers = http_headers
         self.http_body = http_body
         super().__init__(message, http_status, http_headers, http_body)
+
+
+class NotSupported(AcmeBaseError):
+    """The server does not implement an optional part of ACME."""
+
+
+class IssuanceError(AcmeBaseError):
+    """An order could not be carried through to a certificate."""
+
+    def __init__(self, message: str, problem=None) -> None:
+        self.message = message
+        self.problem = problem
+        super().__init__(message, problem)
@@ -0,0 +1,149 @@
+"""Answering HTTP-01 challenges (RFC 8555, section 8.3) in process."""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from aiohttp import web
+
+from .authorization import Authorization, AuthorizationStatus
+from .challenge import Challenge, ChallengeStatus, Http01Challenge
+from .issuance import ChallengeSolver
+
+
+logger = logging.getLogger(__name__)
+
+
+CHALLENGE_PATH_PREFIX = '/.well-known/acme-challenge/'
+
+# Every status but PENDING; waiting for these waits for an authorization to
+# be settled one way or the other.
+_SETTLED_STATUSES = tuple(
+    status for status in AuthorizationStatus
+    if status is not AuthorizationStatus.PENDING
+)
+
+
+class Http01Responder(ChallengeSolver):
+    """Serves key authorizations for HTTP-01 challenges from memory.
+
+    Tokens map straight to the response body to send, so each request is a
+    single dict lookup, and one responder can hold as many tokens as there
+    are challenges in flight. Serve it with ``start``, or mount it in an
+    application of your own with ``add_routes``.
+
+    It is also a ``ChallengeSolver`` for ``issuance.issue_many``, picking
+    the HTTP-01 challenge of each authorization.
+    """
+
+    def __init__(self) -> None:
+        self._key_authorizations: Dict[str, bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._watches: Set[asyncio.Future] = set()
+
+    def __len__(self) -> int:
+        return len(self._key_authorizations)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._key_authorizations
+
+    def register(self, token: str, key_authorization: str) -> None:
+        self._key_authorizations[token] = key_authorization.encode('ascii')
+
+    def register_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Register ``(token, key authorization)`` pairs."""
+        self._key_authorizations.update(
+            (token, key_authorization.encode('ascii'))
+            for token, key_authorization in pairs
+        )
+
+    def remove(self, token: str) -> None:
+        self._key_authorizations.pop(token, None)
+
+    def remove_many(self, tokens: Iterable[str]) -> None:
+        pop = self._key_authorizations.pop
+        for token in tokens:
+            pop(token, None)
+
+    def register_until_settled(
+            self, client, authz_url, token: str, key_authorization: str,
+    ) -> None:
+        """Register a token, and remove it again once the authorization at
+        ``authz_url`` is no longer pending, or can't be polled; ``close``
+        stops any watches still going.
+        """
+        self.register(token, key_authorization)
+
+        async def watch():
+            try:
+                await client.wait_for(authz_url, *_SETTLED_STATUSES)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning(
+                    'Failed to watch authorization %s; removing token %s',
+                    authz_url, token, exc_info=True,
+                )
+            finally:
+                self.remove(token)
+
+        task = asyncio.ensure_future(watch())
+        self._watches.add(task)
+        task.add_done_callback(self._watches.discard)
+
+    # Serving
+
+    def add_routes(self, app: web.Application) -> None:
+        app.router.add_get(
+            CHALLENGE_PATH_PREFIX + '{token}', self._handle, allow_head=False,
+        )
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = self._key_authorizations.get(request.match_info['token'])
+        if body is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=body, content_type='text/plain')
+
+    async def start(self, host: str = '0.0.0.0', port: int = 80) -> None:
+        app = web.Application()
+        self.add_routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self) -> None:
+        watches = list(self._watches)
+        for task in watches:
+            task.cancel()
+        await asyncio.gather(*watches, return_exceptions=True)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'Http01Responder':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    # ChallengeSolver
+
+    def select(self, authz: Authorization) -> Optional[Challenge]:
+        for challenge in authz.challenges:
+            if isinstance(challenge, Http01Challenge) \
+                    and challenge.status is not ChallengeStatus.INVALID:
+                return challenge
+        return None
+
+    async def provision(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        self.register(
+            challenge.token, account.key_authorization(challenge.token),
+        )
+
+    async def cleanup(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        self.remove(challenge.token)
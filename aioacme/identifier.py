@@ -2,7 +2,7 @@ from . import validation
 
 
 class Identifier:
-    pass
+    __slots__ = ()
 
 
 class DnsName(Identifier):
@@ -20,7 +20,7 @@ class DnsName(Identifier):
     def __eq__(self, other):
         if not isinstance(other, DnsName):
             return NotImplemented
-        return self.dns_name == other.dns_name
+        return self.domain_name == other.domain_name
 
     def __ne__(self, other):
         return not (self == other)
@@ -30,10 +30,30 @@ class DnsName(Identifier):
 
 
 class UnknownIdentifier(Identifier):
+    __slots__ = ('type', 'value')
+
     def __init__(self, type_: str, value):
         self.type = type_
         self.value = value
 
+    def __repr__(self):
+        return f'{__name__}.{type(self).__name__}({self.type!r}, {self.value!r})'
+
+    def __hash__(self):
+        # ``value`` may be any JSON, so isn't necessarily hashable.
+        return hash(self.type)
+
+    def __eq__(self, other):
+        if not isinstance(other, UnknownIdentifier):
+            return NotImplemented
+        return self.type == other.type and self.value == other.value
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def to_json(self):
+        return {'type': self.type, 'value': self.value}
+
 
 def identifier_from_json(json_):
     validation.type_check(json_, dict)
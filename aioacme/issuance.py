@@ -0,0 +1,357 @@
+import asyncio
+import functools
+import time
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+import attr
+from yarl import URL
+
+from .authorization import Authorization, AuthorizationStatus
+from .authz_index import AuthorizationIndex
+from .challenge import Challenge
+from .errors import IssuanceError
+from .identifier import Identifier
+from .order import Order, OrderStatus
+from . import statestore as _statestore
+
+
+@attr.s(slots=True, frozen=True)
+class IssuanceRequest:
+    """One certificate to issue.
+
+    :param identifiers: The identifiers to put in the order.
+    :param csr: The CSR to finalize the order with, in DER format. If
+        ``None``, ``issue_many`` builds one with its ``csr_builder``.
+    :param tag: Anything; returned untouched in the ``IssuanceResult``.
+    """
+    identifiers: Sequence[Identifier] = attr.ib()
+    csr: Optional[bytes] = attr.ib(default=None)
+    tag: Any = attr.ib(default=None)
+
+
+@attr.s(slots=True)
+class IssuanceResult:
+    """The outcome of an ``IssuanceRequest``.
+
+    Exactly one of ``certificate`` and ``error`` is set. ``private_key`` is
+    only set if the CSR was built by ``issue_many``, and is PEM.
+    """
+    request: IssuanceRequest = attr.ib()
+    order_url: Optional[URL] = attr.ib(default=None)
+    order: Optional[Order] = attr.ib(default=None)
+    certificate: Optional[bytes] = attr.ib(default=None)
+    error: Optional[BaseException] = attr.ib(default=None)
+    private_key: Optional[bytes] = attr.ib(default=None)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ChallengeSolver:
+    """Provisions whatever a challenge needs to be validated.
+
+    ``issue_many`` calls ``select`` to pick one challenge from each pending
+    authorization, ``provision`` before telling the server to validate it,
+    and ``cleanup`` once the authorization is settled, whether or not it
+    succeeded.
+    """
+
+    def select(self, authz: Authorization) -> Optional[Challenge]:
+        raise NotImplementedError
+
+    async def provision(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        raise NotImplementedError
+
+    async def cleanup(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        pass
+
+
+async def issue_many(
+        account,
+        requests,
+        solver: ChallengeSolver,
+        *,
+        concurrency: int = 10,
+        authz_index: Optional[AuthorizationIndex] = None,
+        state_store: Optional[_statestore.StateStore] = None,
+        csr_builder=None,
+) -> AsyncIterator[IssuanceResult]:
+    """Issue a certificate for each of ``requests``.
+
+    ``requests`` may be a regular or an async iterable, and is only read as
+    fast as the pipeline can take new work. Each request goes through four
+    stages -- creating the order, satisfying its challenges, finalizing, and
+    downloading the certificate -- and each stage runs ``concurrency``
+    workers fed by a bounded queue, so a slow stage holds back the ones
+    before it rather than letting work pile up.
+
+    Results are yielded in completion order. A failure only fails its own
+    ``IssuanceResult``; the rest of the batch carries on.
+
+    With an ``authz_index``, authorizations already known to be valid are
+    neither fetched nor solved again, and newly validated ones are added to
+    it for later orders.
+
+    With a ``state_store``, each order is checkpointed as it passes each
+    stage, and forgotten once its certificate is downloaded. Requests for
+    which a checkpoint exists -- say, because an earlier run died half way
+    -- carry on with the checkpointed order, via ``fetch_order``, rather
+    than creating a new one. Checkpoints whose order has expired are
+    discarded, whether or not ``requests`` includes them, so that ones left
+    behind by requests that are never made again don't pile up.
+
+    Requests without a ``csr`` get one, and a new private key, from
+    ``csr_builder`` (a ``csr.CsrBuilder``) when their order is finalized.
+    The key is checkpointed along with the order; an order found to have
+    been finalized with a key that never made it to the ``state_store`` is
+    replaced with a new one.
+    """
+    if concurrency < 1:
+        raise ValueError(f'concurrency must be at least 1, got {concurrency!r}')
+
+    stages = (
+        _create_order,
+        _satisfy_challenges,
+        functools.partial(_finalize, csr_builder=csr_builder),
+        _download,
+    )
+    checkpoint_stages = (
+        _statestore.STAGE_ORDERED,
+        _statestore.STAGE_AUTHORIZED,
+        _statestore.STAGE_FINALIZED,
+        None,
+    )
+    checkpoints = await state_store.load() if state_store is not None \
+        else {}
+    now = time.time()
+    for key, checkpoint in list(checkpoints.items()):
+        if checkpoint.expires is not None and checkpoint.expires <= now:
+            state_store.discard(key)
+            del checkpoints[key]
+    queues = [asyncio.Queue(maxsize=concurrency) for _ in stages]
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    in_flight = 0
+
+    def start(request) -> IssuanceResult:
+        result = IssuanceResult(request)
+        if checkpoints:
+            checkpoint = checkpoints.pop(checkpoint_key(request), None)
+            if checkpoint is not None:
+                result.order_url = URL(checkpoint.order_url)
+                result.private_key = checkpoint.private_key
+        return result
+
+    async def feed():
+        nonlocal in_flight
+        if hasattr(requests, '__aiter__'):
+            async for request in requests:
+                in_flight += 1
+                await queues[0].put(start(request))
+        else:
+            for request in requests:
+                in_flight += 1
+                await queues[0].put(start(request))
+
+    async def work(stage_idx: int):
+        stage = stages[stage_idx]
+        inbox = queues[stage_idx]
+        is_last = stage_idx == len(stages) - 1
+        while True:
+            result = await inbox.get()
+            try:
+                await stage(account, solver, authz_index, result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                result.error = err
+            if state_store is not None and result.error is None:
+                checkpoint_stage = checkpoint_stages[stage_idx]
+                key = checkpoint_key(result.request)
+                if checkpoint_stage is None:
+                    state_store.discard(key)
+                else:
+                    state_store.save(_statestore.OrderCheckpoint.from_order(
+                        key, checkpoint_stage, result.order_url, result.order,
+                        result.private_key,
+                    ))
+            if result.error is not None or is_last:
+                await results.put(result)
+            else:
+                await queues[stage_idx + 1].put(result)
+
+    workers: List[asyncio.Future] = [
+        asyncio.ensure_future(work(stage_idx))
+        for stage_idx in range(len(stages))
+        for _ in range(concurrency)
+    ]
+    feeder = asyncio.ensure_future(feed())
+    next_result: Optional[asyncio.Future] = None
+    try:
+        while not (feeder.done() and in_flight == 0):
+            if next_result is None:
+                next_result = asyncio.ensure_future(results.get())
+            if not feeder.done():
+                await asyncio.wait(
+                    (next_result, feeder),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not next_result.done():
+                    continue
+            result = await next_result
+            next_result = None
+            in_flight -= 1
+            yield result
+        # Re-raise any error from iterating ``requests``.
+        feeder.result()
+    finally:
+        for task in workers:
+            task.cancel()
+        feeder.cancel()
+        if next_result is not None:
+            next_result.cancel()
+        if state_store is not None:
+            await state_store.flush()
+
+
+def checkpoint_key(request: IssuanceRequest) -> str:
+    """What identifies ``request`` in a ``StateStore``: its identifiers,
+    in a canonical order.
+    """
+    identifiers = (identifier.to_json() for identifier in request.identifiers)
+    return ','.join(sorted(
+        f'{json_["type"]}:{json_["value"]}' for json_ in identifiers
+    ))
+
+
+async def _create_order(
+        account, solver, authz_index, result: IssuanceResult,
+) -> None:
+    if result.order_url is not None:
+        # Resuming from a checkpoint. If the order can't be carried on with,
+        # start over with a new one.
+        try:
+            order = await account.client.fetch_order(result.order_url)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            order = None
+        if order is not None and order.status is not OrderStatus.INVALID \
+                and not _key_lost(result, order):
+            result.order = order
+            return
+        result.private_key = None
+    result.order_url, result.order = \
+        await account.new_order_only(result.request.identifiers)
+
+
+def _key_lost(result: IssuanceResult, order: Order) -> bool:
+    # Finalized with a key we built, but which was not checkpointed.
+    return result.request.csr is None and result.private_key is None \
+        and order.status in (OrderStatus.PROCESSING, OrderStatus.VALID)
+
+
+async def _satisfy_challenges(
+        account, solver, authz_index, result: IssuanceResult,
+) -> None:
+    if result.order.status is OrderStatus.PENDING:
+        authz_urls = result.order.authorization_urls
+        if authz_index is not None:
+            authz_urls = [
+                authz_url for authz_url in authz_urls
+                if authz_index.lookup_url(account.account_href, authz_url)
+                is None
+            ]
+        authorizations = await account.fetch_authorizations(authz_urls)
+        settled = await asyncio.gather(*(
+            _authorize(account, solver, authz_url, authz)
+            for authz_url, authz in authorizations
+        ))
+        if authz_index is not None:
+            for (authz_url, _), authz in zip(authorizations, settled):
+                authz_index.add(account.account_href, authz_url, authz)
+    result.order = await account.client.wait_for(
+        result.order_url, OrderStatus.READY,
+    )
+    _check_order(result.order, OrderStatus.READY, OrderStatus.VALID)
+
+
+async def _authorize(
+        account, solver, authz_url, authz: Authorization,
+) -> Authorization:
+    if authz.status is AuthorizationStatus.VALID:
+        return authz
+    if authz.status is not AuthorizationStatus.PENDING:
+        raise IssuanceError(
+            f'Authorization {authz_url} for {authz.identifier!r} is'
+            f' {authz.status!r}.'
+        )
+
+    challenge = solver.select(authz)
+    if challenge is None:
+        raise IssuanceError(
+            f'No usable challenge in authorization {authz_url} for'
+            f' {authz.identifier!r}.'
+        )
+    await solver.provision(account, authz, challenge)
+    try:
+        await account.respond_to_challenge(challenge)
+        settled = await account.client.wait_for(
+            authz_url, AuthorizationStatus.VALID,
+        )
+    finally:
+        await solver.cleanup(account, authz, challenge)
+
+    if settled.status is not AuthorizationStatus.VALID:
+        errors = [
+            c.error for c in settled.challenges
+            if getattr(c, 'error', None) is not None
+        ]
+        raise IssuanceError(
+            f'Authorization {authz_url} for {authz.identifier!r} is'
+            f' {settled.status!r}.',
+            errors[0] if errors else None,
+        )
+    return settled
+
+
+async def _finalize(
+        account, solver, authz_index, result: IssuanceResult, *, csr_builder,
+) -> None:
+    if result.order.status is OrderStatus.READY:
+        csr = result.request.csr
+        if csr is None:
+            if csr_builder is None:
+                raise IssuanceError(
+                    'The request has no CSR, and there is no csr_builder.'
+                )
+            result.private_key, csr = \
+                await csr_builder.build(result.request.identifiers)
+        result.order = await account.finalize_order(
+            result.order.finalize_url, csr, order_url=result.order_url,
+        )
+    if result.order.status is not OrderStatus.VALID:
+        result.order = await account.client.wait_for(
+            result.order_url, OrderStatus.VALID,
+        )
+    _check_order(result.order, OrderStatus.VALID)
+
+
+async def _download(
+        account, solver, authz_index, result: IssuanceResult,
+) -> None:
+    result.certificate = await account.client.get(
+        result.order.certificate_url, 'certificate',
+    )
+
+
+def _check_order(order: Order, *statuses: OrderStatus) -> None:
+    if order.status not in statuses:
+        raise IssuanceError(
+            f'Order is {order.status!r}, expected one of {statuses!r}.',
+            order.error,
+        )
@@ -0,0 +1,227 @@
+import bisect
+import collections
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import attr
+
+
+NONCE_FROM_POOL = 'pool'
+NONCE_FROM_FETCH = 'fetch'
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+
+
+@attr.s(slots=True)
+class Span:
+    """One HTTP request made by an ``AcmeClient``.
+
+    ``kind`` names the endpoint: a directory endpoint (``newNonce``,
+    ``newOrder``, ...), ``order``, ``authz``, ``challenge``, ``finalize``,
+    ``certificate``, or the bare method for anything else. Times are in
+    seconds. ``sign_time``, ``nonce_wait`` and ``nonce_source`` are only set
+    for signed requests, and ``rate_limit_wait`` -- time spent held back by
+    the client's ``rate_limiter`` -- only for those made with one; neither
+    wait is part of ``duration``.
+    """
+    kind: str = attr.ib()
+    method: str = attr.ib()
+    url: str = attr.ib()
+    status: Optional[int] = attr.ib(default=None)
+    request_bytes: int = attr.ib(default=0)
+    response_bytes: int = attr.ib(default=0)
+    duration: float = attr.ib(default=0.0)
+    sign_time: Optional[float] = attr.ib(default=None)
+    nonce_wait: Optional[float] = attr.ib(default=None)
+    nonce_source: Optional[str] = attr.ib(default=None)
+    rate_limit_wait: Optional[float] = attr.ib(default=None)
+    error: Optional[BaseException] = attr.ib(default=None)
+
+
+class Tracer:
+    """Receives a ``Span`` for every request a client makes.
+
+    Called on the event loop, after the response has been read, so should
+    return quickly.
+    """
+
+    def on_span(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        # One extra slot, for values above the largest bucket.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """``(upper bound, count)`` pairs, as Prometheus reports them."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimate a quantile, as the upper bound of the bucket it is in."""
+        if self.count == 0:
+            return None
+        target = fraction * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound
+        return float('inf')
+
+
+class Metrics(Tracer):
+    """A ``Tracer`` keeping counters and latency histograms per endpoint."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self.requests: Dict[Tuple[str, str], int] = collections.Counter()
+        self.errors: Dict[str, int] = collections.Counter()
+        self.request_bytes: Dict[str, int] = collections.Counter()
+        self.response_bytes: Dict[str, int] = collections.Counter()
+        self.nonce_sources: Dict[str, int] = collections.Counter()
+        self.durations: Dict[str, Histogram] = {}
+        self.sign_times = Histogram(self._buckets)
+        self.nonce_waits = Histogram(self._buckets)
+        self.rate_limit_waits = Histogram(self._buckets)
+
+    def on_span(self, span: Span) -> None:
+        status = str(span.status) if span.status is not None else 'none'
+        self.requests[(span.kind, status)] += 1
+        if span.error is not None:
+            self.errors[span.kind] += 1
+        self.request_bytes[span.kind] += span.request_bytes
+        self.response_bytes[span.kind] += span.response_bytes
+        histogram = self.durations.get(span.kind)
+        if histogram is None:
+            histogram = self.durations[span.kind] = Histogram(self._buckets)
+        histogram.observe(span.duration)
+        if span.sign_time is not None:
+            self.sign_times.observe(span.sign_time)
+        if span.nonce_wait is not None:
+            self.nonce_waits.observe(span.nonce_wait)
+        if span.rate_limit_wait is not None:
+            self.rate_limit_waits.observe(span.rate_limit_wait)
+        if span.nonce_source is not None:
+            self.nonce_sources[span.nonce_source] += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """A plain-data summary of everything recorded so far."""
+        return {
+            'requests': {
+                f'{kind} {status}': count
+                for (kind, status), count in sorted(self.requests.items())
+            },
+            'errors': dict(self.errors),
+            'request_bytes': dict(self.request_bytes),
+            'response_bytes': dict(self.response_bytes),
+            'nonce_sources': dict(self.nonce_sources),
+            'latency': {
+                kind: _summarize(histogram)
+                for kind, histogram in sorted(self.durations.items())
+            },
+            'sign_time': _summarize(self.sign_times),
+            'nonce_wait': _summarize(self.nonce_waits),
+            'rate_limit_wait': _summarize(self.rate_limit_waits),
+        }
+
+    def to_prometheus(self, prefix: str = 'aioacme') -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def counter(name, help_, samples):
+            lines.append(f'# HELP {prefix}_{name} {help_}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            for labels, value in samples:
+                lines.append(f'{prefix}_{name}{_labels(labels)} {value}')
+
+        def histogram(name, help_, series):
+            lines.append(f'# HELP {prefix}_{name} {help_}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for labels, hist in series:
+                for bound, total in hist.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    bucket_labels = labels + (('le', le),)
+                    lines.append(
+                        f'{prefix}_{name}_bucket{_labels(bucket_labels)}'
+                        f' {total}'
+                    )
+                lines.append(f'{prefix}_{name}_sum{_labels(labels)} {hist.sum}')
+                lines.append(
+                    f'{prefix}_{name}_count{_labels(labels)} {hist.count}'
+                )
+
+        counter('requests_total', 'HTTP requests made.', (
+            ((('kind', kind), ('status', status)), count)
+            for (kind, status), count in sorted(self.requests.items())
+        ))
+        counter('request_errors_total', 'Requests that raised.', (
+            ((('kind', kind),), count)
+            for kind, count in sorted(self.errors.items())
+        ))
+        counter('request_bytes_total', 'Request body bytes sent.', (
+            ((('kind', kind),), count)
+            for kind, count in sorted(self.request_bytes.items())
+        ))
+        counter('response_bytes_total', 'Response body bytes read.', (
+            ((('kind', kind),), count)
+            for kind, count in sorted(self.response_bytes.items())
+        ))
+        counter('nonces_total', 'Nonces used, by where they came from.', (
+            ((('source', source),), count)
+            for source, count in sorted(self.nonce_sources.items())
+        ))
+        histogram('request_duration_seconds', 'Request latency.', (
+            ((('kind', kind),), hist)
+            for kind, hist in sorted(self.durations.items())
+        ))
+        histogram('sign_duration_seconds', 'Time spent signing requests.', (
+            ((), self.sign_times),
+        ))
+        histogram('nonce_wait_seconds', 'Time spent waiting for a nonce.', (
+            ((), self.nonce_waits),
+        ))
+        histogram(
+            'rate_limit_wait_seconds',
+            'Time requests spent held back by the client-side rate limiter.',
+            (((), self.rate_limit_waits),),
+        )
+        return '\n'.join(lines) + '\n'
+
+
+def _summarize(histogram: Histogram) -> Dict[str, object]:
+    return {
+        'count': histogram.count,
+        'sum': histogram.sum,
+        'p50': histogram.quantile(0.5),
+        'p99': histogram.quantile(0.99),
+    }
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    inner = ','.join(
+        f'{name}="{_escape_label(str(value))}"' for name, value in labels
+    )
+    return f'{{{inner}}}'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
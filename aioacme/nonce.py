@@ -0,0 +1,140 @@
+import asyncio
+import collections
+import time
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+
+class NoncePool:
+    """A pool of ``Replay-Nonce`` values shared by every request on a client.
+
+    Nonces handed back by the server on any response are added with
+    ``put``; ``get`` hands them out oldest-first. When the pool runs below
+    ``target_depth``, a single background task fetches more using
+    ``fetch_nonce``, so concurrent callers wait on that task rather than each
+    making their own round trip.
+
+    Nonces older than ``max_age`` seconds are discarded, as servers only
+    remember nonces they issued for a limited time.
+
+    The pool binds to the event loop it is used from, so it may be made
+    before that loop is running.
+    """
+
+    def __init__(
+            self,
+            fetch_nonce: Callable[[], Awaitable[str]],
+            *,
+            target_depth: int = 2,
+            max_size: int = 64,
+            max_age: float = 60.0,
+    ) -> None:
+        self._fetch_nonce = fetch_nonce
+        self.target_depth = target_depth
+        self.max_size = max_size
+        self.max_age = max_age
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._nonces: Deque[Tuple[float, str]] = collections.deque()
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._prefetch_task: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._nonces)
+
+    def put(self, nonce: Optional[str]) -> None:
+        """Add a nonce received from the server; ``None`` is ignored."""
+        if nonce is None:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(nonce)
+                return
+        self._nonces.append((time.monotonic(), nonce))
+        while len(self._nonces) > self.max_size:
+            self._nonces.popleft()
+
+    async def get(self) -> str:
+        """Take a nonce from the pool, waiting for a fetch if it is empty."""
+        nonce, _ = await self.get_with_source()
+        return nonce
+
+    async def get_with_source(self) -> Tuple[str, bool]:
+        """Like ``get``, but returns ``(nonce, from_pool)``: whether the
+        nonce was already pooled, rather than waited for.
+        """
+        self._expire()
+        if self._nonces:
+            _, nonce = self._nonces.popleft()
+            self._maybe_prefetch()
+            return nonce, True
+
+        waiter = self._bind().create_future()
+        self._waiters.append(waiter)
+        self._maybe_prefetch()
+        try:
+            return await waiter, False
+        except asyncio.CancelledError:
+            # If we were handed a nonce just as we got cancelled, keep it.
+            if waiter.done() and not waiter.cancelled() \
+                    and waiter.exception() is None:
+                self.put(waiter.result())
+            raise
+
+    def clear(self) -> None:
+        """Drop every pooled nonce, e.g. after the server rejects one."""
+        self._nonces.clear()
+
+    async def close(self) -> None:
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            try:
+                await self._prefetch_task
+            except asyncio.CancelledError:
+                pass
+            self._prefetch_task = None
+        self._fail_waiters(RuntimeError('NoncePool was closed.'))
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            # Waiters and any prefetch belong to the old loop, which won't
+            # run them; pooled nonces are still good.
+            self._waiters.clear()
+            self._prefetch_task = None
+            self._loop = loop
+        return loop
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.max_age
+        while self._nonces and self._nonces[0][0] < cutoff:
+            self._nonces.popleft()
+
+    def _wanted(self) -> int:
+        live_waiters = sum(1 for waiter in self._waiters if not waiter.done())
+        return live_waiters + self.target_depth - len(self._nonces)
+
+    def _maybe_prefetch(self) -> None:
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            return
+        if self._wanted() <= 0:
+            return
+        self._prefetch_task = self._bind().create_task(self._prefetch())
+
+    async def _prefetch(self) -> None:
+        while self._wanted() > 0:
+            try:
+                nonce = await self._fetch_nonce()
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                self._fail_waiters(err)
+                return
+            self.put(nonce)
+
+    def _fail_waiters(self, err: BaseException) -> None:
+        waiters: List[asyncio.Future] = list(self._waiters)
+        self._waiters.clear()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_exception(err)
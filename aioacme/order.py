@@ -1,8 +1,7 @@
 from datetime import datetime
 import enum
-from typing import List, Optional
+from typing import Optional, Tuple
 
-from .util import rename_key
 from .identifier import Identifier
 from .validation import OptionalKey
 from . import identifier
@@ -26,41 +25,42 @@ class OrderStatus(enum.Enum):
     @staticmethod
     def from_json(json_) -> 'OrderStatus':
         validation.type_check(json_, str)
-        if json_ == 'invalid':
-            return OrderStatus.INVALID
-        elif json_ == 'pending':
-            return OrderStatus.PENDING
-        elif json_ == 'ready':
-            return OrderStatus.READY
-        elif json_ == 'processing':
-            return OrderStatus.PROCESSING
-        elif json_ == 'valid':
-            return OrderStatus.VALID
-        else:
+        try:
+            return _ORDER_STATUSES[json_]
+        except KeyError:
             raise validation.ValidationError(
                 f'Got unknown value {json_!r} for an OrderStatus.'
-            )
+            ) from None
 
 
-def authorizations_from_json(json_) -> List[URL]:
+_ORDER_STATUSES = {
+    'invalid': OrderStatus.INVALID,
+    'pending': OrderStatus.PENDING,
+    'ready': OrderStatus.READY,
+    'processing': OrderStatus.PROCESSING,
+    'valid': OrderStatus.VALID,
+}
+
+
+def authorizations_from_json(json_) -> Tuple[URL, ...]:
 
     def authorization_from_json(json_):
         validation.type_check(json_, str)
         return URL(json_)
 
-    return validation.deserialize_list(
+    return tuple(validation.deserialize_list(
         json_,
         authorization_from_json,
         'authorization',
-    )
+    ))
 
 
-def identifiers_from_json(json_) -> List[Identifier]:
-    return validation.deserialize_list(
+def identifiers_from_json(json_) -> Tuple[Identifier, ...]:
+    return tuple(validation.deserialize_list(
         json_,
         identifier.identifier_from_json,
         'identifier',
-    )
+    ))
 
 
 _ORDER_SCHEMA = {
@@ -76,15 +76,15 @@ _ORDER_SCHEMA = {
 }
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class Order:
     status: OrderStatus = attr.ib()
     expires: Optional[datetime] = attr.ib()
-    identifiers: List[Identifier] = attr.ib()
+    identifiers: Tuple[Identifier, ...] = attr.ib()
     not_before: Optional[datetime] = attr.ib()
     not_after: Optional[datetime] = attr.ib()
-    error: Optional[problem.Problem] = attr.ib()
-    authorization_urls: List[URL] = attr.ib()
+    error: Optional[problem.Problem] = attr.ib(hash=False)
+    authorization_urls: Tuple[URL, ...] = attr.ib()
     finalize_url: URL = attr.ib()
     certificate_url: Optional[URL] = attr.ib()
 
@@ -93,16 +93,22 @@ class Order:
 
     @staticmethod
     def from_json(json_) -> 'Order':
+        return Order(**_ORDER_PARSER.parse(json_))
+
+
+_ORDER_PARSER = validation.CompiledSchema(
+    _ORDER_SCHEMA,
+    'Order',
+    rename={
+        'finalize': 'finalize_url',
+        'certificate': 'certificate_url',
+        'authorizations': 'authorization_urls',
+    },
+)
+
 
-        def _make_order(**validated_json) -> Order:
-            rename_key(validated_json, 'finalize', 'finalize_url')
-            rename_key(validated_json, 'certificate', 'certificate_url')
-            rename_key(validated_json, 'authorizations', 'authorization_urls')
-            return Order(**validated_json)
-
-        return validation.deserialize_dict(
-            json_,
-            _ORDER_SCHEMA,
-            _make_order,
-            'Order',
-        )
+class LazyOrder(validation.LazyView):
+    """An ``Order`` whose fields are only deserialized when read."""
+    __slots__ = ()
+    _parser = _ORDER_PARSER
+    _type = Order
@@ -0,0 +1,279 @@
+import asyncio
+import heapq
+import itertools
+import random
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple,
+)
+
+import aiohttp
+
+from . import authorization
+from . import order as _order
+from . import util
+
+if TYPE_CHECKING:
+    # client imports this module.
+    from .client import AcmeClient
+
+
+# Statuses that an order or authorization can never leave; once one of these
+# is seen, waiting any longer is pointless.
+_FINAL_ORDER_STATUSES = frozenset((
+    _order.OrderStatus.INVALID,
+    _order.OrderStatus.VALID,
+))
+_FINAL_AUTHORIZATION_STATUSES = frozenset((
+    authorization.AuthorizationStatus.VALID,
+    authorization.AuthorizationStatus.INVALID,
+    authorization.AuthorizationStatus.DEACTIVATED,
+    authorization.AuthorizationStatus.EXPIRED,
+    authorization.AuthorizationStatus.REVOKED,
+))
+
+
+class _Watch:
+    __slots__ = (
+        'url', 'kind', 'view', 'final_statuses', 'waiters', 'attempts',
+        'errors', 'last_resource', 'seq',
+    )
+
+    def __init__(
+            self, url: str, kind: str, view: Callable, final_statuses,
+    ) -> None:
+        self.url = url
+        self.kind = kind
+        # Builds a lazy view of the resource, so a poll only deserializes
+        # its status, until a waiter is given the whole resource.
+        self.view = view
+        self.final_statuses = final_statuses
+        self.waiters: List[Tuple[frozenset, asyncio.Future]] = []
+        self.attempts = 0
+        # Transient errors in a row; see Poller.max_errors.
+        self.errors = 0
+        self.last_resource: Any = None
+        self.seq = 0
+
+
+class Poller:
+    """Polls orders and authorizations on behalf of many waiters.
+
+    A single scheduler task owns every poll. Waiters on the same URL share
+    one poll, polls are spaced to at most ``max_rate`` per second across all
+    URLs, and the delay between polls of one URL follows ``Retry-After``
+    when the server sends it, and jittered exponential backoff between
+    ``min_interval`` and ``max_interval`` seconds otherwise.
+
+    A poll that fails with a transient error -- a connection error, a
+    timeout, a 5xx or a 429 -- is retried on the same schedule, up to
+    ``max_errors`` times in a row. Any other error fails every waiter on
+    that URL.
+    """
+
+    def __init__(
+            self,
+            client: 'AcmeClient',
+            *,
+            max_rate: float = 20.0,
+            min_interval: float = 1.0,
+            max_interval: float = 60.0,
+            jitter: float = 0.2,
+            max_errors: int = 5,
+    ) -> None:
+        self.client = client
+        self.max_rate = max_rate
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_errors = max_errors
+        self._loop = asyncio.get_event_loop()
+        self._watches: Dict[str, _Watch] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._last_poll = float('-inf')
+        self._scheduler: Optional[asyncio.Future] = None
+        self._polls = set()
+
+    async def wait_for(self, url, *statuses, timeout: Optional[float] = None):
+        """Wait for the order or authorization at ``url`` to reach a status.
+
+        ``statuses`` must all be ``OrderStatus`` values, or all
+        ``AuthorizationStatus`` values. Returns the parsed resource once its
+        status is one of ``statuses``, or once it reaches a status that it can
+        never leave, so callers should check the returned status.
+        """
+        if not statuses:
+            raise ValueError('wait_for needs at least one status.')
+        if all(isinstance(s, _order.OrderStatus) for s in statuses):
+            kind = 'order'
+            view = _order.LazyOrder
+            final_statuses = _FINAL_ORDER_STATUSES
+        elif all(
+                isinstance(s, authorization.AuthorizationStatus)
+                for s in statuses
+        ):
+            kind = 'authz'
+            view = authorization.LazyAuthorization
+            final_statuses = _FINAL_AUTHORIZATION_STATUSES
+        else:
+            raise TypeError(
+                'statuses must all be OrderStatus, or all AuthorizationStatus'
+                f' values; got {statuses!r}'
+            )
+
+        url = str(url)
+        wanted = frozenset(statuses)
+        watch = self._watches.get(url)
+        if watch is not None and watch.view is not view:
+            raise TypeError(f'{url} is already being polled as another type.')
+        if watch is not None and watch.last_resource is not None \
+                and _satisfies(watch, wanted, watch.last_resource):
+            return watch.last_resource.resolve()
+
+        future = self._loop.create_future()
+        if watch is None:
+            watch = _Watch(url, kind, view, final_statuses)
+            self._watches[url] = watch
+            self._schedule_poll(watch, 0.0)
+        watch.waiters.append((wanted, future))
+        self._ensure_scheduler()
+        if timeout is None:
+            return await future
+        return await asyncio.wait_for(future, timeout)
+
+    async def close(self) -> None:
+        tasks = list(self._polls)
+        if self._scheduler is not None:
+            tasks.append(self._scheduler)
+            self._scheduler = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for watch in self._watches.values():
+            for _, future in watch.waiters:
+                if not future.done():
+                    future.cancel()
+        self._watches.clear()
+        self._schedule.clear()
+
+    def _ensure_scheduler(self) -> None:
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = self._loop.create_task(self._run())
+
+    def _schedule_poll(self, watch: _Watch, delay: float) -> None:
+        watch.seq = next(self._seq)
+        heapq.heappush(
+            self._schedule,
+            (self._loop.time() + delay, watch.seq, watch.url),
+        )
+        self._wakeup.set()
+
+    def _next_delay(self, watch: _Watch, headers) -> float:
+        retry_after = util.parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        delay = min(
+            self.max_interval,
+            self.min_interval * 2 ** watch.attempts,
+        )
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self) -> None:
+        while self._watches:
+            self._wakeup.clear()
+            if not self._schedule:
+                await self._wakeup.wait()
+                continue
+
+            due, seq, url = self._schedule[0]
+            watch = self._watches.get(url)
+            if watch is None or watch.seq != seq:
+                heapq.heappop(self._schedule)
+                continue
+
+            start_at = max(due, self._last_poll + 1 / self.max_rate)
+            now = self._loop.time()
+            if start_at > now:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), start_at - now,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._schedule)
+            self._last_poll = now
+            task = self._loop.create_task(self._poll(watch))
+            self._polls.add(task)
+            task.add_done_callback(self._polls.discard)
+
+    async def _poll(self, watch: _Watch) -> None:
+        try:
+            # Past the client's GET cache: a poll wants the latest status.
+            headers, json_data = await self.client._get_with_headers(
+                watch.url, watch.kind, use_cache=False,
+            )
+            resource = watch.view(json_data)
+            # Read it now, so that a malformed status fails the waiters.
+            resource.status
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            watch.attempts += 1
+            watch.errors += 1
+            if _is_transient(err) and watch.errors <= self.max_errors:
+                watch.waiters = [
+                    (wanted, future) for wanted, future in watch.waiters
+                    if not future.done()
+                ]
+                if watch.waiters:
+                    headers = getattr(err, 'headers', None) or {}
+                    self._schedule_poll(
+                        watch, self._next_delay(watch, headers),
+                    )
+                else:
+                    del self._watches[watch.url]
+                return
+            del self._watches[watch.url]
+            for _, future in watch.waiters:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        watch.last_resource = resource
+        watch.attempts += 1
+        watch.errors = 0
+        remaining = []
+        for wanted, future in watch.waiters:
+            if future.done():
+                continue
+            if _satisfies(watch, wanted, resource):
+                try:
+                    future.set_result(resource.resolve())
+                except Exception as err:
+                    future.set_exception(err)
+            else:
+                remaining.append((wanted, future))
+        watch.waiters = remaining
+
+        if remaining:
+            self._schedule_poll(watch, self._next_delay(watch, headers))
+        else:
+            del self._watches[watch.url]
+
+
+def _is_transient(err: Exception) -> bool:
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status >= 500 or err.status == 429
+    return isinstance(err, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+def _satisfies(watch: _Watch, wanted: frozenset, resource) -> bool:
+    return resource.status in wanted \
+        or resource.status in watch.final_statuses
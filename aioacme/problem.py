@@ -7,6 +7,11 @@ from .validation import OptionalKey
 from . import validation
 
 
+BAD_NONCE = 'urn:ietf:params:acme:error:badNonce'
+RATE_LIMITED = 'urn:ietf:params:acme:error:rateLimited'
+SERVER_INTERNAL = 'urn:ietf:params:acme:error:serverInternal'
+
+
 class ProblemBase(Exception):
     pass
 
@@ -18,6 +23,10 @@ class Problem(ProblemBase):
     status: Optional[int] = attr.ib()
     detail: Optional[str] = attr.ib()
     instance: Optional[str] = attr.ib()
+    # From the HTTP response the problem came in, rather than its body.
+    http_status: Optional[int] = attr.ib(default=None, cmp=False)
+    retry_after: Optional[float] = attr.ib(default=None, cmp=False)
+    http_headers = attr.ib(default=None, cmp=False, repr=False)
 
 
 # TODO: I feel like we should derive subclasses for the ACME specific errors,
@@ -27,7 +36,7 @@ class AcmeProblem(ProblemBase):
 
 
 _PROBLEM_BASE_SCHEMA = {
-    OptionalKey('type'): str,
+    OptionalKey('type', default='about:blank'): str,
     OptionalKey('title'): str,
     OptionalKey('status'): int,
     OptionalKey('detail'): str,
@@ -35,14 +44,8 @@ _PROBLEM_BASE_SCHEMA = {
 }
 
 
+_PROBLEM_PARSER = validation.CompiledSchema(_PROBLEM_BASE_SCHEMA, 'Problem')
+
+
 def from_json(json_):
-    validated_base = validation.deserialize_dict(
-        json_,
-        _PROBLEM_BASE_SCHEMA,
-        lambda **dct: dct,
-        'Problem',
-    )
-
-    if validated_base['type'] is None:
-        validated_base['type'] = 'about:blank'
-    return Problem(**validated_base)
+    return Problem(**_PROBLEM_PARSER.parse(json_))
@@ -0,0 +1,216 @@
+import asyncio
+import random
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import attr
+
+from . import problem as _problem
+
+
+class TokenBucket:
+    """Allows ``rate`` operations per second, in bursts of up to ``burst``.
+
+    Callers reserve a token and then wait out any deficit, so waiters are
+    served in the order they arrived rather than racing each other.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: float,
+            *,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                f'Need a positive rate and a burst of at least 1; got'
+                f' rate={rate!r}, burst={burst!r}'
+            )
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = float('-inf')
+
+    def reserve(self) -> float:
+        """Take a token; returns how many seconds to wait before using it."""
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+        self._tokens -= 1
+        deficit_wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(deficit_wait, self._paused_until - now, 0.0)
+
+    def refund(self) -> None:
+        """Give back a token from a ``reserve`` that was not used."""
+        self._tokens = min(self.burst, self._tokens + 1)
+
+    def pause(self, seconds: float) -> None:
+        """Hold everyone back for ``seconds``, e.g. after being throttled."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait <= 0:
+            return
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.refund()
+            raise
+
+
+@attr.s(slots=True, frozen=True)
+class RateLimits:
+    """Client-side request limits, as ``(requests per second, burst)``.
+
+    ``post`` applies to every signed request; ``new_order`` and
+    ``new_account`` apply on top of it for those endpoints. ``None`` means
+    no limit.
+    """
+    post: Optional[Tuple[float, float]] = attr.ib(default=(20.0, 40.0))
+    new_order: Optional[Tuple[float, float]] = attr.ib(default=None)
+    new_account: Optional[Tuple[float, float]] = attr.ib(default=None)
+
+
+# Endpoint kinds (see metrics.Span), and the RateLimits field limiting them.
+_KIND_LIMITS = {
+    'newOrder': 'new_order',
+    'newAccount': 'new_account',
+}
+
+
+class RateLimiter:
+    def __init__(
+            self,
+            limits: RateLimits,
+            *,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limits = limits
+        self._buckets: Dict[str, TokenBucket] = {}
+        for field in attr.fields(RateLimits):
+            limit = getattr(limits, field.name)
+            if limit is not None:
+                rate, burst = limit
+                self._buckets[field.name] = TokenBucket(
+                    rate, burst, clock=clock,
+                )
+
+    @staticmethod
+    def for_directory(
+            directory_url: str,
+            limits,
+    ) -> Optional['RateLimiter']:
+        """Build a limiter from ``limits``: either one ``RateLimits``, or a
+        dict of them keyed by directory URL (with ``None`` as the fallback).
+        """
+        if limits is None:
+            return None
+        if isinstance(limits, dict):
+            limits = limits.get(directory_url, limits.get(None))
+            if limits is None:
+                return None
+        return RateLimiter(limits)
+
+    def _buckets_for(self, kind: str):
+        bucket = self._buckets.get('post')
+        if bucket is not None:
+            yield bucket
+        field_name = _KIND_LIMITS.get(kind)
+        if field_name is not None:
+            bucket = self._buckets.get(field_name)
+            if bucket is not None:
+                yield bucket
+
+    async def acquire(self, kind: str) -> None:
+        for bucket in self._buckets_for(kind):
+            await bucket.acquire()
+
+    def pause(self, kind: str, seconds: float) -> None:
+        """Hold back requests to ``kind`` of endpoint for ``seconds``.
+
+        If ``kind`` has a limit of its own, only it is paused, so that being
+        throttled on new orders doesn't also hold back, say, challenge
+        responses; otherwise every POST is.
+        """
+        buckets = list(self._buckets_for(kind))
+        if buckets:
+            buckets[-1].pause(seconds)
+
+
+# Endpoint kinds (see metrics.Span) that are safe to send twice: fetches
+# (POST-as-GET) and challenge responses, which the server ignores once the
+# challenge is already being validated.
+IDEMPOTENT_KINDS = frozenset(('order', 'authz', 'certificate', 'challenge'))
+
+
+class RetryPolicy:
+    """Decides whether, and after how long, to retry a failed request.
+
+    ``badNonce`` is retried straight away, and ``rateLimited`` after the
+    server's ``Retry-After``, or after jittered exponential backoff if it
+    gave none. ``serverInternal`` and 5xx responses are retried the same
+    way, but only for requests to ``idempotent_kinds`` of endpoint: the
+    server may have acted on a new order or finalization before failing,
+    and sending it again would duplicate the order or fail outright.
+    Anything else, and any delay longer than ``max_delay``, fails at once.
+    """
+
+    def __init__(
+            self,
+            *,
+            max_attempts: int = 3,
+            base_delay: float = 1.0,
+            max_delay: float = 60.0,
+            idempotent_kinds: frozenset = IDEMPOTENT_KINDS,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idempotent_kinds = idempotent_kinds
+
+    def delay_for(
+            self,
+            err: BaseException,
+            attempt: int,
+            kind: Optional[str] = None,
+    ) -> Optional[float]:
+        """Seconds to wait before retrying after ``attempt`` (counting from
+        1) of a request to a ``kind`` of endpoint failed with ``err``, or
+        ``None`` to give up.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        problem_type = getattr(err, 'type', None)
+        if problem_type == _problem.BAD_NONCE:
+            # Rejected before anything was done, so always safe to resend.
+            return 0.0
+        if problem_type != _problem.RATE_LIMITED:
+            is_server_error = problem_type == _problem.SERVER_INTERNAL \
+                or 500 <= (_http_status(err) or 0) < 600
+            if not is_server_error or kind not in self.idempotent_kinds:
+                return None
+
+        retry_after = getattr(err, 'retry_after', None)
+        if retry_after is None:
+            retry_after = self.base_delay * 2 ** (attempt - 1) \
+                * random.uniform(0.5, 1.5)
+        if retry_after > self.max_delay:
+            return None
+        return retry_after
+
+
+def is_rate_limited(err: BaseException) -> bool:
+    return getattr(err, 'type', None) == _problem.RATE_LIMITED
+
+
+def _http_status(err: BaseException) -> Optional[int]:
+    status = getattr(err, 'http_status', None)
+    if status is None:
+        status = getattr(err, 'status', None)
+    return status if isinstance(status, int) else None
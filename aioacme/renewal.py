@@ -0,0 +1,236 @@
+"""ACME Renewal Information (ARI, RFC 9773), and renewing on its advice."""
+
+import asyncio
+from datetime import datetime, timezone
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import attr
+from yarl import URL
+
+from .validation import OptionalKey
+from . import ratelimit
+from . import util
+from . import validation
+
+
+logger = logging.getLogger(__name__)
+
+
+def _window_from_json(json_) -> Tuple[datetime, datetime]:
+    validation.type_check(json_, dict)
+    validation.require_key(json_, 'start', 'suggestedWindow')
+    validation.require_key(json_, 'end', 'suggestedWindow')
+    start = validation.datetime_from_json(json_['start'])
+    end = validation.datetime_from_json(json_['end'])
+    if end < start:
+        raise validation.ValidationError(
+            'suggestedWindow ends before it starts.'
+        )
+    return start, end
+
+
+_RENEWAL_INFO_PARSER = validation.CompiledSchema(
+    {
+        'suggestedWindow': _window_from_json,
+        OptionalKey('explanationURL'): validation.url_from_json,
+    },
+    'RenewalInfo',
+    rename={
+        'suggestedWindow': 'suggested_window',
+        'explanationURL': 'explanation_url',
+    },
+)
+
+
+@attr.s(slots=True, frozen=True)
+class RenewalInfo:
+    """When the CA would like a certificate renewed.
+
+    ``retry_after`` is how many seconds the server asked us to wait before
+    asking again, if it said.
+    """
+    suggested_window: Tuple[datetime, datetime] = attr.ib()
+    explanation_url: Optional[URL] = attr.ib()
+    retry_after: Optional[float] = attr.ib(default=None)
+
+    @staticmethod
+    def from_json(json_, retry_after: Optional[float] = None) -> 'RenewalInfo':
+        return RenewalInfo(
+            retry_after=retry_after, **_RENEWAL_INFO_PARSER.parse(json_),
+        )
+
+    def pick_time(
+            self,
+            now: Optional[datetime] = None,
+            rng: random.Random = random,
+    ) -> datetime:
+        """A time to renew at, uniformly at random within the part of the
+        window that hasn't passed yet; ``now`` if all of it has.
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        start, end = self.suggested_window
+        start = max(start, now)
+        if end <= start:
+            return now
+        return start + (end - start) * rng.random()
+
+
+class _Entry:
+    __slots__ = ('cert_id', 'item', 'renew_at', 'recheck_at', 'seq')
+
+    def __init__(self, cert_id: str, item) -> None:
+        self.cert_id = cert_id
+        self.item = item
+        self.renew_at = float('inf')
+        self.recheck_at = float('inf')
+        self.seq = 0
+
+
+class RenewalScheduler:
+    """Yields certificates as they come due for renewal, according to ARI.
+
+    ``inventory`` maps ``certificate.certificate_id`` values to anything --
+    typically the ``issuance.IssuanceRequest`` that renews the certificate
+    -- and iterating over the scheduler asynchronously yields those items,
+    so it can be fed straight to ``issuance.issue_many``::
+
+        async for result in issue_many(account, scheduler, solver): ...
+
+    Each certificate is given a random time within its suggested window,
+    which spreads a fleet's renewals out instead of renewing everything at
+    once, and items are never yielded faster than ``max_rate`` per second.
+    Renewal information is fetched ``concurrency`` at a time, and fetched
+    again when the server's ``Retry-After`` (or ``recheck_interval``, if
+    it sent none) runs out, in case the window has moved.
+    """
+
+    def __init__(
+            self,
+            client,
+            inventory: Dict[str, Any],
+            *,
+            max_rate: float = 1.0,
+            concurrency: int = 10,
+            recheck_interval: float = 6 * 3600,
+            rng: random.Random = random,
+            clock=time.time,
+    ) -> None:
+        self.client = client
+        self.concurrency = concurrency
+        self.recheck_interval = recheck_interval
+        self._rng = rng
+        self._clock = clock
+        self._bucket = ratelimit.TokenBucket(max_rate, 1, clock=clock)
+        self._entries = {
+            cert_id: _Entry(cert_id, item)
+            for cert_id, item in inventory.items()
+        }
+        # (time, seq, cert_id), for both renewals and rechecks.
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, cert_id: str, item) -> None:
+        """Add a certificate; it is looked up on the next recheck."""
+        entry = self._entries[cert_id] = _Entry(cert_id, item)
+        entry.recheck_at = self._clock()
+        self._push(entry, entry.recheck_at)
+
+    def discard(self, cert_id: str) -> None:
+        self._entries.pop(cert_id, None)
+
+    def _push(self, entry: _Entry, when: float) -> None:
+        entry.seq = next(self._seq)
+        heapq.heappush(self._schedule, (when, entry.seq, entry.cert_id))
+        self._wakeup.set()
+
+    async def refresh(self, cert_ids=None) -> None:
+        """Fetch renewal information for ``cert_ids`` (by default, the whole
+        inventory) and reschedule them. A certificate whose information
+        can't be fetched is logged, and tried again after
+        ``recheck_interval``.
+        """
+        entries = [
+            self._entries[cert_id]
+            for cert_id in (cert_ids if cert_ids is not None
+                            else list(self._entries))
+            if cert_id in self._entries
+        ]
+        infos = await util.map_ordered(
+            self._fetch, [entry.cert_id for entry in entries],
+            self.concurrency,
+        )
+        now = self._clock()
+        now_dt = datetime.fromtimestamp(now, timezone.utc)
+        for entry, info in zip(entries, infos):
+            if info is None:
+                # Keep any renewal already planned, and try again later.
+                entry.recheck_at = now + self.recheck_interval
+            else:
+                entry.renew_at = info.pick_time(now_dt, self._rng).timestamp()
+                recheck_in = info.retry_after \
+                    if info.retry_after is not None else self.recheck_interval
+                entry.recheck_at = now + recheck_in
+            self._push(entry, min(entry.renew_at, entry.recheck_at))
+
+    async def _fetch(self, cert_id: str) -> Optional[RenewalInfo]:
+        try:
+            return await self.client.renewal_info(cert_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning(
+                'Fetching renewal information for %s failed; retrying in'
+                ' %.0fs.', cert_id, self.recheck_interval, exc_info=True,
+            )
+            return None
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        await self.refresh()
+        while self._schedule:
+            self._wakeup.clear()
+            when, seq, cert_id = self._schedule[0]
+            entry = self._entries.get(cert_id)
+            if entry is None or entry.seq != seq:
+                heapq.heappop(self._schedule)
+                continue
+            delay = when - self._clock()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if entry.recheck_at < entry.renew_at:
+                # Recheck everything that is due for it in one batch.
+                now = self._clock()
+                due = []
+                renewals = []
+                while self._schedule and self._schedule[0][0] <= now:
+                    _, seq, cert_id = heapq.heappop(self._schedule)
+                    entry = self._entries.get(cert_id)
+                    if entry is None or entry.seq != seq:
+                        continue
+                    if entry.recheck_at < entry.renew_at:
+                        due.append(cert_id)
+                    else:
+                        renewals.append(entry)
+                for entry in renewals:
+                    self._push(entry, entry.renew_at)
+                await self.refresh(due)
+                continue
+
+            heapq.heappop(self._schedule)
+            await self._bucket.acquire()
+            if self._entries.pop(cert_id, None) is entry:
+                yield entry.item
@@ -0,0 +1,299 @@
+"""Running ``issuance.issue_many`` across several worker processes."""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from yarl import URL
+
+from .errors import IssuanceError
+from .issuance import IssuanceRequest, IssuanceResult, issue_many
+
+
+class WorkerSetup:
+    """Builds what a worker process needs to issue certificates.
+
+    An instance is pickled into every worker, where ``open`` is called once
+    to create that worker's own account -- and so its own ``AcmeClient``,
+    aiohttp session and nonce pool -- and challenge solver. It must
+    therefore be picklable, so should hold configuration (a directory URL,
+    a key file path, ...) rather than live objects.
+    """
+
+    async def open(self, shard: int):
+        """Return ``(account, solver)`` for the worker running ``shard``."""
+        raise NotImplementedError
+
+    async def csr_builder(self, shard: int):
+        """The ``csr.CsrBuilder`` for requests without a CSR, if any."""
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+def shard_for(request: IssuanceRequest, shards: int) -> int:
+    """The shard that ``request`` belongs to.
+
+    Requests are hashed on the parent domain of their first identifier, so
+    names under the same domain -- and whatever a worker keeps about them,
+    like valid authorizations or DNS batches -- land on the same shard.
+    """
+    values = sorted(
+        str(identifier.to_json()['value'])
+        for identifier in request.identifiers
+    )
+    name = values[0] if values else ''
+    if name.startswith('*.'):
+        name = name[2:]
+    domain = '.'.join(name.rstrip('.').split('.')[-2:])
+    return zlib.crc32(domain.encode('utf-8')) % shards
+
+
+# Messages from workers to the parent are tuples: a result is
+# (shard, index, order URL, certificate, private key, error message), with
+# None for what is missing, and a worker that has finished sends
+# (shard, None, error message), the message being None unless it failed.
+
+
+def _describe(err: BaseException) -> str:
+    return f'{type(err).__name__}: {err}'
+
+
+def _worker_main(setup: WorkerSetup, shard: int, inbox, outbox, concurrency):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    error = None
+    try:
+        loop.run_until_complete(
+            _worker(setup, shard, inbox, outbox, concurrency),
+        )
+    except BaseException as err:
+        error = _describe(err)
+        raise
+    finally:
+        loop.close()
+        outbox.put((shard, None, error))
+
+
+async def _worker(setup: WorkerSetup, shard: int, inbox, outbox, concurrency):
+    loop = asyncio.get_event_loop()
+    account, solver = await setup.open(shard)
+    csr_builder = await setup.csr_builder(shard)
+    indexes: Dict[int, int] = {}
+
+    async def requests():
+        while True:
+            item = await loop.run_in_executor(None, inbox.get)
+            if item is None:
+                return
+            index, request = item
+            indexes[id(request)] = index
+            yield request
+
+    try:
+        async for result in issue_many(
+                account,
+                requests(),
+                solver,
+                concurrency=concurrency,
+                csr_builder=csr_builder,
+        ):
+            outbox.put((
+                shard,
+                indexes.pop(id(result.request)),
+                str(result.order_url)
+                if result.order_url is not None else None,
+                result.certificate,
+                result.private_key,
+                _describe(result.error)
+                if result.error is not None else None,
+            ))
+    finally:
+        await setup.close()
+
+
+async def issue_sharded(
+        setup: WorkerSetup,
+        requests,
+        *,
+        processes: Optional[int] = None,
+        concurrency: int = 10,
+) -> AsyncIterator[IssuanceResult]:
+    """Like ``issuance.issue_many``, but across ``processes`` worker
+    processes (by default, one per CPU), each running its own ``issue_many``
+    with ``concurrency`` workers per stage.
+
+    Requests go to the worker chosen by ``shard_for``. Results come back in
+    completion order, with the original request, the order URL, the
+    certificate and any private key; ``order`` is not sent back, and errors
+    come back as an ``IssuanceError`` carrying the original's type and
+    message. If a worker process dies, its outstanding requests fail, as
+    do any later ones for its shard.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    loop = asyncio.get_event_loop()
+    # Forking a process with a running event loop is asking for trouble.
+    context = multiprocessing.get_context('spawn')
+    outbox = context.Queue()
+    inboxes = [
+        context.Queue(maxsize=concurrency * 4) for _ in range(processes)
+    ]
+    workers = [
+        # Not daemonic, as daemonic processes cannot have children of their
+        # own, such as a csr.process_pool_key_pool; they are terminated
+        # below instead.
+        context.Process(
+            target=_worker_main,
+            args=(setup, shard, inboxes[shard], outbox, concurrency),
+        )
+        for shard in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    pending: Dict[int, IssuanceRequest] = {}
+    pending_by_shard: List[Set[int]] = [set() for _ in range(processes)]
+    running = set(range(processes))
+    # Why each shard that has stopped running did so.
+    exit_reasons: Dict[int, str] = {}
+    # Per shard, set once its worker is gone, so that nothing waits on
+    # its inbox any more.
+    gone = [threading.Event() for _ in range(processes)]
+    # Requests that failed without reaching a worker, not yet yielded.
+    failed: List[IssuanceResult] = []
+    stopping = threading.Event()
+
+    def put(shard: int, item) -> bool:
+        # With a timeout, so that the thread is freed if we stop early, or
+        # the worker goes away.
+        while not (stopping.is_set() or gone[shard].is_set()):
+            try:
+                inboxes[shard].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    async def feed():
+        index = 0
+
+        async def send(request):
+            nonlocal index
+            shard = shard_for(request, processes)
+            index += 1
+            if shard not in running:
+                failed.append(_failed(request, shard, exit_reasons))
+                return
+            pending[index] = request
+            pending_by_shard[shard].add(index)
+            sent = await loop.run_in_executor(
+                None, put, shard, (index, request),
+            )
+            # Unless the worker went away first, and _fail_shard already
+            # failed it.
+            if not sent and index in pending:
+                pending_by_shard[shard].discard(index)
+                failed.append(_failed(pending.pop(index), shard, exit_reasons))
+
+        try:
+            if hasattr(requests, '__aiter__'):
+                async for request in requests:
+                    await send(request)
+            else:
+                for request in requests:
+                    await send(request)
+        finally:
+            for shard in range(processes):
+                await loop.run_in_executor(None, put, shard, None)
+
+    def receive():
+        try:
+            return outbox.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def stop(shard: int, reason: str):
+        running.discard(shard)
+        exit_reasons[shard] = reason
+        gone[shard].set()
+        return list(
+            _fail_shard(shard, pending, pending_by_shard, exit_reasons),
+        )
+
+    feeder = asyncio.ensure_future(feed())
+    crashed = False
+    try:
+        while running:
+            while failed:
+                yield failed.pop(0)
+            message = await loop.run_in_executor(None, receive)
+            if message is None:
+                for shard in list(running):
+                    if not workers[shard].is_alive():
+                        crashed = True
+                        for result in stop(shard, 'died'):
+                            yield result
+                continue
+            shard, index = message[:2]
+            if index is None:
+                error = message[2]
+                if error is not None:
+                    crashed = True
+                for result in stop(
+                        shard, 'exited' if error is None
+                        else f'failed: {error}',
+                ):
+                    yield result
+                continue
+            yield _decode_result(message, pending, pending_by_shard)
+        # With every worker gone, the feeder only has requests to fail, or
+        # may still be waiting on ``requests``; after a crash, don't wait
+        # for the rest of them.
+        if crashed:
+            feeder.cancel()
+        await asyncio.wait([feeder])
+        while failed:
+            yield failed.pop(0)
+        # Re-raise any error from iterating ``requests``.
+        if not feeder.cancelled():
+            feeder.result()
+    finally:
+        stopping.set()
+        feeder.cancel()
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def _decode_result(
+        message: Tuple, pending: Dict[int, IssuanceRequest], pending_by_shard,
+) -> IssuanceResult:
+    shard, index, order_url, certificate, private_key, error = message
+    pending_by_shard[shard].discard(index)
+    result = IssuanceResult(pending.pop(index))
+    if order_url is not None:
+        result.order_url = URL(order_url)
+    result.certificate = certificate
+    result.private_key = private_key
+    if error is not None:
+        result.error = IssuanceError(error)
+    return result
+
+
+def _failed(request: IssuanceRequest, shard: int, exit_reasons):
+    return IssuanceResult(request, error=IssuanceError(
+        f'Worker process for shard {shard} {exit_reasons[shard]}.',
+    ))
+
+
+def _fail_shard(shard: int, pending, pending_by_shard, exit_reasons):
+    for index in sorted(pending_by_shard[shard]):
+        yield _failed(pending.pop(index), shard, exit_reasons)
+    pending_by_shard[shard].clear()
@@ -0,0 +1,277 @@
+import asyncio
+import concurrent.futures
+import functools
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import attr
+import josepy.jws
+
+from . import util
+
+
+class AcmeHeader(josepy.jws.Header):
+    nonce = josepy.json_util.Field('nonce', omitempty=True)
+    url = josepy.json_util.Field('url', omitempty=True)
+
+
+class AcmeSignature(josepy.jws.Signature):
+    header_cls = AcmeHeader
+    __slots__ = ('combined',)
+
+
+class AcmeJws(josepy.jws.JWS):
+    signature_cls = AcmeSignature
+    __slots__ = ('payload', 'signatures')
+
+
+# JWS algorithms for each elliptic curve, per RFC 7518, section 3.4.
+_EC_ALGORITHMS = {
+    'secp256r1': josepy.jwa.ES256,
+    'secp384r1': josepy.jwa.ES384,
+    'secp521r1': josepy.jwa.ES512,
+}
+
+
+def alg_for_key(key) -> josepy.jwa.JWASignature:
+    """Pick the JWS algorithm to sign with, based on the account key type.
+
+    RSA keys sign with RS256, and EC keys with the ES algorithm matching
+    their curve.
+    """
+    if isinstance(key, josepy.jwk.JWKRSA):
+        return josepy.jwa.RS256
+    elif isinstance(key, josepy.jwk.JWKEC):
+        curve_name = key.key.curve.name
+        try:
+            return _EC_ALGORITHMS[curve_name]
+        except KeyError:
+            raise ValueError(
+                f'Unsupported elliptic curve {curve_name!r} for an account'
+                ' key.'
+            ) from None
+    else:
+        raise ValueError(
+            f'Unsupported account key type {type(key).__name__}.'
+        )
+
+
+@attr.s(slots=True, frozen=True)
+class SignRequest:
+    """Everything needed to produce one flattened JWS request body.
+
+    If ``kid`` is ``None``, the public key is embedded as ``jwk`` instead.
+    """
+    payload: bytes = attr.ib()
+    key: Any = attr.ib()
+    alg: Any = attr.ib()
+    url: str = attr.ib()
+    nonce: str = attr.ib()
+    kid: Optional[str] = attr.ib(default=None)
+
+
+def sign_request(request: SignRequest) -> bytes:
+    if request.kid is None:
+        return AcmeJws.sign(
+            request.payload,
+            key=request.key,
+            alg=request.alg,
+            protect=frozenset(('alg', 'url', 'jwk', 'nonce')),
+            url=request.url,
+            nonce=request.nonce,
+        ).json_dumps().encode('utf-8')
+    else:
+        return _sign_with_kid(request)
+
+
+@functools.lru_cache(maxsize=256)
+def _kid_header_prefix(alg_name: str, kid: str) -> str:
+    # The part of the protected header that is the same for every request an
+    # account makes; only the nonce and URL change.
+    return f'{{"alg":{json.dumps(alg_name)},"kid":{json.dumps(kid)},"nonce":'
+
+
+def _sign_with_kid(request: SignRequest) -> bytes:
+    """Produce the same flattened JWS as ``AcmeJws.sign`` would, for the
+    (by far most common) case of a request signed with an account's key ID,
+    without building josepy's header and signature objects.
+    """
+    protected = (
+        _kid_header_prefix(request.alg.name, request.kid)
+        + json.dumps(request.nonce)
+        + ',"url":'
+        + json.dumps(request.url)
+        + '}'
+    )
+    protected_b64 = util.acme_b64encode(protected.encode('utf-8'))
+    payload_b64 = util.acme_b64encode(request.payload)
+    signature = request.alg.sign(
+        request.key.key,
+        f'{protected_b64}.{payload_b64}'.encode('ascii'),
+    )
+    return (
+        f'{{"protected":"{protected_b64}","payload":"{payload_b64}",'
+        f'"signature":"{util.acme_b64encode(signature)}"}}'
+    ).encode('ascii')
+
+
+class Signer:
+    """Turns ``SignRequest`` objects into JWS bytes."""
+
+    async def sign(self, request: SignRequest) -> bytes:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InlineSigner(Signer):
+    """Sign on the event loop. Cheapest for low request rates."""
+
+    async def sign(self, request: SignRequest) -> bytes:
+        return sign_request(request)
+
+
+class ExecutorSigner(Signer):
+    """Sign in a ``concurrent.futures`` executor.
+
+    Requests made during the same event loop iteration are gathered into
+    batches of up to ``max_batch`` and signed in a single executor job, to
+    amortize the cost of each hop.
+
+    If ``portable`` is set, keys are sent to the executor as JWK JSON, so
+    that they can be pickled for a process pool; workers cache the loaded
+    keys.
+    """
+
+    def __init__(
+            self,
+            executor: concurrent.futures.Executor,
+            *,
+            max_batch: int = 16,
+            portable: bool = False,
+            executor_is_owned: bool = False,
+    ) -> None:
+        self.executor = executor
+        self.max_batch = max_batch
+        self.portable = portable
+        self.executor_is_owned = executor_is_owned
+        self._queue: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_scheduled = False
+        self._portable_keys: Dict[Any, str] = {}
+
+    async def sign(self, request: SignRequest) -> bytes:
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        if self.portable:
+            request = self._to_portable(request)
+        self._queue.append((request, future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush, loop)
+        return await future
+
+    async def close(self) -> None:
+        if self.executor_is_owned:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.executor.shutdown)
+
+    def _to_portable(self, request: SignRequest) -> Tuple[Any, ...]:
+        key_json = self._portable_keys.get(request.key)
+        if key_json is None:
+            key_json = json.dumps(request.key.to_json(), sort_keys=True)
+            self._portable_keys[request.key] = key_json
+        return (
+            request.payload,
+            key_json,
+            request.alg.name,
+            request.url,
+            request.nonce,
+            request.kid,
+        )
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._flush_scheduled = False
+        queue, self._queue = self._queue, []
+        batch_fn = _sign_portable_batch if self.portable else _sign_batch
+        for start in range(0, len(queue), self.max_batch):
+            batch = queue[start:start + self.max_batch]
+            requests = [request for request, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                job = loop.run_in_executor(self.executor, batch_fn, requests)
+            except Exception as err:
+                # E.g. the executor was shut down. Nothing else will
+                # resolve these, so fail them rather than hang the callers.
+                for _, future in queue[start:]:
+                    if not future.done():
+                        future.set_exception(err)
+                return
+            job.add_done_callback(
+                lambda job, futures=futures: _deliver(job, futures)
+            )
+
+
+def _deliver(job: asyncio.Future, futures: List[asyncio.Future]) -> None:
+    if job.cancelled() or job.exception() is not None:
+        err = job.exception() if not job.cancelled() \
+            else asyncio.CancelledError()
+        for future in futures:
+            if not future.done():
+                future.set_exception(err)
+        return
+    for future, (ok, value) in zip(futures, job.result()):
+        if future.done():
+            continue
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+
+def _sign_batch(requests: List[SignRequest]) -> List[Tuple[bool, Any]]:
+    results: List[Tuple[bool, Any]] = []
+    for request in requests:
+        try:
+            results.append((True, sign_request(request)))
+        except Exception as err:
+            results.append((False, err))
+    return results
+
+
+# Keys loaded inside a worker process, keyed by their JWK JSON.
+_worker_keys: Dict[str, Any] = {}
+
+
+def _sign_portable_batch(requests) -> List[Tuple[bool, Any]]:
+    results: List[Tuple[bool, Any]] = []
+    for payload, key_json, alg_name, url, nonce, kid in requests:
+        try:
+            key = _worker_keys.get(key_json)
+            if key is None:
+                key = josepy.jwk.JWK.from_json(json.loads(key_json))
+                _worker_keys[key_json] = key
+            request = SignRequest(
+                payload=payload,
+                key=key,
+                alg=josepy.jwa.JWASignature.from_json(alg_name),
+                url=url,
+                nonce=nonce,
+                kid=kid,
+            )
+            results.append((True, sign_request(request)))
+        except Exception as err:
+            results.append((False, err))
+    return results
+
+
+def thread_pool_signer(max_workers: Optional[int] = None, **kwargs) -> Signer:
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    return ExecutorSigner(executor, executor_is_owned=True, **kwargs)
+
+
+def process_pool_signer(max_workers: Optional[int] = None, **kwargs) -> Signer:
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    return ExecutorSigner(
+        executor, portable=True, executor_is_owned=True, **kwargs
+    )
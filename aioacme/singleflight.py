@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class GetCoalescer:
+    """Shares GET responses between callers asking for the same URL.
+
+    Callers that ask for a URL while a request for it is already in flight
+    wait for that request instead of making their own. With a ``ttl``,
+    responses are also kept for ``ttl`` seconds, and callers within that
+    time get the kept response without any request at all.
+
+    Everyone asking for a URL gets the same response object, so callers
+    must not modify it.
+    """
+
+    def __init__(
+            self,
+            ttl: float = 0.0,
+            *,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # URL -> (expiry time, response)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def fetch(
+            self,
+            url: str,
+            fetch: Callable[[], Awaitable[Any]],
+            *,
+            use_cache: bool = True,
+    ):
+        """Get the response for ``url``, calling ``fetch`` only if there is
+        neither a request in flight nor a fresh cached response. Without
+        ``use_cache``, the cache is skipped, but not requests in flight.
+        """
+        if use_cache and self.ttl > 0:
+            cached = self._cache.get(url)
+            if cached is not None:
+                expires, response = cached
+                if expires > self._clock():
+                    return response
+                del self._cache[url]
+
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[url] = task
+            task.add_done_callback(
+                lambda task: self._on_done(url, task)
+            )
+        # Shielded, so one caller giving up doesn't fail everyone else.
+        return await asyncio.shield(task)
+
+    def _on_done(self, url: str, task: asyncio.Future) -> None:
+        if self._in_flight.get(url) is task:
+            del self._in_flight[url]
+            if self.ttl > 0 and not task.cancelled() \
+                    and task.exception() is None:
+                self._cache[url] = (self._clock() + self.ttl, task.result())
+        elif not task.cancelled():
+            # Invalidated while in flight; just mark the exception retrieved.
+            task.exception()
+
+    def invalidate(self, url: str) -> None:
+        """Forget ``url``, e.g. because a POST may have changed it.
+
+        Callers already waiting on a request still get its response, but
+        later callers make a new request.
+        """
+        self._cache.pop(url, None)
+        self._in_flight.pop(url, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._in_flight.clear()
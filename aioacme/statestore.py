@@ -0,0 +1,258 @@
+"""Checkpoints of issuance progress, so that a restart can resume orders."""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import attr
+
+from .order import Order
+
+
+logger = logging.getLogger(__name__)
+
+
+STAGE_ORDERED = 'ordered'
+STAGE_AUTHORIZED = 'authorized'
+STAGE_FINALIZED = 'finalized'
+
+
+@attr.s(slots=True, frozen=True)
+class OrderCheckpoint:
+    """How far an order has got, and enough of it to pick up from there.
+
+    ``key`` identifies the certificate being issued across restarts; see
+    ``issuance.checkpoint_key``. ``private_key`` is the PEM key of a CSR
+    that ``issuance.issue_many`` built, kept so that a resumed order still
+    yields the key that goes with its certificate; a store holding such
+    checkpoints needs guarding like any other key file. ``expires`` is
+    when the server will give up on the order, as a POSIX timestamp; past
+    it, ``issuance.issue_many`` discards the checkpoint.
+    """
+    key: str = attr.ib()
+    stage: str = attr.ib()
+    order_url: str = attr.ib()
+    authorization_urls: Tuple[str, ...] = attr.ib(default=())
+    finalize_url: Optional[str] = attr.ib(default=None)
+    certificate_url: Optional[str] = attr.ib(default=None)
+    private_key: Optional[bytes] = attr.ib(default=None, repr=False)
+    expires: Optional[float] = attr.ib(default=None)
+
+    @staticmethod
+    def from_order(
+            key: str, stage: str, order_url, order: Order,
+            private_key: Optional[bytes] = None,
+    ):
+        return OrderCheckpoint(
+            key=key,
+            stage=stage,
+            order_url=str(order_url),
+            authorization_urls=tuple(
+                str(url) for url in order.authorization_urls
+            ),
+            finalize_url=str(order.finalize_url),
+            certificate_url=str(order.certificate_url)
+            if order.certificate_url is not None else None,
+            private_key=private_key,
+            expires=order.expires.timestamp()
+            if order.expires is not None else None,
+        )
+
+    def to_bytes(self) -> bytes:
+        # Short field names and no whitespace; there may be many of these.
+        return json.dumps(
+            [
+                self.stage,
+                self.order_url,
+                self.authorization_urls,
+                self.finalize_url,
+                self.certificate_url,
+                self.private_key.decode('ascii')
+                if self.private_key is not None else None,
+                self.expires,
+            ],
+            separators=(',', ':'),
+        ).encode('utf-8')
+
+    @staticmethod
+    def from_bytes(key: str, data: bytes) -> 'OrderCheckpoint':
+        fields = json.loads(data.decode('utf-8'))
+        # Records written before private keys and expiry times were kept
+        # have no sixth or seventh field.
+        stage, order_url, authorization_urls, finalize_url, certificate_url \
+            = fields[:5]
+        private_key = fields[5] if len(fields) > 5 else None
+        expires = fields[6] if len(fields) > 6 else None
+        return OrderCheckpoint(
+            key=key,
+            stage=stage,
+            order_url=order_url,
+            authorization_urls=tuple(authorization_urls),
+            finalize_url=finalize_url,
+            certificate_url=certificate_url,
+            private_key=private_key.encode('ascii')
+            if private_key is not None else None,
+            expires=expires,
+        )
+
+
+class StateStore:
+    """Somewhere to keep ``OrderCheckpoint`` records.
+
+    ``save`` and ``discard`` are called on the hot path, so should only
+    queue the change; ``flush`` makes queued changes durable.
+    """
+
+    async def load(self) -> Dict[str, OrderCheckpoint]:
+        raise NotImplementedError
+
+    def save(self, checkpoint: OrderCheckpoint) -> None:
+        raise NotImplementedError
+
+    def discard(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.flush()
+
+
+class SqliteStateStore(StateStore):
+    """A ``StateStore`` in an SQLite database.
+
+    Changes are gathered for ``flush_delay`` seconds, keeping only the
+    latest for each key, and written in one transaction on a thread of
+    their own, so checkpointing never blocks the event loop.
+    """
+
+    def __init__(self, path: str, *, flush_delay: float = 0.05) -> None:
+        self.path = path
+        self.flush_delay = flush_delay
+        # One thread, so the connection is only ever used from it.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._connection: Optional[sqlite3.Connection] = None
+        # Keys to the record to store, or None to delete it.
+        self._pending: Dict[str, Optional[bytes]] = {}
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._writes = set()
+        # The first write error since the last flush; see flush.
+        self._error: Optional[BaseException] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoints'
+                ' (key TEXT PRIMARY KEY, record BLOB NOT NULL)'
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _read_all(self):
+        return self._connect().execute(
+            'SELECT key, record FROM checkpoints',
+        ).fetchall()
+
+    def _write(self, batch: Dict[str, Optional[bytes]]) -> None:
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO checkpoints (key, record)'
+                ' VALUES (?, ?)',
+                [
+                    (key, record) for key, record in batch.items()
+                    if record is not None
+                ],
+            )
+            connection.executemany(
+                'DELETE FROM checkpoints WHERE key = ?',
+                [(key,) for key, record in batch.items() if record is None],
+            )
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def load(self) -> Dict[str, OrderCheckpoint]:
+        loop = asyncio.get_event_loop()
+        rows = await loop.run_in_executor(self._executor, self._read_all)
+        return {
+            key: OrderCheckpoint.from_bytes(key, record)
+            for key, record in rows
+        }
+
+    def save(self, checkpoint: OrderCheckpoint) -> None:
+        self._pending[checkpoint.key] = checkpoint.to_bytes()
+        self._schedule_flush()
+
+    def discard(self, key: str) -> None:
+        self._pending[key] = None
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is None:
+            loop = asyncio.get_event_loop()
+            self._flush_handle = loop.call_later(
+                self.flush_delay, self._start_write,
+            )
+
+    def _start_write(self) -> None:
+        self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        loop = asyncio.get_event_loop()
+        write = loop.run_in_executor(self._executor, self._write, batch)
+        self._writes.add(write)
+        write.add_done_callback(
+            lambda write: self._on_written(write, batch)
+        )
+
+    def _on_written(self, write: asyncio.Future, batch) -> None:
+        self._writes.discard(write)
+        if write.cancelled() or write.exception() is None:
+            return
+        err = write.exception()
+        logger.error(
+            'Writing %d checkpoints to %s failed: %r',
+            len(batch), self.path, err,
+        )
+        if self._error is None:
+            self._error = err
+        # Try again with the next batch, unless they've changed since.
+        for key, record in batch.items():
+            self._pending.setdefault(key, record)
+
+    async def flush(self) -> None:
+        """Write out queued changes. Raises the first error from any write
+        since the last ``flush``; changes that failed to be written stay
+        queued.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._start_write()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise err
+
+    async def close(self) -> None:
+        try:
+            await self.flush()
+        finally:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                self._executor, self._close_connection,
+            )
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,409 @@
+"""An in-process stand-in for an ACME server, for tests and benchmarks.
+
+``MockAcmeServer`` implements enough of RFC 8555 to carry orders from
+creation to a downloadable certificate: directory, nonces, accounts, orders,
+authorizations, challenges, finalization and certificates. It checks nonces
+but not signatures, validates every challenge it is asked to, and issues
+placeholder certificates. Like real CAs, it reuses an account's valid
+authorizations in its later orders. Latency and errors can be injected.
+"""
+
+import asyncio
+import base64
+import collections
+import itertools
+import json
+import random
+import secrets
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from . import util
+
+
+_PLACEHOLDER_PEM = (
+    b'-----BEGIN CERTIFICATE-----\n'
+    + base64.encodebytes(b'aioacme placeholder certificate ' * 8)
+    + b'-----END CERTIFICATE-----\n'
+)
+
+
+class MockAcmeServer:
+    """An ACME server stand-in, served by aiohttp on localhost.
+
+    :param latency: Seconds added to the handling of every request.
+    :param validation_delay: Seconds between a challenge being triggered
+        and its authorization becoming valid.
+    :param issuance_delay: Seconds between finalization and the order
+        becoming valid.
+    :param bad_nonce_rate: Fraction of POSTs rejected with ``badNonce``.
+    :param error_rate: Fraction of POSTs failing with a 500.
+    :param retry_after: If set, the ``Retry-After`` value to send with
+        orders and authorizations that are still in progress.
+    """
+
+    def __init__(
+            self,
+            *,
+            latency: float = 0.0,
+            validation_delay: float = 0.0,
+            issuance_delay: float = 0.0,
+            bad_nonce_rate: float = 0.0,
+            error_rate: float = 0.0,
+            retry_after: Optional[int] = None,
+            alternate_chains: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.validation_delay = validation_delay
+        self.issuance_delay = issuance_delay
+        self.bad_nonce_rate = bad_nonce_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.alternate_chains = alternate_chains
+        # Request counts, keyed by endpoint name.
+        self.requests: Dict[str, int] = collections.Counter()
+        self.base_url = ''
+        self._ids = itertools.count(1)
+        self._nonces = set()
+        self._accounts: Dict[str, Any] = {}
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._authzs: Dict[str, Dict[str, Any]] = {}
+        self._challenges: Dict[str, str] = {}
+        # (account URL, identifier type, value, wildcard) -> authorization ID
+        self._authz_ids: Dict[tuple, str] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks = set()
+
+    @property
+    def directory_url(self) -> str:
+        return f'{self.base_url}/directory'
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start serving; returns the directory URL."""
+        app = web.Application()
+        app.router.add_get('/directory', self._directory)
+        # add_get also routes HEAD requests.
+        app.router.add_get('/new-nonce', self._new_nonce)
+        app.router.add_post('/new-account', self._new_account)
+        app.router.add_post('/new-order', self._new_order)
+        app.router.add_route('*', '/order/{id}', self._order)
+        app.router.add_post('/order/{id}/finalize', self._finalize)
+        app.router.add_route('*', '/authz/{id}', self._authz)
+        app.router.add_post('/chall/{id}', self._challenge)
+        app.router.add_route('*', '/cert/{id}', self._certificate)
+        app.router.add_route('*', '/cert/{id}/{alt}', self._certificate)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f'http://{host}:{bound_port}'
+        return self.directory_url
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockAcmeServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    # Helpers
+
+    def _url(self, path: str) -> str:
+        return f'{self.base_url}{path}'
+
+    def _new_id(self) -> str:
+        return str(next(self._ids))
+
+    def _issue_nonce(self) -> str:
+        nonce = secrets.token_urlsafe(16)
+        self._nonces.add(nonce)
+        return nonce
+
+    def _later(self, delay: float, fn) -> None:
+        async def run():
+            await asyncio.sleep(delay)
+            fn()
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _begin(self, endpoint: str) -> None:
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _json(self, data, status: int = 200, headers=None) -> web.Response:
+        headers = dict(headers or {})
+        headers['Replay-Nonce'] = self._issue_nonce()
+        return web.Response(
+            status=status,
+            body=json.dumps(data).encode('utf-8'),
+            content_type='application/json',
+            headers=headers,
+        )
+
+    def _problem(self, type_: str, detail: str, status: int = 400):
+        headers = {'Replay-Nonce': self._issue_nonce()}
+        return web.Response(
+            status=status,
+            body=json.dumps({
+                'type': f'urn:ietf:params:acme:error:{type_}',
+                'detail': detail,
+                'status': status,
+            }).encode('utf-8'),
+            content_type='application/problem+json',
+            headers=headers,
+        )
+
+    async def _read_jws(self, request: web.Request):
+        """Decode a JWS body without checking its signature.
+
+        Returns ``(protected_header, payload)``, or a problem response.
+        """
+        try:
+            jws = await request.json()
+            protected = json.loads(util.acme_b64decode(jws['protected']))
+            payload_bytes = util.acme_b64decode(jws['payload'])
+        except (ValueError, KeyError, TypeError):
+            return None, self._problem('malformed', 'Malformed JWS.')
+
+        nonce = protected.get('nonce')
+        if nonce not in self._nonces:
+            return None, self._problem('badNonce', 'Unknown nonce.')
+        self._nonces.discard(nonce)
+        if random.random() < self.bad_nonce_rate:
+            return None, self._problem('badNonce', 'Injected badNonce.')
+        if random.random() < self.error_rate:
+            return None, web.Response(
+                status=500, headers={'Replay-Nonce': self._issue_nonce()},
+            )
+        payload = json.loads(payload_bytes) if payload_bytes else None
+        return (protected, payload), None
+
+    def _in_progress_headers(self) -> Dict[str, str]:
+        if self.retry_after is None:
+            return {}
+        return {'Retry-After': str(self.retry_after)}
+
+    def certificate_chain(self, order_id: str, alternate) -> bytes:
+        """The PEM chain to serve for an order: the default one, or
+        alternate number ``alternate``. Two placeholders, unless overridden.
+        """
+        return _PLACEHOLDER_PEM * 2
+
+    # Handlers
+
+    async def _directory(self, request):
+        await self._begin('directory')
+        return web.json_response({
+            'keyChange': self._url('/key-change'),
+            'newAccount': self._url('/new-account'),
+            'newNonce': self._url('/new-nonce'),
+            'newOrder': self._url('/new-order'),
+            'revokeCert': self._url('/revoke-cert'),
+        })
+
+    async def _new_nonce(self, request):
+        await self._begin('newNonce')
+        return web.Response(
+            status=200 if request.method == 'HEAD' else 204,
+            headers={
+                'Replay-Nonce': self._issue_nonce(),
+                'Cache-Control': 'no-store',
+            },
+        )
+
+    async def _new_account(self, request):
+        await self._begin('newAccount')
+        jws, problem = await self._read_jws(request)
+        if problem is not None:
+            return problem
+        protected, payload = jws
+        jwk = json.dumps(protected.get('jwk'), sort_keys=True)
+        account_url = self._accounts.get(jwk)
+        if account_url is None:
+            if payload and payload.get('onlyReturnExisting'):
+                return self._problem(
+                    'accountDoesNotExist', 'No such account.', 400,
+                )
+            account_url = self._url(f'/acct/{self._new_id()}')
+            self._accounts[jwk] = account_url
+            status = 201
+        else:
+            status = 200
+        return self._json(
+            {'status': 'valid'},
+            status=status,
+            headers={'Location': account_url},
+        )
+
+    async def _new_order(self, request):
+        await self._begin('newOrder')
+        jws, problem = await self._read_jws(request)
+        if problem is not None:
+            return problem
+        protected, payload = jws
+        order_id = self._new_id()
+        authz_ids = []
+        for identifier in payload['identifiers']:
+            wildcard = identifier['value'].startswith('*.')
+            if wildcard:
+                identifier = dict(identifier, value=identifier['value'][2:])
+            reuse_key = (
+                protected.get('kid'), identifier['type'], identifier['value'],
+                wildcard,
+            )
+            authz_id = self._authz_ids.get(reuse_key)
+            if authz_id is not None \
+                    and self._authzs[authz_id]['status'] == 'valid':
+                authz_ids.append(authz_id)
+                continue
+            authz_id = self._new_id()
+            chall_id = self._new_id()
+            authz = {
+                'identifier': identifier,
+                'status': 'pending',
+                'expires': '2099-01-01T00:00:00Z',
+                'challenges': [{
+                    'type': 'http-01',
+                    'url': self._url(f'/chall/{chall_id}'),
+                    'status': 'pending',
+                    'token': secrets.token_urlsafe(16),
+                }],
+            }
+            if wildcard:
+                authz['wildcard'] = True
+            self._authzs[authz_id] = authz
+            self._authz_ids[reuse_key] = authz_id
+            self._challenges[chall_id] = authz_id
+            authz_ids.append(authz_id)
+        self._orders[order_id] = {
+            'status': 'pending',
+            'expires': '2099-01-01T00:00:00Z',
+            'identifiers': payload['identifiers'],
+            'authorizations': [
+                self._url(f'/authz/{authz_id}') for authz_id in authz_ids
+            ],
+            'finalize': self._url(f'/order/{order_id}/finalize'),
+            '_authz_ids': authz_ids,
+        }
+        return self._json(
+            self._public(self._orders[order_id]),
+            status=201,
+            headers={'Location': self._url(f'/order/{order_id}')},
+        )
+
+    def _public(self, order):
+        return {k: v for k, v in order.items() if not k.startswith('_')}
+
+    async def _order(self, request):
+        await self._begin('order')
+        order = self._orders.get(request.match_info['id'])
+        if order is None:
+            return self._problem('malformed', 'No such order.', 404)
+        self._refresh_order(order)
+        headers = {}
+        if order['status'] in ('pending', 'processing'):
+            headers = self._in_progress_headers()
+        return self._json(self._public(order), headers=headers)
+
+    def _refresh_order(self, order) -> None:
+        if order['status'] != 'pending':
+            return
+        statuses = [
+            self._authzs[authz_id]['status']
+            for authz_id in order['_authz_ids']
+        ]
+        if all(status == 'valid' for status in statuses):
+            order['status'] = 'ready'
+        elif any(status not in ('pending', 'valid') for status in statuses):
+            order['status'] = 'invalid'
+
+    async def _authz(self, request):
+        await self._begin('authz')
+        authz = self._authzs.get(request.match_info['id'])
+        if authz is None:
+            return self._problem('malformed', 'No such authorization.', 404)
+        headers = {}
+        if authz['status'] == 'pending':
+            headers = self._in_progress_headers()
+        return self._json(authz, headers=headers)
+
+    async def _challenge(self, request):
+        await self._begin('challenge')
+        jws, problem = await self._read_jws(request)
+        if problem is not None:
+            return problem
+        authz_id = self._challenges.get(request.match_info['id'])
+        if authz_id is None:
+            return self._problem('malformed', 'No such challenge.', 404)
+        authz = self._authzs[authz_id]
+        challenge = authz['challenges'][0]
+        if challenge['status'] == 'pending':
+            challenge['status'] = 'processing'
+
+            def validate():
+                challenge['status'] = 'valid'
+                authz['status'] = 'valid'
+
+            self._later(self.validation_delay, validate)
+        return self._json(challenge, headers={
+            'Link': f'<{self._url(f"/authz/{authz_id}")}>;rel="up"',
+        })
+
+    async def _finalize(self, request):
+        await self._begin('finalize')
+        jws, problem = await self._read_jws(request)
+        if problem is not None:
+            return problem
+        order_id = request.match_info['id']
+        order = self._orders.get(order_id)
+        if order is None:
+            return self._problem('malformed', 'No such order.', 404)
+        self._refresh_order(order)
+        if order['status'] != 'ready':
+            return self._problem(
+                'orderNotReady', f'Order is {order["status"]}.', 403,
+            )
+        order['status'] = 'processing'
+
+        def issue():
+            order['status'] = 'valid'
+            order['certificate'] = self._url(f'/cert/{order_id}')
+
+        self._later(self.issuance_delay, issue)
+        return self._json(
+            self._public(order), headers=self._in_progress_headers(),
+        )
+
+    async def _certificate(self, request):
+        await self._begin('certificate')
+        order_id = request.match_info['id']
+        if order_id not in self._orders:
+            return self._problem('malformed', 'No such certificate.', 404)
+        links: List[str] = []
+        if 'alt' not in request.match_info:
+            links = [
+                f'<{self._url(f"/cert/{order_id}/{alt}")}>;rel="alternate"'
+                for alt in range(self.alternate_chains)
+            ]
+        headers = {'Replay-Nonce': self._issue_nonce()}
+        response = web.Response(
+            body=self.certificate_chain(
+                order_id, request.match_info.get('alt'),
+            ),
+            content_type='application/pem-certificate-chain',
+            headers=headers,
+        )
+        for link in links:
+            response.headers.add('Link', link)
+        return response
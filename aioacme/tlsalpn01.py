@@ -0,0 +1,293 @@
+"""Answering TLS-ALPN-01 challenges (RFC 8737) in process."""
+
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import hashlib
+import itertools
+import os
+import secrets
+import ssl
+import tempfile
+from typing import Dict, Iterable, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import ObjectIdentifier
+
+from .authorization import Authorization
+from .challenge import Challenge, ChallengeStatus, TlsAlpn01Challenge
+from .issuance import ChallengeSolver
+
+
+ACME_TLS_PROTOCOL = 'acme-tls/1'
+ID_PE_ACME_IDENTIFIER = ObjectIdentifier('1.3.6.1.5.5.7.1.31')
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def _generate_key():
+    return ec.generate_private_key(ec.SECP256R1(), default_backend())
+
+
+class KeyPool:
+    """Private keys generated ahead of time, handed out round-robin.
+
+    Validation certificates are thrown away once the challenge is done, so
+    nothing is lost by several of them sharing a key.
+    """
+
+    def __init__(self, size: int = 8) -> None:
+        if size < 1:
+            raise ValueError(f'size must be at least 1, got {size!r}')
+        self.keys = tuple(_generate_key() for _ in range(size))
+        self._next = itertools.cycle(self.keys)
+
+    def get(self):
+        return next(self._next)
+
+
+def validation_certificate(
+        domain_name: str, key_authorization: str, key,
+) -> bytes:
+    """A self-signed ``acme-tls/1`` certificate for ``domain_name``, as PEM.
+
+    It names ``domain_name`` as its only subjectAltName, and carries the
+    SHA-256 digest of ``key_authorization`` in a critical acmeIdentifier
+    extension.
+    """
+    digest = hashlib.sha256(key_authorization.encode('ascii')).digest()
+    # The extension's value is the DER encoding of an OCTET STRING.
+    acme_identifier = b'\x04' + bytes((len(digest),)) + digest
+    now = datetime.datetime.now(datetime.timezone.utc)
+    name = x509.Name([])
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(int.from_bytes(secrets.token_bytes(16), 'big') >> 1)
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=7))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName(domain_name)]),
+            critical=False,
+        )
+        .add_extension(
+            x509.UnrecognizedExtension(
+                ID_PE_ACME_IDENTIFIER, acme_identifier,
+            ),
+            critical=True,
+        )
+        .sign(key, hashes.SHA256(), default_backend())
+    )
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+def _context_for(cert_pem: bytes, key) -> ssl.SSLContext:
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.set_alpn_protocols([ACME_TLS_PROTOCOL])
+    # The ssl module only loads certificates from files. The key goes in a
+    # directory of our own, which mkdtemp makes readable by this user only,
+    # and both are gone again once it is loaded.
+    with tempfile.TemporaryDirectory(prefix='acme-tls-') as directory:
+        path = os.path.join(directory, 'validation.pem')
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as pem_file:
+            pem_file.write(cert_pem + key_pem)
+        context.load_cert_chain(path)
+    return context
+
+
+def _build_context(domain_name: str, key_authorization: str, key):
+    return _context_for(
+        validation_certificate(domain_name, key_authorization, key), key,
+    )
+
+
+class _ValidationProtocol(asyncio.Protocol):
+    # The CA only needs the handshake; nothing is ever sent after it.
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        self.transport.close()
+
+
+class TlsAlpn01Responder(ChallengeSolver):
+    """Answers TLS-ALPN-01 challenges from an asyncio TLS server.
+
+    Certificates are made when a domain is registered, with keys from a
+    ``KeyPool``, and kept in an LRU cache of ``cache_size`` SSL contexts
+    keyed by ``(domain, key authorization)``. The server's SNI callback
+    only swaps in the right context, so handshakes cost no certificate
+    generation, however many names are being validated at once.
+
+    ``register`` makes the certificate there and then; from a coroutine,
+    use ``prepare``, which makes them in an executor instead of stalling
+    the event loop.
+
+    It is also a ``ChallengeSolver`` for ``issuance.issue_many``, picking
+    the TLS-ALPN-01 challenge of each authorization.
+    """
+
+    def __init__(
+            self,
+            *,
+            key_pool: Optional[KeyPool] = None,
+            cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.key_pool = key_pool if key_pool is not None else KeyPool()
+        self.cache_size = cache_size
+        self._key_authorizations: Dict[str, str] = {}
+        # (domain name, key authorization) -> ssl.SSLContext, oldest first.
+        self._contexts = collections.OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def __len__(self) -> int:
+        return len(self._key_authorizations)
+
+    def __contains__(self, domain_name: str) -> bool:
+        return domain_name in self._key_authorizations
+
+    def register(self, domain_name: str, key_authorization: str) -> None:
+        self._key_authorizations[domain_name] = key_authorization
+        self._context(domain_name, key_authorization)
+
+    def register_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Register ``(domain name, key authorization)`` pairs."""
+        for domain_name, key_authorization in pairs:
+            self.register(domain_name, key_authorization)
+
+    async def prepare(
+            self,
+            pairs: Iterable[Tuple[str, str]],
+            *,
+            executor: Optional[concurrent.futures.Executor] = None,
+    ) -> None:
+        """Register ``(domain name, key authorization)`` pairs, making their
+        certificates in ``executor`` (by default, the loop's).
+        """
+        loop = asyncio.get_event_loop()
+        cache_keys = []
+        jobs = []
+        for domain_name, key_authorization in pairs:
+            self._key_authorizations[domain_name] = key_authorization
+            cache_key = (domain_name, key_authorization)
+            if cache_key in self._contexts:
+                self._contexts.move_to_end(cache_key)
+                continue
+            cache_keys.append(cache_key)
+            jobs.append(loop.run_in_executor(
+                executor,
+                _build_context,
+                domain_name,
+                key_authorization,
+                self.key_pool.get(),
+            ))
+        contexts = await asyncio.gather(*jobs)
+        for cache_key, context in zip(cache_keys, contexts):
+            domain_name, key_authorization = cache_key
+            # Unless it was removed, or replaced, in the meantime.
+            if self._key_authorizations.get(domain_name) == key_authorization:
+                self._store(cache_key, context)
+
+    def remove(self, domain_name: str) -> None:
+        key_authorization = self._key_authorizations.pop(domain_name, None)
+        if key_authorization is not None:
+            self._contexts.pop((domain_name, key_authorization), None)
+
+    def remove_many(self, domain_names: Iterable[str]) -> None:
+        for domain_name in domain_names:
+            self.remove(domain_name)
+
+    def _context(
+            self, domain_name: str, key_authorization: str,
+    ) -> ssl.SSLContext:
+        cache_key = (domain_name, key_authorization)
+        context = self._contexts.get(cache_key)
+        if context is not None:
+            self._contexts.move_to_end(cache_key)
+            return context
+        context = _build_context(
+            domain_name, key_authorization, self.key_pool.get(),
+        )
+        self._store(cache_key, context)
+        return context
+
+    def _store(self, cache_key: Tuple[str, str], context) -> None:
+        self._contexts[cache_key] = context
+        self._contexts.move_to_end(cache_key)
+        if len(self._contexts) > self.cache_size:
+            self._contexts.popitem(last=False)
+
+    def _on_server_name(self, ssl_object, server_name, base_context):
+        key_authorization = self._key_authorizations.get(server_name) \
+            if server_name is not None else None
+        if key_authorization is None:
+            return ssl.ALERT_DESCRIPTION_UNRECOGNIZED_NAME
+        ssl_object.context = self._context(server_name, key_authorization)
+        return None
+
+    # Serving
+
+    def server_context(self) -> ssl.SSLContext:
+        """An SSL context for a server of your own to answer challenges."""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.set_alpn_protocols([ACME_TLS_PROTOCOL])
+        if hasattr(context, 'sni_callback'):
+            context.sni_callback = self._on_server_name
+        else:
+            # Python 3.6
+            context.set_servername_callback(self._on_server_name)
+        return context
+
+    async def start(self, host: str = '0.0.0.0', port: int = 443) -> None:
+        loop = asyncio.get_event_loop()
+        self._server = await loop.create_server(
+            _ValidationProtocol, host, port, ssl=self.server_context(),
+        )
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> 'TlsAlpn01Responder':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    # ChallengeSolver
+
+    def select(self, authz: Authorization) -> Optional[Challenge]:
+        for challenge in authz.challenges:
+            if isinstance(challenge, TlsAlpn01Challenge) \
+                    and challenge.status is not ChallengeStatus.INVALID:
+                return challenge
+        return None
+
+    async def provision(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        await self.prepare([(
+            authz.identifier.domain_name,
+            account.key_authorization(challenge.token),
+        )])
+
+    async def cleanup(
+            self, account, authz: Authorization, challenge: Challenge,
+    ) -> None:
+        self.remove(authz.identifier.domain_name)
@@ -1,5 +1,16 @@
+import asyncio
 import base64
-from typing import Dict, Union
+from datetime import datetime, timezone
+import email.utils
+import re
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional,
+    Tuple, TypeVar,
+)
+
+
+T = TypeVar('T')
+R = TypeVar('R')
 
 
 def rename_key(
@@ -25,3 +36,105 @@ def acme_b64decode(data: str) -> bytes:
         data += '='
 
     return base64.urlsafe_b64decode(data)
+
+
+def parse_retry_after(
+        value: Optional[str],
+        now: Optional[datetime] = None,
+) -> Optional[float]:
+    """Parse a ``Retry-After`` header into a delay in seconds.
+
+    The header may be either a number of seconds or an HTTP date. Returns
+    ``None`` if the header is missing or malformed.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+_LINK_RE = re.compile(
+    r'<([^>]*)>((?:\s*;\s*[^;,=\s]+\s*=\s*(?:"[^"]*"|[^;,]*))*)'
+)
+_LINK_PARAM_RE = re.compile(r';\s*([^;,=\s]+)\s*=\s*(?:"([^"]*)"|([^;,]*))')
+
+
+def parse_link_headers(
+        values: Iterable[str],
+) -> List[Tuple[str, Dict[str, str]]]:
+    """Parse ``Link`` header values (RFC 8288) into ``(url, params)`` pairs.
+
+    Each header value may hold several comma-separated links. Parameter names
+    are lowercased; URLs are returned as-is, unresolved.
+    """
+    links = []
+    for value in values:
+        for match in _LINK_RE.finditer(value):
+            params = {}
+            for param in _LINK_PARAM_RE.finditer(match.group(2)):
+                param_value = param.group(2)
+                if param_value is None:
+                    param_value = param.group(3).strip()
+                params[param.group(1).lower()] = param_value
+            links.append((match.group(1), params))
+    return links
+
+
+async def map_unordered(
+        fn: Callable[[T], Awaitable[R]],
+        items: Iterable[T],
+        limit: int,
+) -> AsyncIterator[Tuple[int, R]]:
+    """Run ``fn`` over ``items``, at most ``limit`` at a time.
+
+    Yields ``(index, result)`` pairs in completion order. If any call raises,
+    the remaining calls are cancelled and the exception propagates.
+    """
+    if limit < 1:
+        raise ValueError(f'limit must be at least 1, got {limit!r}')
+
+    async def _indexed(idx, item):
+        return idx, await fn(item)
+
+    remaining = enumerate(items)
+    pending = set()
+    try:
+        while True:
+            for idx, item in remaining:
+                pending.add(asyncio.ensure_future(_indexed(idx, item)))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                return
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def map_ordered(
+        fn: Callable[[T], Awaitable[R]],
+        items: Iterable[T],
+        limit: int,
+) -> List[R]:
+    """Like ``map_unordered``, but return the results in input order."""
+    results: Dict[int, Any] = {}
+    async for idx, result in map_unordered(fn, items, limit):
+        results[idx] = result
+    return [results[idx] for idx in range(len(results))]
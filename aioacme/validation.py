@@ -5,8 +5,9 @@ from yarl import URL
 
 
 class OptionalKey:
-    def __init__(self, field_name: str) -> None:
+    def __init__(self, field_name: str, default=None) -> None:
         self.field_name = field_name
+        self.default = default
 
 
 def deserialize_dict(
@@ -32,7 +33,7 @@ def deserialize_dict(
             if key.field_name in dct:
                 value = dct[key.field_name]
             else:
-                validated[key.field_name] = None
+                validated[key.field_name] = key.default
                 continue
         else:
             field_name = key
@@ -51,6 +52,144 @@ def deserialize_dict(
     return deserializer(**validated)
 
 
+class CompiledSchema:
+    """A schema, as taken by ``deserialize_dict``, flattened ahead of time.
+
+    Walking the schema dict, checking which keys are optional and renaming
+    fields afterwards all happen once, here, rather than on every parse.
+    ``parse`` gives the same results and the same errors as
+    ``deserialize_dict`` would.
+
+    :param rename:
+        Maps JSON field names to the keyword argument names that ``parse``
+        should return them under.
+    :param base:
+        Another ``CompiledSchema`` whose fields are parsed first; errors in
+        those fields are reported against the base's ``obj_type_name``.
+    """
+
+    __slots__ = ('obj_type_name', 'fields', 'by_dest')
+
+    def __init__(
+            self,
+            schema,
+            obj_type_name: str,
+            *,
+            rename=None,
+            base: 'CompiledSchema' = None,
+    ) -> None:
+        rename = rename or {}
+        fields = []
+        for key, value_deserializer in schema.items():
+            if isinstance(key, OptionalKey):
+                field_name = key.field_name
+                required = False
+                default = key.default
+            else:
+                field_name = key
+                required = True
+                default = None
+            fields.append((
+                field_name,
+                rename.get(field_name, field_name),
+                value_deserializer,
+                required,
+                default,
+                obj_type_name,
+                f'Failed to deserialize field "{field_name}" while parsing'
+                f' {obj_type_name} object.',
+            ))
+        self.obj_type_name = obj_type_name
+        self.fields = (base.fields if base is not None else ()) + tuple(fields)
+        self.by_dest = {field[1]: field for field in self.fields}
+
+    def parse(self, dct):
+        """Validate ``dct``, returning a dict of deserialized fields."""
+        if not isinstance(dct, dict):
+            type_check(dct, dict)
+        validated = {}
+        for field_name, dest, value_deserializer, required, default, \
+                obj_type_name, error_message in self.fields:
+            if field_name in dct:
+                try:
+                    validated[dest] = value_deserializer(dct[field_name])
+                except Exception as err:
+                    raise ValidationError(error_message) from err
+            elif required:
+                require_key(dct, field_name, obj_type_name)
+            else:
+                validated[dest] = default
+        return validated
+
+    def parse_field(self, dct, dest: str):
+        """Deserialize just the field that ``parse`` would return as
+        ``dest``.
+        """
+        field_name, _, value_deserializer, required, default, \
+            obj_type_name, error_message = self.by_dest[dest]
+        if field_name in dct:
+            try:
+                return value_deserializer(dct[field_name])
+            except Exception as err:
+                raise ValidationError(error_message) from err
+        elif required:
+            require_key(dct, field_name, obj_type_name)
+        return default
+
+
+class LazyView:
+    """Read-only access to a JSON object, deserializing fields on first use.
+
+    Subclasses set ``_parser`` to a ``CompiledSchema`` and ``_type`` to the
+    class that ``_parser``'s fields build. A field is only validated when it
+    is read, so a view of an invalid object only raises once an invalid
+    field is read, or on ``resolve``.
+    """
+
+    __slots__ = ('json', '_values')
+
+    _parser: CompiledSchema
+    _type: type
+
+    def __init__(self, json_) -> None:
+        type_check(json_, dict)
+        self.json = json_
+        self._values = {}
+
+    def __getattr__(self, name: str):
+        # Only reached for names that aren't set slots or class attributes.
+        # copy and pickle probe instances that were never initialized, so
+        # don't touch _values for those.
+        if name in LazyView.__slots__ or name.startswith('__'):
+            raise AttributeError(
+                f'{type(self).__name__!r} object has no attribute {name!r}'
+            )
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in self._parser.by_dest:
+            raise AttributeError(
+                f'{type(self).__name__!r} object has no attribute {name!r}'
+            )
+        value = self._parser.parse_field(self.json, name)
+        self._values[name] = value
+        return value
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.json!r})'
+
+    def __reduce__(self):
+        # Only the JSON; decoded fields are rebuilt on demand.
+        return type(self), (self.json,)
+
+    def resolve(self):
+        """Deserialize every field, returning a full ``_type`` object."""
+        return self._type(**{
+            dest: getattr(self, dest) for dest in self._parser.by_dest
+        })
+
+
 class ValidationError(Exception):
     def __init__(self, message: str) -> None:
         self.message = message
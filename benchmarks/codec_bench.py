@@ -0,0 +1,66 @@
+"""Microbenchmark: JSON codecs, per request.
+
+One "request" here is the JSON work the client does for a new order:
+encoding the newOrder payload and decoding the order, plus decoding each of
+its authorizations. The stdlib baseline is how bodies were handled before
+codecs were pluggable. Run with::
+
+    python3 -m benchmarks.codec_bench [authorizations-per-order]
+"""
+
+import json
+import sys
+import timeit
+
+from aioacme import codec
+
+from . import samples
+
+
+class BaselineCodec(codec.JsonCodec):
+    name = 'baseline'
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def main():
+    authorization_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    order = samples.order_json(0, authorization_count)
+    payload = {'identifiers': order['identifiers']}
+    order_body = json.dumps(order).encode('utf-8')
+    authorization_bodies = [
+        json.dumps(samples.authorization_json(idx)).encode('utf-8')
+        for idx in range(authorization_count)
+    ]
+
+    codecs = [BaselineCodec(), codec.StdlibCodec()]
+    for codec_type in (codec.OrjsonCodec, codec.UjsonCodec):
+        try:
+            codecs.append(codec_type())
+        except ImportError:
+            print(f'{codec_type.name:>10}: not installed')
+
+    number = 2000
+    baseline = None
+    for json_codec in codecs:
+        def run():
+            json_codec.dumps(payload)
+            json_codec.loads(order_body)
+            for body in authorization_bodies:
+                json_codec.loads(body)
+
+        best = min(timeit.repeat(run, number=number, repeat=5)) / number
+        if baseline is None:
+            baseline = best
+        print(
+            f'{json_codec.name:>10}: {best * 1e6:8.2f} us/request'
+            f' ({(baseline - best) * 1e6:+.2f} us saved)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Microbenchmark: reading an order's status, eagerly vs. lazily.
+
+Pollers usually only look at ``status``; this compares parsing whole orders
+with ``Order.from_json`` against reading the status of a ``LazyOrder``. Run
+with::
+
+    python3 -m benchmarks.lazy_bench [authorizations-per-order]
+"""
+
+import sys
+import timeit
+
+from aioacme import order
+
+from . import samples
+
+
+def main():
+    authorization_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    count = 1000
+    orders = [
+        samples.order_json(idx, authorization_count) for idx in range(count)
+    ]
+
+    def eager():
+        for json_ in orders:
+            order.Order.from_json(json_).status
+
+    def lazy():
+        for json_ in orders:
+            order.LazyOrder(json_).status
+
+    for name, run in (('eager', eager), ('lazy', lazy)):
+        best = min(timeit.repeat(run, number=1, repeat=5))
+        print(f'{name:>6}: {best / count * 1e6:8.2f} us/order')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""End-to-end load benchmark against the in-process mock ACME server.
+
+For each concurrency level, issues a batch of single-name certificates
+through ``issue_many`` and reports:
+
+* orders per second;
+* p50 and p99 time from an order entering the pipeline to its certificate
+  being downloaded;
+* HTTP requests made per order, as counted by the server;
+* event loop blocking: the total and worst delay of a 5 ms timer, which
+  grows when something holds the loop (signing, parsing, ...).
+
+Run with::
+
+    python3 -m benchmarks.load_bench [--orders N] [--levels 1,10,100,1000]
+        [--state-store PATH]
+
+``--state-store`` checkpoints every order in an SQLite database at PATH,
+to measure what checkpointing costs.
+"""
+
+import argparse
+import asyncio
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+import josepy
+
+from aioacme import client as _client
+from aioacme import issuance
+from aioacme import poll
+from aioacme import statestore
+from aioacme import testing
+from aioacme.identifier import DnsName
+
+
+class AcceptAnyHttp01(issuance.ChallengeSolver):
+    """The mock server validates every challenge, so there is nothing to
+    provision."""
+
+    def select(self, authz):
+        for challenge in authz.challenges:
+            if challenge.type == 'http-01':
+                return challenge
+        return None
+
+    async def provision(self, account, authz, challenge):
+        pass
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    idx = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run_level(
+        directory_url, server, key, concurrency, order_count, state_store,
+):
+    client = await _client.new_client(directory_url, 'load-bench')
+    client.poller = poll.Poller(
+        client, max_rate=10000.0, min_interval=0.01, max_interval=0.5,
+    )
+    try:
+        account = await client.new_account(key, terms_of_service_agreed=True)
+        server.requests.clear()
+
+        def requests():
+            for idx in range(order_count):
+                yield issuance.IssuanceRequest(
+                    identifiers=[DnsName(f'host{idx}.{concurrency}.example')],
+                    csr=b'placeholder-csr',
+                    tag=time.monotonic(),
+                )
+
+        monitor = LoopMonitor()
+        monitor.start()
+        latencies = []
+        failures = 0
+        start = time.monotonic()
+        async for result in issuance.issue_many(
+                account,
+                requests(),
+                AcceptAnyHttp01(),
+                concurrency=concurrency,
+                state_store=state_store,
+        ):
+            latencies.append(time.monotonic() - result.request.tag)
+            if not result.ok:
+                failures += 1
+        elapsed = time.monotonic() - start
+        await monitor.stop()
+    finally:
+        await client.close()
+
+    total_requests = sum(server.requests.values())
+    print(
+        f'{concurrency:>6} {order_count / elapsed:10.1f}'
+        f' {percentile(latencies, 0.5) * 1000:9.1f}'
+        f' {percentile(latencies, 0.99) * 1000:9.1f}'
+        f' {total_requests / order_count:9.2f}'
+        f' {monitor.total_lag * 1000:10.1f}'
+        f' {monitor.max_lag * 1000:9.1f}'
+        f' {failures:>6}'
+    )
+
+
+async def main(args):
+    key = josepy.JWKEC(key=ec.generate_private_key(
+        ec.SECP256R1(), default_backend(),
+    ))
+    server = testing.MockAcmeServer(
+        latency=args.latency,
+        validation_delay=args.validation_delay,
+        issuance_delay=args.issuance_delay,
+    )
+    async with server:
+        print(
+            'concur   orders/s   p50(ms)   p99(ms)  req/order'
+            ' blocked(ms) max(ms) failed'
+        )
+        state_store = statestore.SqliteStateStore(args.state_store) \
+            if args.state_store is not None else None
+        try:
+            for concurrency in args.levels:
+                order_count = max(args.orders, concurrency)
+                await run_level(
+                    server.directory_url, server, key, concurrency,
+                    order_count, state_store,
+                )
+        finally:
+            if state_store is not None:
+                await state_store.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument(
+        '--levels',
+        type=lambda value: [int(level) for level in value.split(',')],
+        default=[1, 10, 100, 1000],
+    )
+    parser.add_argument('--latency', type=float, default=0.001)
+    parser.add_argument('--validation-delay', type=float, default=0.01)
+    parser.add_argument('--issuance-delay', type=float, default=0.01)
+    parser.add_argument('--state-store', default=None)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(parse_args()))
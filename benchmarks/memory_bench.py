@@ -0,0 +1,68 @@
+"""Memory benchmark: bytes per model object, slotted vs. ``__dict__``.
+
+For each model class, builds many instances of it and of an otherwise
+identical ``attrs`` class without slots (what the models used to be), and
+reports the memory each instance takes, not counting the field values
+they share. Run with::
+
+    python3 -m benchmarks.memory_bench [number-of-objects]
+"""
+
+import sys
+import tracemalloc
+
+import attr
+
+from aioacme import authorization
+from aioacme import challenge
+from aioacme import order
+
+from . import samples
+
+
+def unslotted_twin(cls):
+    return attr.make_class(
+        f'Unslotted{cls.__name__}',
+        [field.name for field in attr.fields(cls)],
+        slots=False,
+    )
+
+
+def bytes_per_object(cls, kwargs, count):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [cls(**kwargs) for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    models = (
+        (order.Order, samples.order_json()),
+        (authorization.Authorization, samples.authorization_json()),
+        (challenge.Http01Challenge, samples.challenge_json()),
+    )
+    parsers = {
+        order.Order: order.Order.from_json,
+        authorization.Authorization: authorization.authorization_from_json,
+        challenge.Http01Challenge: challenge.challenge_from_json,
+    }
+    for cls, json_ in models:
+        parsed = parsers[cls](json_)
+        kwargs = {
+            field.name: getattr(parsed, field.name)
+            for field in attr.fields(cls)
+        }
+        slotted = bytes_per_object(cls, kwargs, count)
+        unslotted = bytes_per_object(unslotted_twin(cls), kwargs, count)
+        print(
+            f'{cls.__name__:>16}: {unslotted:7.1f} -> {slotted:7.1f}'
+            ' bytes/object'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Sample ACME JSON objects for the benchmarks."""
+
+
+def challenge_json(idx=0, kind=0):
+    return {
+        'type': 'http-01',
+        'url': f'https://acme.example/chall/{idx}/{kind}',
+        'status': 'pending',
+        'token': f'token-{idx}-{kind}',
+    }
+
+
+def authorization_json(idx=0):
+    return {
+        'identifier': {'type': 'dns', 'value': f'host{idx}.example.com'},
+        'status': 'pending',
+        'expires': '2019-05-01T12:00:00Z',
+        'challenges': [challenge_json(idx, kind) for kind in range(3)],
+    }
+
+
+def order_json(idx=0, authorization_count=3):
+    return {
+        'status': 'pending',
+        'expires': '2019-05-01T12:00:00Z',
+        'identifiers': [
+            {'type': 'dns', 'value': f'host{idx}-{n}.example.com'}
+            for n in range(authorization_count)
+        ],
+        'authorizations': [
+            f'https://acme.example/authz/{idx}/{n}'
+            for n in range(authorization_count)
+        ],
+        'finalize': f'https://acme.example/order/{idx}/finalize',
+    }
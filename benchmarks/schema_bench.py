@@ -0,0 +1,70 @@
+"""Microbenchmark: compiled schema parsers vs. ``deserialize_dict``.
+
+Parses a large list of authorizations (each with three challenges) both
+ways and reports the time per authorization. Run with::
+
+    python3 -m benchmarks.schema_bench [number-of-authorizations]
+"""
+
+import sys
+import timeit
+
+from aioacme import authorization
+from aioacme import challenge
+from aioacme import validation
+
+from . import samples
+
+
+def legacy_challenge_from_json(json_):
+    # How challenges were parsed before schemas were compiled: one pass for
+    # the base fields, and a second for the type-specific ones.
+    validated_base = validation.deserialize_dict(
+        json_,
+        challenge._CHALLENGE_BASE_SCHEMA,
+        lambda **dct: dct,
+        'Challenge',
+    )
+    return validation.deserialize_dict(
+        json_,
+        challenge._HTTP_01_SCHEMA,
+        lambda **dct: challenge.Http01Challenge(**validated_base, **dct),
+        'Http01Challenge',
+    )
+
+
+_LEGACY_AUTHORIZATION_SCHEMA = dict(
+    authorization._AUTHORIZATION_SCHEMA,
+    challenges=lambda json_: validation.deserialize_list(
+        json_, legacy_challenge_from_json, 'challenge',
+    ),
+)
+
+
+def legacy_authorization_from_json(json_):
+    return validation.deserialize_dict(
+        json_,
+        _LEGACY_AUTHORIZATION_SCHEMA,
+        authorization.Authorization,
+        'Authorization',
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    authorizations = [samples.authorization_json(idx) for idx in range(count)]
+
+    def run(parse):
+        for json_ in authorizations:
+            parse(json_)
+
+    for name, parse in (
+            ('deserialize_dict', legacy_authorization_from_json),
+            ('compiled', authorization.authorization_from_json),
+    ):
+        best = min(timeit.repeat(lambda: run(parse), number=1, repeat=5))
+        print(f'{name:>16}: {best / count * 1e6:8.2f} us/authorization')
+
+
+if __name__ == '__main__':
+    main()
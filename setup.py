@@ -18,8 +18,13 @@ setup(
     install_requires=[
         'aiohttp>=3.5.4,<4',
         'attrs>=19.1.0,<20',
+        'cryptography>=2.5',
         'iso8601>=0.1.12,<0.2',
-        'josepy>=1.1.0,<2',
+        'josepy>=1.11.0,<2',
         'yarl>=1.3.0,<2',
     ],
+    extras_require={
+        'orjson': ['orjson>=2.0'],
+        'ujson': ['ujson>=1.35'],
+    },
 )
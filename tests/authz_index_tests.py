@@ -0,0 +1,196 @@
+"""Tests for aioacme.authz_index."""
+
+import asyncio
+from datetime import datetime, timezone
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+import josepy
+
+from aioacme import authorization
+from aioacme import client as _client
+from aioacme import issuance
+from aioacme.authz_index import AuthorizationIndex
+from aioacme.identifier import DnsName
+from aioacme.testing import MockAcmeServer
+from tests.sharding_tests import AcceptAnyHttp01
+
+
+ACCOUNT = 'https://acme.example/acct/1'
+OTHER_ACCOUNT = 'https://acme.example/acct/2'
+# 2026-01-10T00:00:00Z
+NOW = 1768003200.0
+
+
+def _authz(name, status='valid', expires=NOW + 86400, wildcard=False):
+    json_ = {
+        'identifier': {'type': 'dns', 'value': name},
+        'status': status,
+        'expires': datetime.fromtimestamp(expires, timezone.utc).isoformat(),
+        'challenges': [],
+    }
+    if wildcard:
+        json_['wildcard'] = True
+    return authorization.authorization_from_json(json_)
+
+
+class AuthorizationIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.index = AuthorizationIndex(margin=3600, clock=lambda: self.now)
+
+    def test_lookup_by_url_and_identifier(self):
+        authz = _authz('a.example.com')
+        self.assertTrue(self.index.add(ACCOUNT, 'https://a/authz/1', authz))
+        self.assertIs(
+            authz, self.index.lookup_url(ACCOUNT, 'https://a/authz/1'),
+        )
+        self.assertEqual(
+            ('https://a/authz/1', authz),
+            self.index.lookup(ACCOUNT, DnsName('A.example.com')),
+        )
+        self.assertIsNone(self.index.lookup(ACCOUNT, DnsName('b.example.com')))
+        # Authorizations belong to the account that holds them.
+        self.assertIsNone(
+            self.index.lookup_url(OTHER_ACCOUNT, 'https://a/authz/1'),
+        )
+        self.assertIsNone(
+            self.index.lookup(OTHER_ACCOUNT, DnsName('a.example.com')),
+        )
+
+    def test_wildcards_match_only_wildcard_identifiers(self):
+        plain = _authz('example.com')
+        wildcard = _authz('example.com', wildcard=True)
+        self.index.add(ACCOUNT, 'https://a/authz/1', plain)
+        self.index.add(ACCOUNT, 'https://a/authz/2', wildcard)
+        self.assertEqual(
+            ('https://a/authz/1', plain),
+            self.index.lookup(ACCOUNT, DnsName('example.com')),
+        )
+        self.assertEqual(
+            ('https://a/authz/2', wildcard),
+            self.index.lookup(ACCOUNT, DnsName('*.example.com')),
+        )
+
+    def test_only_valid_unexpired_authorizations_are_kept(self):
+        self.assertFalse(self.index.add(
+            ACCOUNT, 'https://a/authz/1', _authz('a.example.com', 'pending'),
+        ))
+        # Expiring within the margin.
+        self.assertFalse(self.index.add(
+            ACCOUNT, 'https://a/authz/2',
+            _authz('a.example.com', expires=NOW + 1800),
+        ))
+        self.assertEqual(0, len(self.index))
+
+    def test_evicted_a_margin_before_expiry(self):
+        self.index.add(
+            ACCOUNT, 'https://a/authz/1',
+            _authz('a.example.com', expires=NOW + 7200),
+        )
+        self.now = NOW + 3599
+        self.assertEqual(1, len(self.index))
+        self.now = NOW + 3600
+        self.assertIsNone(self.index.lookup_url(ACCOUNT, 'https://a/authz/1'))
+        self.assertIsNone(self.index.lookup(ACCOUNT, DnsName('a.example.com')))
+        self.assertEqual(0, len(self.index))
+
+    def test_longer_lasting_authorization_wins(self):
+        short = _authz('a.example.com', expires=NOW + 7200)
+        long = _authz('a.example.com', expires=NOW + 86400)
+        self.index.add(ACCOUNT, 'https://a/authz/1', long)
+        self.index.add(ACCOUNT, 'https://a/authz/2', short)
+        self.assertEqual(
+            ('https://a/authz/1', long),
+            self.index.lookup(ACCOUNT, DnsName('a.example.com')),
+        )
+        self.index.discard(ACCOUNT, 'https://a/authz/1')
+        self.assertIsNone(self.index.lookup(ACCOUNT, DnsName('a.example.com')))
+
+
+class CountingSolver(AcceptAnyHttp01):
+    def __init__(self):
+        self.provisioned = []
+
+    async def provision(self, account, authz, challenge):
+        self.provisioned.append(authz.identifier.domain_name)
+
+
+class IndexAgainstServerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.server = MockAcmeServer()
+        directory_url = self._run(self.server.start())
+        self.addCleanup(lambda: self._run(self.server.close()))
+        self.client = self._run(
+            _client.new_client(directory_url, 'aioacme-tests'),
+        )
+        self.addCleanup(lambda: self._run(self.client.close()))
+        key = josepy.JWKEC(key=ec.generate_private_key(
+            ec.SECP256R1(), default_backend(),
+        ))
+        self.account = self._run(
+            self.client.new_account(key, terms_of_service_agreed=True),
+        )
+        self.index = AuthorizationIndex()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 10))
+
+    def _issue(self, names, solver):
+        async def collect():
+            return [
+                result async for result in issuance.issue_many(
+                    self.account,
+                    [
+                        issuance.IssuanceRequest([DnsName(name)], csr=b'csr')
+                        for name in names
+                    ],
+                    solver,
+                    authz_index=self.index,
+                )
+            ]
+        results = self._run(collect())
+        for result in results:
+            self.assertTrue(result.ok, result.error)
+        return results
+
+    def test_new_order_takes_known_authorizations_from_the_index(self):
+        self._issue(['a.example.com'], CountingSolver())
+        self.assertEqual(1, len(self.index))
+        authz_fetches = self.server.requests['authz']
+
+        _, order, authorizations = self._run(self.account.new_order(
+            [DnsName('a.example.com'), DnsName('b.example.com')],
+            authz_index=self.index,
+        ))
+        # Only the new authorization is fetched.
+        self.assertEqual(authz_fetches + 1, self.server.requests['authz'])
+        self.assertEqual(
+            ['a.example.com', 'b.example.com'],
+            [authz.identifier.domain_name for _, authz in authorizations],
+        )
+        self.assertEqual(
+            [str(url) for url in order.authorization_urls],
+            [str(url) for url, _ in authorizations],
+        )
+
+    def test_issue_many_skips_solving_known_authorizations(self):
+        first = CountingSolver()
+        self._issue(['a.example.com', 'b.example.com'], first)
+        self.assertEqual(
+            ['a.example.com', 'b.example.com'], sorted(first.provisioned),
+        )
+        authz_fetches = self.server.requests['authz']
+        challenges = self.server.requests['challenge']
+
+        again = CountingSolver()
+        self._issue(['a.example.com', 'b.example.com'], again)
+        self.assertEqual([], again.provisioned)
+        self.assertEqual(challenges, self.server.requests['challenge'])
+        self.assertEqual(authz_fetches, self.server.requests['authz'])
+        self.assertEqual(4, self.server.requests['newOrder'])
@@ -0,0 +1,203 @@
+"""Tests for aioacme.certificate."""
+
+import asyncio
+import datetime
+import os
+import tempfile
+import unittest
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+import josepy
+
+from aioacme import certificate
+from aioacme import client as _client
+from aioacme import issuance
+from aioacme.identifier import DnsName
+from aioacme.testing import MockAcmeServer
+from tests.sharding_tests import AcceptAnyHttp01
+
+
+_KEY = ec.generate_private_key(ec.SECP256R1(), default_backend())
+
+
+def _name(common_name):
+    return x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+
+
+def _cert(subject, issuer) -> bytes:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(_name(subject))
+        .issuer_name(_name(issuer))
+        .public_key(_KEY.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(_KEY, hashes.SHA256(), default_backend())
+        .public_bytes(serialization.Encoding.PEM)
+    )
+
+
+def _chain(root) -> bytes:
+    return _cert('a.example.com', 'Intermediate') \
+        + _cert('Intermediate', root)
+
+
+class RealChainServer(MockAcmeServer):
+    """Serves real chains, topped by a certificate issued by "Root Default"
+    for the default chain, and "Root <n>" for alternate number n.
+    """
+
+    def certificate_chain(self, order_id, alternate):
+        return _chain(
+            'Root Default' if alternate is None else f'Root {alternate}',
+        )
+
+
+async def _chunked(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def _collect(results):
+    return [result async for result in results]
+
+
+class IterPemCertificatesTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def _split(self, data, size):
+        return self.loop.run_until_complete(_collect(
+            certificate.iter_pem_certificates(_chunked(data, size)),
+        ))
+
+    def test_splits_across_any_chunking(self):
+        certs = [_cert('a', 'b'), _cert('b', 'c'), _cert('c', 'c')]
+        data = b''.join(certs)
+        for size in (1, 7, 64, len(data)):
+            self.assertEqual(certs, self._split(data, size), size)
+
+    def test_rejects_malformed_and_truncated_chains(self):
+        cert = _cert('a', 'b')
+        with self.assertRaisesRegex(ValueError, 'Malformed'):
+            self._split(cert.replace(b'-----BEGIN CERTIFICATE-----', b''), 5)
+        with self.assertRaisesRegex(ValueError, 'Truncated'):
+            self._split(cert + cert[:40], 5)
+
+    def test_issuer_common_name(self):
+        self.assertEqual(
+            'Root 1', certificate.issuer_common_name(_cert('a', 'Root 1')),
+        )
+        self.assertIsNone(certificate.issuer_common_name(
+            b'-----BEGIN CERTIFICATE-----\nAAAA\n-----END CERTIFICATE-----\n',
+        ))
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'chain.pem')
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 10))
+
+    def _issue(self, server):
+        """Start ``server``, and issue a certificate from it; returns its
+        URL.
+        """
+        directory_url = self._run(server.start())
+        self.addCleanup(lambda: self._run(server.close()))
+        self.client = self._run(
+            _client.new_client(directory_url, 'aioacme-tests'),
+        )
+        self.addCleanup(lambda: self._run(self.client.close()))
+        key = josepy.JWKEC(key=ec.generate_private_key(
+            ec.SECP256R1(), default_backend(),
+        ))
+        account = self._run(
+            self.client.new_account(key, terms_of_service_agreed=True),
+        )
+        [result] = self._run(_collect(issuance.issue_many(
+            account,
+            [issuance.IssuanceRequest([DnsName('a.example.com')], b'csr')],
+            AcceptAnyHttp01(),
+        )))
+        self.assertTrue(result.ok, result.error)
+        return str(result.order.certificate_url)
+
+    def _saved_root(self):
+        """The issuer of the topmost certificate saved to ``path``."""
+        with open(self.path, 'rb') as chain_file:
+            certs = self._run(_collect(certificate.iter_pem_certificates(
+                _chunked(chain_file.read(), 1024),
+            )))
+        return certificate.issuer_common_name(certs[-1])
+
+    def test_stream_lists_alternates(self):
+        url = self._issue(RealChainServer(alternate_chains=2))
+
+        async def stream():
+            async with self.client.open_certificate(url) as stream:
+                certs = await _collect(stream.iter_certificates())
+                return stream.alternate_urls, certs
+
+        alternate_urls, certs = self._run(stream())
+        self.assertEqual([f'{url}/0', f'{url}/1'], alternate_urls)
+        self.assertEqual(2, len(certs))
+        self.assertEqual(
+            'Root Default', certificate.issuer_common_name(certs[-1]),
+        )
+
+    def test_download_default_chain(self):
+        url = self._issue(RealChainServer(alternate_chains=2))
+        self.assertEqual(
+            url, self._run(self.client.download_certificate(url, self.path)),
+        )
+        self.assertEqual('Root Default', self._saved_root())
+        self.assertEqual(['chain.pem'], os.listdir(self.directory))
+
+    def test_download_preferred_issuer(self):
+        server = RealChainServer(alternate_chains=2)
+        url = self._issue(server)
+        self.assertEqual(
+            f'{url}/1',
+            self._run(self.client.download_certificate(
+                url, self.path, preferred_issuer='Root 1',
+            )),
+        )
+        self.assertEqual('Root 1', self._saved_root())
+        self.assertEqual(['chain.pem'], os.listdir(self.directory))
+        # Each chain was fetched, after issue_many's own download.
+        self.assertEqual(4, server.requests['certificate'])
+
+        # With no match, the default chain.
+        self.assertEqual(
+            url,
+            self._run(self.client.download_certificate(
+                url, self.path, preferred_issuer='Root 9',
+            )),
+        )
+        self.assertEqual('Root Default', self._saved_root())
+
+    def test_preferred_issuer_among_unparseable_chains(self):
+        url = self._issue(MockAcmeServer(alternate_chains=1))
+        self.assertEqual(
+            url,
+            self._run(self.client.download_certificate(
+                url, self.path, preferred_issuer='Root 0',
+            )),
+        )
+        self.assertEqual(['chain.pem'], os.listdir(self.directory))
@@ -0,0 +1,130 @@
+"""Tests for aioacme.client."""
+
+import asyncio
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+import josepy
+
+from aioacme import client as _client
+from aioacme import metrics
+from aioacme import problem
+from aioacme import ratelimit
+from aioacme.identifier import DnsName
+from aioacme.testing import MockAcmeServer
+
+
+class GetCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # Cleanups run last first, so the loop outlives the rest.
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.server = MockAcmeServer()
+        directory_url = self._run(self.server.start())
+        self.addCleanup(lambda: self._run(self.server.close()))
+        self.client = self._run(_client.new_client(
+            directory_url, 'aioacme-tests', get_cache_ttl=60.0,
+        ))
+        self.addCleanup(lambda: self._run(self.client.close()))
+        key = josepy.JWKEC(key=ec.generate_private_key(
+            ec.SECP256R1(), default_backend(),
+        ))
+        self.account = self._run(
+            self.client.new_account(key, terms_of_service_agreed=True),
+        )
+        self.order_url, _ = self._run(
+            self.account.new_order_only([DnsName('a.example.com')]),
+        )
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def _fetch_order(self):
+        self._run(self.client.fetch_order(self.order_url))
+        return self.server.requests['order']
+
+    def test_post_invalidates_cached_get(self):
+        self.assertEqual(1, self._fetch_order())
+        self.assertEqual(1, self._fetch_order())
+        self._run(self.account._post_with_key_id(str(self.order_url), b''))
+        self.assertEqual(2, self.server.requests['order'])
+        self.assertEqual(3, self._fetch_order())
+        self.assertEqual(3, self._fetch_order())
+
+    def test_failed_finalize_invalidates_cached_order(self):
+        self.assertEqual(1, self._fetch_order())
+        order = self._run(self.client.fetch_order(self.order_url))
+        with self.assertRaises(problem.Problem) as caught:
+            self._run(self.account.finalize_order(
+                order.finalize_url, b'csr', order_url=self.order_url,
+            ))
+        self.assertEqual(
+            'urn:ietf:params:acme:error:orderNotReady', caught.exception.type,
+        )
+        self.assertEqual(2, self._fetch_order())
+
+    def test_challenge_response_invalidates_cached_authorization(self):
+        order = self._run(self.client.fetch_order(self.order_url))
+        authz_url = order.authorization_urls[0]
+        authz = self._run(self.client.fetch_authorization(authz_url))
+        self._run(self.client.fetch_authorization(authz_url))
+        self.assertEqual(1, self.server.requests['authz'])
+        self._run(self.account.respond_to_challenge(authz.challenges[0]))
+        self._run(self.client.fetch_authorization(authz_url))
+        self.assertEqual(2, self.server.requests['authz'])
+
+
+class RecordingTracer(metrics.Tracer):
+    def __init__(self):
+        self.spans = []
+
+    def on_span(self, span):
+        self.spans.append(span)
+
+
+class RateLimitWaitTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.server = MockAcmeServer()
+        directory_url = self._run(self.server.start())
+        self.addCleanup(lambda: self._run(self.server.close()))
+        # One POST at once, then one every 0.1s.
+        self.client = self._run(_client.new_client(
+            directory_url, 'aioacme-tests',
+            rate_limits=ratelimit.RateLimits(post=(10.0, 1)),
+        ))
+        self.addCleanup(lambda: self._run(self.client.close()))
+        self.tracer = RecordingTracer()
+        self.client.add_tracer(self.tracer)
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def test_span_records_time_held_back_by_the_rate_limiter(self):
+        key = josepy.JWKEC(key=ec.generate_private_key(
+            ec.SECP256R1(), default_backend(),
+        ))
+        account = self._run(
+            self.client.new_account(key, terms_of_service_agreed=True),
+        )
+        self._run(account.new_order_only([DnsName('a.example.com')]))
+        waits = {
+            span.kind: span.rate_limit_wait for span in self.tracer.spans
+            if span.method == 'POST'
+        }
+        self.assertLess(waits['newAccount'], 0.05)
+        self.assertGreater(waits['newOrder'], 0.05)
+        # Unsigned requests never wait on the limiter.
+        self.assertEqual(
+            {None},
+            {
+                span.rate_limit_wait for span in self.tracer.spans
+                if span.method != 'POST'
+            },
+        )
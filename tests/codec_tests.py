@@ -0,0 +1,42 @@
+"""Tests for aioacme.codec."""
+
+import unittest
+
+from aioacme import codec
+
+
+def _available_codecs():
+    codecs = [codec.StdlibCodec()]
+    for codec_type in (codec.OrjsonCodec, codec.UjsonCodec):
+        try:
+            codecs.append(codec_type())
+        except ImportError:
+            pass
+    return codecs
+
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        obj = {
+            'identifiers': [{'type': 'dns', 'value': 'bücher.example'}],
+            'url': 'https://acme.example/new-order',
+            'count': 3,
+            'onlyReturnExisting': True,
+            'detail': None,
+        }
+        for json_codec in _available_codecs():
+            with self.subTest(codec=json_codec.name):
+                data = json_codec.dumps(obj)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(obj, json_codec.loads(data))
+
+    def test_loads_utf8(self):
+        for json_codec in _available_codecs():
+            with self.subTest(codec=json_codec.name):
+                self.assertEqual(
+                    {'value': 'bücher'},
+                    json_codec.loads('{"value":"bücher"}'.encode('utf-8')),
+                )
+
+    def test_default_codec(self):
+        self.assertIsInstance(codec.default_codec(), codec.JsonCodec)
@@ -0,0 +1,165 @@
+"""Tests for aioacme.csr."""
+
+import asyncio
+import concurrent.futures
+import threading
+import unittest
+from unittest import mock
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.x509.oid import NameOID
+
+from aioacme import csr
+from aioacme.identifier import DnsName, UnknownIdentifier
+
+
+def _ec_pool(executor, **kwargs):
+    return csr.PrivateKeyPool(
+        executor, key_type='ec', key_size=256, **kwargs,
+    )
+
+
+class PrivateKeyPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(asyncio.wait_for(coro, 10))
+        finally:
+            loop.close()
+
+    def test_made_outside_a_loop_and_used_in_several(self):
+        pool = _ec_pool(self.executor, depth=3)
+        self.assertEqual(0, len(pool))
+
+        async def test():
+            key = await pool.get()
+            while len(pool) < 3:
+                await asyncio.sleep(0.01)
+            return key
+
+        key = self._run(test())
+        self.assertEqual('secp256r1', key.curve.name)
+        # Keys already generated can be taken from another loop.
+        self.assertEqual('secp256r1', self._run(pool.get()).curve.name)
+
+    def test_waiters_are_served_in_order(self):
+        pool = _ec_pool(self.executor, depth=1)
+
+        async def test():
+            done = []
+            tasks = [asyncio.ensure_future(pool.get()) for _ in range(4)]
+            for idx, task in enumerate(tasks):
+                task.add_done_callback(lambda _, idx=idx: done.append(idx))
+            keys = await asyncio.gather(*tasks)
+            await pool.close()
+            return done, keys
+
+        done, keys = self._run(test())
+        self.assertEqual([0, 1, 2, 3], done)
+        self.assertEqual(4, len({id(key) for key in keys}))
+
+    def test_generation_errors_reach_waiters(self):
+        pool = csr.PrivateKeyPool(self.executor, key_type='dsa', depth=1)
+
+        async def test():
+            with self.assertRaisesRegex(ValueError, 'Unsupported key'):
+                await pool.get()
+
+        self._run(test())
+
+    def test_close_fails_waiters_and_shuts_down_owned_executor(self):
+        release = threading.Event()
+
+        def blocked(key_type, key_size):
+            release.wait(5)
+            return csr.generate_private_key_der('ec', 256)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        pool = _ec_pool(executor, depth=1, executor_is_owned=True)
+
+        async def test():
+            waiter = asyncio.ensure_future(pool.get())
+            await asyncio.sleep(0)
+            release.set()
+            await pool.close()
+            with self.assertRaisesRegex(RuntimeError, 'closed'):
+                await waiter
+
+        with mock.patch.object(csr, 'generate_private_key_der', blocked):
+            self._run(test())
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+
+class BuildCsrTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = serialization.load_der_private_key(
+            csr.generate_private_key_der('ec', 256), None, default_backend(),
+        )
+
+    def _load(self, der):
+        request = x509.load_der_x509_csr(der, default_backend())
+        self.assertTrue(request.is_signature_valid)
+        names = request.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName,
+        ).value.get_values_for_type(x509.DNSName)
+        common_names = [
+            attribute.value for attribute in
+            request.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+        ]
+        return names, common_names
+
+    def test_names(self):
+        names, common_names = self._load(csr.build_csr(
+            [DnsName('a.example.com'), DnsName('*.b.example.com')],
+            self.key,
+        ))
+        self.assertEqual(['a.example.com', '*.b.example.com'], names)
+        self.assertEqual(['a.example.com'], common_names)
+
+    def test_long_first_name_is_not_the_common_name(self):
+        long_name = 'x' * 60 + '.example.com'
+        names, common_names = self._load(
+            csr.build_csr([DnsName(long_name)], self.key),
+        )
+        self.assertEqual([long_name], names)
+        self.assertEqual([], common_names)
+
+    def test_rejects_unusable_identifiers(self):
+        with self.assertRaises(ValueError):
+            csr.build_csr([], self.key)
+        with self.assertRaises(ValueError):
+            csr.build_csr([UnknownIdentifier('ip', '192.0.2.1')], self.key)
+
+    def test_csr_builder_pairs_key_and_csr(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        builder = csr.CsrBuilder(
+            _ec_pool(executor, depth=1, executor_is_owned=True),
+        )
+
+        async def test():
+            try:
+                return await builder.build([DnsName('a.example.com')])
+            finally:
+                await builder.key_pool.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            key_pem, csr_der = loop.run_until_complete(test())
+        finally:
+            loop.close()
+        key = serialization.load_pem_private_key(
+            key_pem, None, default_backend(),
+        )
+        request = x509.load_der_x509_csr(csr_der, default_backend())
+        self.assertEqual(
+            key.public_key().public_numbers(),
+            request.public_key().public_numbers(),
+        )
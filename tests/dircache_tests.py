@@ -0,0 +1,58 @@
+"""Tests for aioacme.dircache."""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from aioacme import dircache
+
+
+DIRECTORY_URL = 'https://acme.example/directory'
+DIRECTORY_JSON = {
+    'keyChange': 'https://acme.example/key-change',
+    'newAccount': 'https://acme.example/new-account',
+    'newNonce': 'https://acme.example/new-nonce',
+    'newOrder': 'https://acme.example/new-order',
+    'revokeCert': 'https://acme.example/revoke-cert',
+}
+
+
+class DirectoryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'directories.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_file_is_empty(self):
+        cache = dircache.DirectoryCache(self.path)
+        self.assertIsNone(cache.load(DIRECTORY_URL))
+
+    def test_store_and_load(self):
+        dircache.DirectoryCache(self.path).store(DIRECTORY_URL, DIRECTORY_JSON)
+        # A new cache object, as a new process would have.
+        cache = dircache.DirectoryCache(self.path)
+        self.assertEqual((DIRECTORY_JSON, True), cache.load(DIRECTORY_URL))
+        self.assertIsNone(cache.load('https://other.example/directory'))
+
+    def test_stale_entries_are_flagged(self):
+        cache = dircache.DirectoryCache(self.path, ttl=60)
+        cache.store(DIRECTORY_URL, DIRECTORY_JSON)
+        later = time.time() + 120
+        with mock.patch.object(dircache.time, 'time', return_value=later):
+            self.assertEqual((DIRECTORY_JSON, False), cache.load(DIRECTORY_URL))
+
+    def test_invalidate(self):
+        cache = dircache.DirectoryCache(self.path)
+        cache.store(DIRECTORY_URL, DIRECTORY_JSON)
+        cache.invalidate(DIRECTORY_URL)
+        self.assertIsNone(cache.load(DIRECTORY_URL))
+
+    def test_corrupt_file_is_empty(self):
+        with open(self.path, 'w') as cache_file:
+            cache_file.write('{not json')
+        cache = dircache.DirectoryCache(self.path)
+        self.assertIsNone(cache.load(DIRECTORY_URL))
@@ -0,0 +1,124 @@
+"""Tests for aioacme.dns01."""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from aioacme import authorization
+from aioacme import dns01
+
+
+def _authz(name):
+    return authorization.authorization_from_json({
+        'identifier': {'type': 'dns', 'value': name},
+        'status': 'pending',
+        'challenges': [{
+            'type': 'dns-01',
+            'url': f'https://acme.example/chall/{name}',
+            'status': 'pending',
+            'token': f'token-{name}',
+        }],
+    })
+
+
+class _FakeAccount:
+    def key_authorization(self, token):
+        return f'{token}.thumbprint'
+
+
+class Dns01SolverTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def test_batch_costs_one_call_per_zone_and_one_wait(self):
+        provider = dns01.MemoryDnsProvider(
+            zones=('example.com', 'example.org'),
+        )
+        solver = dns01.Dns01Solver(provider, batch_window=0.01)
+        account = _FakeAccount()
+        names = [
+            'a.example.com', 'b.example.com', '*.c.example.com',
+            'a.example.org', 'b.example.org',
+        ]
+        authzs = [_authz(name) for name in names]
+
+        async def solve_all(method):
+            await asyncio.gather(*(
+                method(account, authz, solver.select(authz))
+                for authz in authzs
+            ))
+
+        self._run(solve_all(solver.provision))
+        self.assertEqual(
+            [('add', 'example.com', 3), ('add', 'example.org', 2)],
+            sorted(provider.calls),
+        )
+        self.assertEqual(1, provider.propagation_waits)
+        self.assertEqual(
+            {dns01.txt_record_value('token-*.c.example.com.thumbprint')},
+            provider.txt_values('_acme-challenge.c.example.com'),
+        )
+
+        self._run(solve_all(solver.cleanup))
+        self.assertEqual(
+            [('remove', 'example.com', 3), ('remove', 'example.org', 2)],
+            sorted(provider.calls[2:]),
+        )
+        self.assertEqual(1, provider.propagation_waits)
+        self.assertEqual({}, dict(provider.records))
+
+    def test_provider_errors_reach_every_caller(self):
+        class FailingProvider(dns01.MemoryDnsProvider):
+            async def add_records(self, zone, records):
+                raise RuntimeError('API down')
+
+        solver = dns01.Dns01Solver(FailingProvider(), batch_window=0.01)
+        authzs = [_authz('a.example.com'), _authz('b.example.com')]
+
+        async def provision_all():
+            return await asyncio.gather(
+                *(
+                    solver.provision(
+                        _FakeAccount(), authz, solver.select(authz),
+                    )
+                    for authz in authzs
+                ),
+                return_exceptions=True,
+            )
+
+        for result in self._run(provision_all()):
+            self.assertIsInstance(result, RuntimeError)
+
+
+class MemoryDnsProviderTest(unittest.TestCase):
+    def test_records_are_shared_through_the_file(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'records.json')
+            provider = dns01.MemoryDnsProvider(path)
+            record = dns01.TxtRecord('_acme-challenge.a.example.com', 'v')
+            loop.run_until_complete(
+                provider.add_records('example.com', [record]),
+            )
+            self.assertEqual(
+                {'v'},
+                dns01.MemoryDnsProvider(path).txt_values(record.name),
+            )
+            loop.run_until_complete(
+                provider.remove_records('example.com', [record]),
+            )
+            self.assertEqual(
+                set(),
+                dns01.MemoryDnsProvider(path).txt_values(record.name),
+            )
+            self.assertEqual(['records.json'], os.listdir(directory))
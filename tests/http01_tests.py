@@ -0,0 +1,101 @@
+"""Tests for aioacme.http01."""
+
+import asyncio
+import unittest
+
+import aiohttp
+
+from aioacme import http01
+from aioacme.authorization import AuthorizationStatus
+
+
+class _WatchedClient:
+    """Answers ``wait_for`` once ``settle`` is called, or with ``error``."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.settled = asyncio.Event()
+        self.waited_for = []
+
+    async def wait_for(self, url, *statuses):
+        self.waited_for.append((url, statuses))
+        if self.error is not None:
+            raise self.error
+        await self.settled.wait()
+
+
+class Http01ResponderTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.responder = http01.Http01Responder()
+        self._run(self.responder.start('127.0.0.1', 0))
+        self.addCleanup(lambda: self._run(self.responder.close()))
+        port = self.responder._runner.addresses[0][1]
+        self.base_url = f'http://127.0.0.1:{port}'
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def _fetch(self, token):
+        async def fetch():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(
+                        self.base_url + http01.CHALLENGE_PATH_PREFIX + token,
+                ) as response:
+                    return response.status, await response.read()
+        return self._run(fetch())
+
+    def test_serves_registered_tokens(self):
+        self.responder.register('token1', 'token1.thumbprint')
+        self.assertEqual((200, b'token1.thumbprint'), self._fetch('token1'))
+        self.assertEqual(404, self._fetch('token2')[0])
+
+    def test_register_and_remove_many(self):
+        self.responder.register_many(
+            (f'token{i}', f'token{i}.thumbprint') for i in range(100)
+        )
+        self.assertEqual(100, len(self.responder))
+        self.assertEqual((200, b'token42.thumbprint'), self._fetch('token42'))
+        self.responder.remove_many(f'token{i}' for i in range(0, 100, 2))
+        self.assertEqual(50, len(self.responder))
+        self.assertNotIn('token42', self.responder)
+        self.assertIn('token43', self.responder)
+        self.assertEqual(404, self._fetch('token42')[0])
+
+    def test_register_until_settled(self):
+        client = _WatchedClient()
+        self.responder.register_until_settled(
+            client, 'https://acme.example/authz/1', 'token1', 'token1.t',
+        )
+        self.assertEqual((200, b'token1.t'), self._fetch('token1'))
+        url, statuses = client.waited_for[0]
+        self.assertEqual('https://acme.example/authz/1', url)
+        self.assertNotIn(AuthorizationStatus.PENDING, statuses)
+        self.assertIn(AuthorizationStatus.VALID, statuses)
+
+        client.settled.set()
+        self._run(asyncio.sleep(0.01))
+        self.assertNotIn('token1', self.responder)
+        self.assertEqual(404, self._fetch('token1')[0])
+
+    def test_failed_watch_is_logged_and_removes_the_token(self):
+        client = _WatchedClient(error=RuntimeError('poll failed'))
+        with self.assertLogs('aioacme.http01', 'WARNING'):
+            self.responder.register_until_settled(
+                client, 'https://acme.example/authz/1', 'token1', 'token1.t',
+            )
+            self._run(asyncio.sleep(0.01))
+        self.assertNotIn('token1', self.responder)
+
+    def test_close_stops_watches(self):
+        client = _WatchedClient()
+        self.responder.register_until_settled(
+            client, 'https://acme.example/authz/1', 'token1', 'token1.t',
+        )
+        self._run(asyncio.sleep(0))
+        self._run(self.responder.close())
+        self.assertNotIn('token1', self.responder)
+        self.assertEqual(0, len(self.responder._watches))
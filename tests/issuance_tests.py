@@ -0,0 +1,279 @@
+"""Tests for aioacme.issuance."""
+
+import asyncio
+import collections
+import unittest
+
+from yarl import URL
+
+from aioacme import authorization
+from aioacme import issuance
+from aioacme.authorization import AuthorizationStatus
+from aioacme.errors import IssuanceError
+from aioacme.identifier import DnsName
+from aioacme.order import Order, OrderStatus
+
+
+def order_json(name, status, order_id):
+    json_ = {
+        'status': status,
+        'identifiers': [{'type': 'dns', 'value': name}],
+        'authorizations': [f'https://acme.example/authz/{order_id}'],
+        'finalize': f'https://acme.example/order/{order_id}/finalize',
+    }
+    if status == 'valid':
+        json_['certificate'] = f'https://acme.example/cert/{order_id}'
+    return json_
+
+
+def authz_json(name, status, order_id):
+    return {
+        'identifier': {'type': 'dns', 'value': name},
+        'status': status,
+        'challenges': [{
+            'type': 'http-01',
+            'url': f'https://acme.example/chall/{order_id}',
+            'status': 'pending',
+            'token': f'token-{order_id}',
+        }],
+    }
+
+
+class FakeClient:
+    def __init__(self, account):
+        self.account = account
+
+    async def fetch_order(self, order_url):
+        self.account.calls['fetch_order'] += 1
+        return self.account.order(str(order_url))
+
+    async def wait_for(self, url, status):
+        await asyncio.sleep(0)
+        url = str(url)
+        if '/authz/' in url:
+            order_id = url.rsplit('/', 1)[1]
+            return authorization.authorization_from_json(authz_json(
+                self.account.names[order_id], 'valid', order_id,
+            ))
+        return self.account.order(url)
+
+    async def get(self, url, kind=None):
+        self.account.calls['download'] += 1
+        await self.account.stage_hook('download', str(url))
+        return f'certificate for {url}'.encode('ascii')
+
+
+class FakeAccount:
+    """Stands in for ``account.Account`` and its client, keeping orders in
+    memory. New orders start out pending.
+    """
+
+    account_href = 'https://acme.example/acct/1'
+
+    def __init__(self, fail_names=()):
+        self.client = FakeClient(self)
+        self.fail_names = set(fail_names)
+        self.calls = collections.Counter()
+        self.names = {}
+        self.statuses = {}
+        self.challenges = []
+        self._ids = iter(range(1, 1000000))
+
+    def order(self, order_url: str) -> Order:
+        order_id = order_url.rsplit('/', 1)[1]
+        return Order.from_json(order_json(
+            self.names[order_id], self.statuses[order_id], order_id,
+        ))
+
+    async def stage_hook(self, stage, url):
+        pass
+
+    async def new_order_only(self, identifiers):
+        self.calls['new_order'] += 1
+        name = identifiers[0].domain_name
+        await self.stage_hook('new_order', name)
+        if name in self.fail_names:
+            raise ValueError(f'cannot order {name}')
+        order_id = str(next(self._ids))
+        self.names[order_id] = name
+        self.statuses[order_id] = 'pending'
+        order_url = f'https://acme.example/order/{order_id}'
+        return URL(order_url), self.order(order_url)
+
+    async def fetch_authorizations(self, authz_urls):
+        return [
+            (url, authorization.authorization_from_json(authz_json(
+                self.names[str(url).rsplit('/', 1)[1]], 'pending',
+                str(url).rsplit('/', 1)[1],
+            )))
+            for url in authz_urls
+        ]
+
+    async def respond_to_challenge(self, challenge):
+        self.challenges.append(str(challenge.url))
+        order_id = str(challenge.url).rsplit('/', 1)[1]
+        self.statuses[order_id] = 'ready'
+
+    async def finalize_order(self, finalize_url, csr, order_url=None):
+        self.calls['finalize'] += 1
+        await self.stage_hook('finalize', str(finalize_url))
+        order_id = str(finalize_url).split('/')[-2]
+        self.statuses[order_id] = 'valid'
+        return self.order(f'https://acme.example/order/{order_id}')
+
+
+class AcceptingSolver(issuance.ChallengeSolver):
+    def __init__(self):
+        self.provisioned = []
+        self.cleaned_up = []
+
+    def select(self, authz):
+        return authz.challenges[0]
+
+    async def provision(self, account, authz, challenge):
+        self.provisioned.append(authz.identifier.domain_name)
+
+    async def cleanup(self, account, authz, challenge):
+        self.cleaned_up.append(authz.identifier.domain_name)
+
+
+def request(name):
+    return issuance.IssuanceRequest([DnsName(name)], csr=b'csr', tag=name)
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+class IssueManyTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def test_issues_every_request(self):
+        account = FakeAccount()
+        solver = AcceptingSolver()
+        names = [f'host{i}.example.com' for i in range(25)]
+        results = self._run(collect(issuance.issue_many(
+            account, [request(name) for name in names], solver,
+            concurrency=3,
+        )))
+        self.assertEqual(sorted(names), sorted(r.request.tag for r in results))
+        for result in results:
+            self.assertTrue(result.ok, result.error)
+            self.assertIs(OrderStatus.VALID, result.order.status)
+            self.assertEqual(
+                f'certificate for {result.order.certificate_url}'.encode(),
+                result.certificate,
+            )
+        self.assertEqual(sorted(names), sorted(solver.provisioned))
+        self.assertEqual(sorted(names), sorted(solver.cleaned_up))
+
+    def test_results_come_in_completion_order(self):
+        account = FakeAccount()
+        delays = {'slow.example.com': 0.1, 'fast.example.com': 0.0}
+
+        async def stage_hook(stage, value):
+            if stage == 'new_order':
+                await asyncio.sleep(delays[value])
+
+        account.stage_hook = stage_hook
+        results = self._run(collect(issuance.issue_many(
+            account,
+            [request('slow.example.com'), request('fast.example.com')],
+            AcceptingSolver(),
+        )))
+        self.assertEqual(
+            ['fast.example.com', 'slow.example.com'],
+            [result.request.tag for result in results],
+        )
+
+    def test_stages_respect_concurrency(self):
+        account = FakeAccount()
+        active = collections.Counter()
+        peak = collections.Counter()
+
+        async def stage_hook(stage, value):
+            active[stage] += 1
+            peak[stage] = max(peak[stage], active[stage])
+            await asyncio.sleep(0.01)
+            active[stage] -= 1
+
+        account.stage_hook = stage_hook
+        results = self._run(collect(issuance.issue_many(
+            account,
+            [request(f'host{i}.example.com') for i in range(20)],
+            AcceptingSolver(),
+            concurrency=4,
+        )))
+        self.assertEqual(20, len(results))
+        for stage in ('new_order', 'finalize', 'download'):
+            self.assertEqual(4, peak[stage], stage)
+
+    def test_errors_are_results(self):
+        account = FakeAccount(fail_names={'bad.example.com'})
+        results = self._run(collect(issuance.issue_many(
+            account,
+            [
+                request('good.example.com'),
+                request('bad.example.com'),
+                issuance.IssuanceRequest([DnsName('nocsr.example.com')]),
+            ],
+            AcceptingSolver(),
+        )))
+        by_name = {
+            result.request.identifiers[0].domain_name: result
+            for result in results
+        }
+        self.assertTrue(by_name['good.example.com'].ok)
+        self.assertIsInstance(by_name['bad.example.com'].error, ValueError)
+        self.assertIsNone(by_name['bad.example.com'].certificate)
+        self.assertIsInstance(
+            by_name['nocsr.example.com'].error, IssuanceError,
+        )
+
+    def test_error_from_requests_is_raised(self):
+        async def requests():
+            yield request('a.example.com')
+            yield request('b.example.com')
+            raise RuntimeError('inventory went away')
+
+        results = []
+
+        async def test():
+            async for result in issuance.issue_many(
+                    FakeAccount(), requests(), AcceptingSolver(),
+            ):
+                results.append(result)
+
+        with self.assertRaisesRegex(RuntimeError, 'inventory went away'):
+            self._run(test())
+        self.assertEqual(2, len(results))
+        self.assertTrue(all(result.ok for result in results))
+
+    def test_authorization_in_a_final_status_fails_the_order(self):
+        account = FakeAccount()
+
+        async def fetch_authorizations(authz_urls):
+            return [
+                (url, authorization.authorization_from_json(authz_json(
+                    'a.example.com', 'invalid', '1',
+                )))
+                for url in authz_urls
+            ]
+
+        account.fetch_authorizations = fetch_authorizations
+        results = self._run(collect(issuance.issue_many(
+            account, [request('a.example.com')], AcceptingSolver(),
+        )))
+        self.assertIsInstance(results[0].error, IssuanceError)
+        self.assertIn(
+            repr(AuthorizationStatus.INVALID), str(results[0].error),
+        )
@@ -0,0 +1,83 @@
+"""Tests for aioacme.metrics."""
+
+import unittest
+
+from aioacme import metrics
+
+
+class HistogramTest(unittest.TestCase):
+    def test_observe(self):
+        hist = metrics.Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            hist.observe(value)
+        self.assertEqual(4, hist.count)
+        self.assertAlmostEqual(2.65, hist.sum)
+        self.assertEqual(
+            [(0.1, 2), (1.0, 3), (float('inf'), 4)],
+            hist.cumulative(),
+        )
+        self.assertEqual(0.1, hist.quantile(0.5))
+        self.assertEqual(float('inf'), hist.quantile(0.99))
+        self.assertIsNone(metrics.Histogram().quantile(0.5))
+
+
+class MetricsTest(unittest.TestCase):
+    def _metrics(self):
+        recorded = metrics.Metrics(buckets=(0.1, 1.0))
+        recorded.on_span(metrics.Span(
+            kind='newOrder',
+            method='POST',
+            url='https://acme.example/new-order',
+            status=201,
+            request_bytes=300,
+            response_bytes=400,
+            duration=0.05,
+            sign_time=0.002,
+            nonce_wait=0.0,
+            rate_limit_wait=0.25,
+            nonce_source=metrics.NONCE_FROM_POOL,
+        ))
+        recorded.on_span(metrics.Span(
+            kind='newNonce',
+            method='HEAD',
+            url='https://acme.example/new-nonce',
+            status=200,
+            duration=0.5,
+        ))
+        return recorded
+
+    def test_snapshot(self):
+        snapshot = self._metrics().snapshot()
+        self.assertEqual(
+            {'newNonce 200': 1, 'newOrder 201': 1},
+            snapshot['requests'],
+        )
+        self.assertEqual({'pool': 1}, snapshot['nonce_sources'])
+        self.assertEqual(300, snapshot['request_bytes']['newOrder'])
+        self.assertEqual(1, snapshot['latency']['newNonce']['count'])
+        self.assertEqual(1, snapshot['sign_time']['count'])
+        self.assertEqual(1, snapshot['rate_limit_wait']['count'])
+        self.assertEqual(1.0, snapshot['rate_limit_wait']['p50'])
+
+    def test_to_prometheus(self):
+        text = self._metrics().to_prometheus()
+        self.assertIn('# TYPE aioacme_requests_total counter\n', text)
+        self.assertIn(
+            'aioacme_requests_total{kind="newOrder",status="201"} 1\n', text,
+        )
+        self.assertIn(
+            'aioacme_request_duration_seconds_bucket'
+            '{kind="newNonce",le="+Inf"} 1\n',
+            text,
+        )
+        self.assertIn(
+            'aioacme_request_duration_seconds_bucket'
+            '{kind="newNonce",le="0.1"} 0\n',
+            text,
+        )
+        self.assertIn('aioacme_nonces_total{source="pool"} 1\n', text)
+        self.assertIn(
+            'aioacme_rate_limit_wait_seconds_bucket{le="0.1"} 0\n', text,
+        )
+        self.assertIn('aioacme_rate_limit_wait_seconds_sum 0.25\n', text)
+        self.assertTrue(text.endswith('\n'))
@@ -0,0 +1,121 @@
+"""Tests for aioacme.nonce."""
+
+import asyncio
+import unittest
+
+from aioacme import nonce
+
+
+class NoncePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.fetches = 0
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def _fetch_nonce(self):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return f'fetched-{self.fetches}'
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_put_then_get(self):
+        async def test():
+            pool = nonce.NoncePool(self._fetch_nonce, target_depth=0)
+            pool.put('a')
+            pool.put(None)
+            pool.put('b')
+            self.assertEqual(2, len(pool))
+            self.assertEqual('a', await pool.get())
+            self.assertEqual('b', await pool.get())
+            await pool.close()
+            self.assertEqual(0, self.fetches)
+
+        self._run(test())
+
+    def test_concurrent_gets_share_one_fetcher(self):
+        async def test():
+            pool = nonce.NoncePool(self._fetch_nonce, target_depth=0)
+            nonces = await asyncio.gather(*(pool.get() for _ in range(5)))
+            self.assertEqual(5, len(set(nonces)))
+            self.assertEqual(5, self.fetches)
+            await pool.close()
+
+        self._run(test())
+
+    def test_get_with_source(self):
+        async def test():
+            pool = nonce.NoncePool(self._fetch_nonce, target_depth=0)
+            pool.put('a')
+            # Both callers see a non-empty pool, but only one gets 'a'.
+            results = await asyncio.gather(
+                pool.get_with_source(), pool.get_with_source(),
+            )
+            self.assertEqual([('a', True), ('fetched-1', False)], results)
+            await pool.close()
+
+        self._run(test())
+
+    def test_prefetches_to_target_depth(self):
+        async def test():
+            pool = nonce.NoncePool(self._fetch_nonce, target_depth=3)
+            pool.put('a')
+            self.assertEqual('a', await pool.get())
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertEqual(3, len(pool))
+            await pool.close()
+
+        self._run(test())
+
+    def test_expires_old_nonces(self):
+        async def test():
+            pool = nonce.NoncePool(
+                self._fetch_nonce,
+                target_depth=0,
+                max_age=0.0,
+            )
+            pool.put('stale')
+            await asyncio.sleep(0.01)
+            self.assertEqual('fetched-1', await pool.get())
+            await pool.close()
+
+        self._run(test())
+
+    def test_fetch_error_reaches_waiters(self):
+        async def failing_fetch():
+            raise OSError('no route to host')
+
+        async def test():
+            pool = nonce.NoncePool(failing_fetch, target_depth=0)
+            with self.assertRaises(OSError):
+                await pool.get()
+            await pool.close()
+
+        self._run(test())
+
+    def test_made_outside_a_loop_and_used_in_several(self):
+        pool = nonce.NoncePool(self._fetch_nonce, target_depth=1)
+
+        async def test():
+            nonce_ = await pool.get()
+            # Let the prefetch refill the pool.
+            await asyncio.sleep(0.01)
+            return nonce_
+
+        self.assertEqual('fetched-1', self._run(test()))
+        self.assertEqual(1, len(pool))
+        other_loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual('fetched-2', other_loop.run_until_complete(
+                pool.get(),
+            ))
+            self.assertEqual('fetched-3', other_loop.run_until_complete(
+                pool.get(),
+            ))
+            other_loop.run_until_complete(pool.close())
+        finally:
+            other_loop.close()
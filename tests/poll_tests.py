@@ -0,0 +1,155 @@
+"""Tests for aioacme.poll."""
+
+import asyncio
+import collections
+import unittest
+
+import aiohttp
+
+from aioacme import poll
+from aioacme import validation
+from aioacme.order import OrderStatus
+
+
+ORDER_URL = 'https://acme.example/order/1'
+
+
+def _order(status):
+    return {
+        'status': status,
+        'identifiers': [{'type': 'dns', 'value': 'a.example.com'}],
+        'authorizations': ['https://acme.example/authz/1'],
+        'finalize': 'https://acme.example/order/1/finalize',
+    }
+
+
+class _FakeClient:
+    """Answers GETs from a script of ``(headers, json)`` responses or
+    exceptions, repeating the last one."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.gets = collections.Counter()
+        self.times = []
+
+    async def _get_with_headers(self, url, kind=None, *, use_cache=True):
+        self.gets[url] += 1
+        self.times.append(asyncio.get_event_loop().time())
+        await asyncio.sleep(0)
+        item = self.script.pop(0) if len(self.script) > 1 \
+            else self.script[0]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class PollerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, client, test):
+        async def run():
+            poller = poll.Poller(
+                client, max_rate=1000.0, min_interval=0.01,
+                max_interval=0.02,
+            )
+            try:
+                return await asyncio.wait_for(test(poller), 5)
+            finally:
+                await poller.close()
+        return self.loop.run_until_complete(run())
+
+    def test_waiters_share_polls(self):
+        client = _FakeClient([
+            ({}, _order('pending')),
+            ({}, _order('pending')),
+            ({}, _order('valid')),
+        ])
+
+        async def test(poller):
+            return await asyncio.gather(*(
+                poller.wait_for(ORDER_URL, OrderStatus.VALID)
+                for _ in range(10)
+            ))
+
+        orders = self._run(client, test)
+        self.assertEqual(3, client.gets[ORDER_URL])
+        self.assertEqual([OrderStatus.VALID] * 10, [o.status for o in orders])
+
+    def test_retry_after_spaces_polls(self):
+        client = _FakeClient([
+            ({'Retry-After': '1'}, _order('processing')),
+            ({}, _order('valid')),
+        ])
+
+        async def test(poller):
+            return await poller.wait_for(ORDER_URL, OrderStatus.VALID)
+
+        self._run(client, test)
+        self.assertEqual(2, len(client.times))
+        self.assertGreaterEqual(client.times[1] - client.times[0], 0.99)
+
+    def test_final_status_ends_the_wait(self):
+        client = _FakeClient([({}, _order('invalid'))])
+
+        async def test(poller):
+            return await poller.wait_for(ORDER_URL, OrderStatus.READY)
+
+        self.assertEqual(OrderStatus.INVALID, self._run(client, test).status)
+
+    def test_timeout(self):
+        client = _FakeClient([({}, _order('pending'))])
+
+        async def test(poller):
+            with self.assertRaises(asyncio.TimeoutError):
+                await poller.wait_for(
+                    ORDER_URL, OrderStatus.VALID, timeout=0.05,
+                )
+
+        self._run(client, test)
+
+    def test_transient_errors_are_retried(self):
+        client = _FakeClient([
+            aiohttp.ClientConnectionError('reset'),
+            aiohttp.ClientResponseError(None, (), status=503),
+            asyncio.TimeoutError(),
+            ({}, _order('valid')),
+        ])
+
+        async def test(poller):
+            return await poller.wait_for(ORDER_URL, OrderStatus.VALID)
+
+        self.assertEqual(OrderStatus.VALID, self._run(client, test).status)
+        self.assertEqual(4, client.gets[ORDER_URL])
+
+    def test_persistent_transient_errors_fail_the_waiters(self):
+        client = _FakeClient([aiohttp.ClientConnectionError('down')])
+
+        async def test(poller):
+            poller.max_errors = 2
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                await poller.wait_for(ORDER_URL, OrderStatus.VALID)
+
+        self._run(client, test)
+        self.assertEqual(3, client.gets[ORDER_URL])
+
+    def test_other_errors_fail_the_waiters(self):
+        for error, expected in (
+                (aiohttp.ClientResponseError(None, (), status=404),
+                 aiohttp.ClientResponseError),
+                (({}, {'status': 'bogus'}), validation.ValidationError),
+        ):
+            with self.subTest(expected=expected):
+                client = _FakeClient([error, ({}, _order('valid'))])
+
+                async def test(poller):
+                    with self.assertRaises(expected):
+                        await poller.wait_for(ORDER_URL, OrderStatus.VALID)
+
+                self._run(client, test)
+                self.assertEqual(1, client.gets[ORDER_URL])
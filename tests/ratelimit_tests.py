@@ -0,0 +1,163 @@
+"""Tests for aioacme.ratelimit."""
+
+import asyncio
+import random
+import unittest
+from unittest import mock
+
+from aioacme import problem
+from aioacme import ratelimit
+from aioacme.errors import ErrorResponse
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _problem(type_, retry_after=None, http_status=None):
+    err = problem.Problem(type_, None, None, None, None)
+    err.retry_after = retry_after
+    err.http_status = http_status
+    return err
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_burst_then_rate(self):
+        bucket = ratelimit.TokenBucket(2.0, 3, clock=self.clock)
+        self.assertEqual([0.0, 0.0, 0.0], [bucket.reserve() for _ in range(3)])
+        self.assertAlmostEqual(0.5, bucket.reserve())
+        self.assertAlmostEqual(1.0, bucket.reserve())
+        self.clock.now += 1.0
+        # Two tokens came back, but two more were already owed.
+        self.assertAlmostEqual(0.5, bucket.reserve())
+
+    def test_refills_up_to_burst(self):
+        bucket = ratelimit.TokenBucket(1.0, 2, clock=self.clock)
+        bucket.reserve()
+        bucket.reserve()
+        self.clock.now += 100.0
+        self.assertEqual([0.0, 0.0], [bucket.reserve() for _ in range(2)])
+        self.assertAlmostEqual(1.0, bucket.reserve())
+
+    def test_refund(self):
+        bucket = ratelimit.TokenBucket(1.0, 1, clock=self.clock)
+        bucket.reserve()
+        self.assertAlmostEqual(1.0, bucket.reserve())
+        bucket.refund()
+        self.assertAlmostEqual(1.0, bucket.reserve())
+
+    def test_pause(self):
+        bucket = ratelimit.TokenBucket(100.0, 10, clock=self.clock)
+        bucket.pause(5.0)
+        self.assertAlmostEqual(5.0, bucket.reserve())
+        bucket.pause(1.0)
+        self.assertAlmostEqual(5.0, bucket.reserve())
+        self.clock.now += 5.0
+        self.assertEqual(0.0, bucket.reserve())
+
+    def test_rejects_bad_limits(self):
+        with self.assertRaises(ValueError):
+            ratelimit.TokenBucket(0.0, 1)
+        with self.assertRaises(ValueError):
+            ratelimit.TokenBucket(1.0, 0.5)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.loop = asyncio.new_event_loop()
+        self.waits = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def _sleep(self, seconds):
+        self.waits.append(seconds)
+
+    def _acquire(self, limiter, kind):
+        with mock.patch.object(ratelimit.asyncio, 'sleep', self._sleep):
+            self.loop.run_until_complete(limiter.acquire(kind))
+        return self.waits.pop() if self.waits else 0.0
+
+    def test_pause_holds_back_only_the_limited_kind(self):
+        limiter = ratelimit.RateLimiter(
+            ratelimit.RateLimits(post=(100.0, 100), new_order=(100.0, 100)),
+            clock=self.clock,
+        )
+        limiter.pause('newOrder', 30.0)
+        self.assertAlmostEqual(30.0, self._acquire(limiter, 'newOrder'))
+        self.assertEqual(0.0, self._acquire(limiter, 'challenge'))
+
+    def test_pause_without_a_kind_limit_holds_back_every_post(self):
+        limiter = ratelimit.RateLimiter(
+            ratelimit.RateLimits(post=(100.0, 100)), clock=self.clock,
+        )
+        limiter.pause('finalize', 10.0)
+        self.assertAlmostEqual(10.0, self._acquire(limiter, 'challenge'))
+        self.clock.now += 10.0
+        self.assertEqual(0.0, self._acquire(limiter, 'challenge'))
+
+    def test_for_directory(self):
+        limits = ratelimit.RateLimits(post=(1.0, 1))
+        self.assertIsNone(ratelimit.RateLimiter.for_directory('a', None))
+        self.assertIsNone(
+            ratelimit.RateLimiter.for_directory('a', {'b': limits}),
+        )
+        limiter = ratelimit.RateLimiter.for_directory(
+            'a', {None: limits},
+        )
+        self.assertEqual(limits, limiter.limits)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = ratelimit.RetryPolicy(
+            max_attempts=3, base_delay=1.0, max_delay=60.0,
+        )
+
+    def test_bad_nonce_is_retried_at_once_everywhere(self):
+        err = _problem(problem.BAD_NONCE)
+        for kind in ('newOrder', 'finalize', 'order', None):
+            self.assertEqual(0.0, self.policy.delay_for(err, 1, kind))
+        self.assertIsNone(self.policy.delay_for(err, 3, 'newOrder'))
+
+    def test_rate_limited_follows_retry_after_everywhere(self):
+        err = _problem(problem.RATE_LIMITED, retry_after=7.0)
+        for kind in ('newOrder', 'finalize', 'challenge'):
+            self.assertEqual(7.0, self.policy.delay_for(err, 1, kind))
+        too_long = _problem(problem.RATE_LIMITED, retry_after=3600.0)
+        self.assertIsNone(self.policy.delay_for(too_long, 1, 'newOrder'))
+
+    def test_server_errors_only_retried_when_idempotent(self):
+        errors = (
+            _problem(problem.SERVER_INTERNAL, retry_after=2.0),
+            ErrorResponse(503, {}, b'', 2.0),
+        )
+        for err in errors:
+            for kind in ('order', 'authz', 'certificate', 'challenge'):
+                self.assertEqual(2.0, self.policy.delay_for(err, 1, kind))
+            for kind in ('newOrder', 'newAccount', 'finalize', 'post', None):
+                self.assertIsNone(self.policy.delay_for(err, 1, kind))
+
+    def test_backoff_without_retry_after(self):
+        err = ErrorResponse(500, {}, b'')
+        random.seed(1)
+        first = self.policy.delay_for(err, 1, 'order')
+        second = self.policy.delay_for(err, 2, 'order')
+        self.assertTrue(0.5 <= first <= 1.5, first)
+        self.assertTrue(1.0 <= second <= 3.0, second)
+
+    def test_other_errors_are_not_retried(self):
+        for err in (
+                _problem('urn:ietf:params:acme:error:unauthorized'),
+                ErrorResponse(404, {}, b''),
+                ValueError('nope'),
+        ):
+            self.assertIsNone(self.policy.delay_for(err, 1, 'order'))
@@ -0,0 +1,157 @@
+"""Tests for aioacme.renewal."""
+
+import asyncio
+import collections
+from datetime import datetime, timedelta, timezone
+import random
+import unittest
+
+from aioacme import renewal
+
+
+def _info(start, end, retry_after=None):
+    return renewal.RenewalInfo(
+        suggested_window=(
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(end, timezone.utc),
+        ),
+        explanation_url=None,
+        retry_after=retry_after,
+    )
+
+
+class _FakeClient:
+    """Answers ``renewal_info`` from a script per certificate ID: a list of
+    ``RenewalInfo`` or exceptions, repeating the last one."""
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.calls = collections.Counter()
+
+    async def renewal_info(self, cert_id):
+        self.calls[cert_id] += 1
+        await asyncio.sleep(0)
+        script = self.scripts[cert_id]
+        item = script.pop(0) if len(script) > 1 else script[0]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+class RenewalInfoTest(unittest.TestCase):
+    def test_pick_time(self):
+        now = datetime(2026, 1, 10, tzinfo=timezone.utc)
+        day = timedelta(days=1)
+        rng = random.Random(0)
+        future = _info((now + day).timestamp(), (now + 2 * day).timestamp())
+        for _ in range(20):
+            picked = future.pick_time(now, rng)
+            self.assertTrue(now + day <= picked <= now + 2 * day, picked)
+        # Only the part of the window that hasn't passed is used.
+        started = _info((now - day).timestamp(), (now + day).timestamp())
+        for _ in range(20):
+            picked = started.pick_time(now, rng)
+            self.assertTrue(now <= picked <= now + day, picked)
+        passed = _info((now - 2 * day).timestamp(), (now - day).timestamp())
+        self.assertEqual(now, passed.pick_time(now, rng))
+
+    def test_from_json(self):
+        info = renewal.RenewalInfo.from_json(
+            {
+                'suggestedWindow': {
+                    'start': '2026-01-01T00:00:00Z',
+                    'end': '2026-01-02T00:00:00Z',
+                },
+                'explanationURL': 'https://acme.example/why',
+            },
+            retry_after=60.0,
+        )
+        self.assertEqual(
+            datetime(2026, 1, 1, tzinfo=timezone.utc),
+            info.suggested_window[0],
+        )
+        self.assertEqual('https://acme.example/why', str(info.explanation_url))
+        self.assertEqual(60.0, info.retry_after)
+
+
+class RenewalSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def clock(self):
+        # A fixed date, advancing with the loop, so that the scheduler's
+        # sleeps line up with it.
+        return 1768003200.0 + self.loop.time()
+
+    def _collect(self, scheduler, count):
+        async def collect():
+            items = []
+            async for item in scheduler:
+                items.append(item)
+                if len(items) == count:
+                    break
+            return items
+        return self.loop.run_until_complete(asyncio.wait_for(collect(), 5))
+
+    def _scheduler(self, client, inventory, **kwargs):
+        kwargs.setdefault('max_rate', 1000.0)
+        return renewal.RenewalScheduler(
+            client, inventory, rng=random.Random(0), clock=self.clock,
+            **kwargs,
+        )
+
+    def test_yields_in_renewal_order(self):
+        now = self.clock()
+        client = _FakeClient({
+            'late': [_info(now + 0.2, now + 0.3)],
+            'due': [_info(now - 10, now - 5)],
+            'soon': [_info(now + 0.05, now + 0.1)],
+            'later': [_info(now + 3600, now + 7200)],
+        })
+        scheduler = self._scheduler(client, {
+            'late': 'late item', 'due': 'due item', 'soon': 'soon item',
+            'later': 'later item',
+        })
+        self.assertEqual(
+            ['due item', 'soon item', 'late item'],
+            self._collect(scheduler, 3),
+        )
+        self.assertGreaterEqual(self.clock(), now + 0.2)
+
+    def test_recheck_picks_up_a_moved_window(self):
+        now = self.clock()
+        client = _FakeClient({
+            'moved': [
+                _info(now + 3600, now + 7200, retry_after=0.05),
+                _info(now - 10, now - 5),
+            ],
+        })
+        scheduler = self._scheduler(client, {'moved': 'moved item'})
+        self.assertEqual(['moved item'], self._collect(scheduler, 1))
+        self.assertEqual(2, client.calls['moved'])
+
+    def test_failed_fetch_is_retried_without_stopping_the_rest(self):
+        now = self.clock()
+        client = _FakeClient({
+            'broken': [
+                RuntimeError('404'),
+                RuntimeError('timeout'),
+                _info(now - 10, now - 5),
+            ],
+            'fine': [_info(now - 10, now - 5)],
+        })
+        scheduler = self._scheduler(
+            client, {'broken': 'broken item', 'fine': 'fine item'},
+            recheck_interval=0.05,
+        )
+        with self.assertLogs('aioacme.renewal', 'WARNING') as logs:
+            items = self._collect(scheduler, 2)
+        self.assertEqual(['fine item', 'broken item'], items)
+        self.assertEqual(3, client.calls['broken'])
+        self.assertEqual(1, client.calls['fine'])
+        self.assertEqual(2, len(logs.records))
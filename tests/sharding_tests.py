@@ -0,0 +1,141 @@
+"""Tests for aioacme.sharding."""
+
+import asyncio
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+import josepy
+
+from aioacme import client as _client
+from aioacme import csr
+from aioacme import issuance
+from aioacme import sharding
+from aioacme.identifier import DnsName
+from aioacme.testing import MockAcmeServer
+
+
+class AcceptAnyHttp01(issuance.ChallengeSolver):
+    # The mock server validates every challenge.
+
+    def select(self, authz):
+        for challenge in authz.challenges:
+            if challenge.type == 'http-01':
+                return challenge
+        return None
+
+    async def provision(self, account, authz, challenge):
+        pass
+
+
+class MockSetup(sharding.WorkerSetup):
+    def __init__(self, directory_url, broken_shards=(), key_pool=False):
+        self.directory_url = directory_url
+        self.broken_shards = broken_shards
+        self.key_pool = key_pool
+        self.client = None
+        self.csrs = None
+
+    async def open(self, shard):
+        if shard in self.broken_shards:
+            raise RuntimeError(f'no account for shard {shard}')
+        self.client = await _client.new_client(
+            self.directory_url, 'aioacme-tests',
+        )
+        key = josepy.JWKEC(key=ec.generate_private_key(
+            ec.SECP256R1(), default_backend(),
+        ))
+        account = await self.client.new_account(
+            key, terms_of_service_agreed=True,
+        )
+        return account, AcceptAnyHttp01()
+
+    async def csr_builder(self, shard):
+        if self.key_pool:
+            self.csrs = csr.CsrBuilder(csr.process_pool_key_pool(
+                max_workers=1, key_type='ec', key_size=256, depth=2,
+            ))
+        return self.csrs
+
+    async def close(self):
+        if self.csrs is not None:
+            await self.csrs.key_pool.close()
+        if self.client is not None:
+            await self.client.close()
+
+
+def _requests(count, csr=b'csr'):
+    return [
+        issuance.IssuanceRequest(
+            [DnsName(f'host{idx}.domain{idx}.example')],
+            csr=csr,
+            tag=idx,
+        )
+        for idx in range(count)
+    ]
+
+
+class IssueShardedTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.server = MockAcmeServer()
+        self.directory_url = self._run(self.server.start())
+        self.addCleanup(lambda: self._run(self.server.close()))
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 60))
+
+    def _issue(self, setup, requests):
+        async def collect():
+            return [
+                result async for result in sharding.issue_sharded(
+                    setup, requests, processes=2, concurrency=2,
+                )
+            ]
+        return self._run(collect())
+
+    def test_issues_every_request(self):
+        requests = _requests(20)
+        results = self._issue(MockSetup(self.directory_url), requests)
+        self.assertEqual(
+            list(range(20)),
+            sorted(result.request.tag for result in results),
+        )
+        for result in results:
+            self.assertTrue(result.ok, result.error)
+            self.assertIsNotNone(result.certificate)
+        self.assertEqual(20, self.server.requests['newOrder'])
+
+    def test_workers_can_generate_keys_in_processes(self):
+        results = self._issue(
+            MockSetup(self.directory_url, key_pool=True),
+            _requests(4, csr=None),
+        )
+        self.assertEqual(4, len(results))
+        for result in results:
+            self.assertTrue(result.ok, result.error)
+            self.assertIn(b'PRIVATE KEY', result.private_key)
+
+    def test_requests_for_a_crashed_worker_fail(self):
+        requests = _requests(20)
+        results = self._issue(
+            MockSetup(self.directory_url, broken_shards={0}), requests,
+        )
+        self.assertEqual(
+            list(range(20)),
+            sorted(result.request.tag for result in results),
+        )
+        for result in results:
+            shard = sharding.shard_for(result.request, 2)
+            if shard == 0:
+                self.assertIn(
+                    'RuntimeError: no account for shard 0', str(result.error),
+                )
+            else:
+                self.assertTrue(result.ok, result.error)
+        self.assertIn(
+            0, {sharding.shard_for(request, 2) for request in requests},
+        )
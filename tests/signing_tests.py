@@ -0,0 +1,134 @@
+"""Tests for aioacme.signing."""
+
+import asyncio
+import concurrent.futures
+import json
+import unittest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+import josepy
+
+from aioacme import signing
+from aioacme import util
+
+
+def _request(key, nonce='nonce-1', kid='https://a/acct/1'):
+    return signing.SignRequest(
+        payload=b'{"status":"deactivated"}',
+        key=key,
+        alg=signing.alg_for_key(key),
+        url='https://a/acct/1',
+        nonce=nonce,
+        kid=kid,
+    )
+
+
+class _CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.batches = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.batches.append(len(args[0]))
+        return super().submit(fn, *args, **kwargs)
+
+
+class SignerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = josepy.JWKEC(
+            key=ec.generate_private_key(ec.SECP256R1(), default_backend()),
+        )
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(
+            asyncio.wait_for(coro, 5),
+        )
+
+    def _check(self, data, nonce):
+        jws = json.loads(data.decode('utf-8'))
+        self.assertTrue(josepy.jwa.ES256.verify(
+            self.key.public_key().key,
+            f'{jws["protected"]}.{jws["payload"]}'.encode('ascii'),
+            util.acme_b64decode(jws['signature']),
+        ))
+        header = json.loads(util.acme_b64decode(jws['protected']))
+        self.assertEqual(nonce, header['nonce'])
+        self.assertEqual('https://a/acct/1', header['url'])
+        self.assertEqual('https://a/acct/1', header['kid'])
+
+    def test_inline_signer(self):
+        data = self._run(
+            signing.InlineSigner().sign(_request(self.key)),
+        )
+        self._check(data, 'nonce-1')
+
+    def test_executor_signer_batches(self):
+        executor = _CountingExecutor()
+        signer = signing.ExecutorSigner(
+            executor, max_batch=2, executor_is_owned=True,
+        )
+
+        async def test():
+            results = await asyncio.gather(*(
+                signer.sign(_request(self.key, nonce=f'nonce-{i}'))
+                for i in range(5)
+            ))
+            await signer.close()
+            return results
+
+        results = self._run(test())
+        self.assertEqual([2, 2, 1], executor.batches)
+        for i, data in enumerate(results):
+            self._check(data, f'nonce-{i}')
+
+    def test_executor_signer_fails_only_the_bad_request(self):
+        signer = signing.ExecutorSigner(
+            concurrent.futures.ThreadPoolExecutor(max_workers=1),
+            executor_is_owned=True,
+        )
+        bad = signing.SignRequest(
+            payload=b'{}',
+            key=self.key,
+            alg=josepy.jwa.RS256,
+            url='https://a/acct/1',
+            nonce='nonce-bad',
+            kid='https://a/acct/1',
+        )
+
+        async def test():
+            results = await asyncio.gather(
+                signer.sign(_request(self.key)),
+                signer.sign(bad),
+                return_exceptions=True,
+            )
+            await signer.close()
+            return results
+
+        good, err = self._run(test())
+        self._check(good, 'nonce-1')
+        self.assertIsInstance(err, Exception)
+
+    def test_executor_signer_fails_when_executor_is_shut_down(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        executor.shutdown()
+        signer = signing.ExecutorSigner(executor, max_batch=1)
+
+        async def test():
+            return await asyncio.gather(
+                signer.sign(_request(self.key)),
+                signer.sign(_request(self.key)),
+                return_exceptions=True,
+            )
+
+        for result in self._run(test()):
+            self.assertIsInstance(result, RuntimeError)
@@ -0,0 +1,86 @@
+"""Tests for aioacme.singleflight."""
+
+import asyncio
+import unittest
+
+from aioacme import singleflight
+
+
+class GetCoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.fetches = 0
+        self.now = 0.0
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    async def _fetch(self):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return f'response-{self.fetches}'
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_concurrent_fetches_share_a_request(self):
+        async def test():
+            coalescer = singleflight.GetCoalescer()
+            responses = await asyncio.gather(*(
+                coalescer.fetch('https://a/order/1', self._fetch)
+                for _ in range(5)
+            ))
+            self.assertEqual(['response-1'] * 5, responses)
+            # Without a TTL, nothing is kept once the request is done.
+            self.assertEqual(
+                'response-2',
+                await coalescer.fetch('https://a/order/1', self._fetch),
+            )
+        self._run(test())
+        self.assertEqual(2, self.fetches)
+
+    def test_ttl_and_invalidate(self):
+        async def test():
+            coalescer = singleflight.GetCoalescer(
+                1.0, clock=lambda: self.now,
+            )
+            url = 'https://a/order/1'
+            self.assertEqual('response-1', await coalescer.fetch(
+                url, self._fetch,
+            ))
+            self.assertEqual('response-1', await coalescer.fetch(
+                url, self._fetch,
+            ))
+            self.assertEqual('response-2', await coalescer.fetch(
+                url, self._fetch, use_cache=False,
+            ))
+            coalescer.invalidate(url)
+            self.assertEqual('response-3', await coalescer.fetch(
+                url, self._fetch,
+            ))
+            self.now = 1.5
+            self.assertEqual('response-4', await coalescer.fetch(
+                url, self._fetch,
+            ))
+        self._run(test())
+
+    def test_errors_are_shared_but_not_cached(self):
+        async def fail():
+            self.fetches += 1
+            await asyncio.sleep(0)
+            raise ValueError('nope')
+
+        async def test():
+            coalescer = singleflight.GetCoalescer(60.0)
+            results = await asyncio.gather(
+                coalescer.fetch('https://a/authz/1', fail),
+                coalescer.fetch('https://a/authz/1', fail),
+                return_exceptions=True,
+            )
+            self.assertEqual(1, self.fetches)
+            for result in results:
+                self.assertIsInstance(result, ValueError)
+            self.assertEqual(0, len(coalescer))
+        self._run(test())
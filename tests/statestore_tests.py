@@ -0,0 +1,238 @@
+"""Tests for aioacme.statestore."""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from aioacme import issuance
+from aioacme import statestore
+from aioacme.identifier import DnsName
+from tests.issuance_tests import AcceptingSolver, FakeAccount, collect, request
+
+
+class FakeCsrBuilder:
+    def __init__(self):
+        self.built = 0
+
+    async def build(self, identifiers):
+        self.built += 1
+        return f'key {self.built}'.encode('ascii'), b'csr'
+
+
+def keyless(name):
+    return issuance.IssuanceRequest([DnsName(name)], tag=name)
+
+
+CHECKPOINT = statestore.OrderCheckpoint(
+    key='dns:a.example.com',
+    stage=statestore.STAGE_AUTHORIZED,
+    order_url='https://acme.example/order/1',
+    authorization_urls=('https://acme.example/authz/1',),
+    finalize_url='https://acme.example/order/1/finalize',
+)
+
+
+class SqliteStateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'state.db')
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    def _load(self):
+        store = statestore.SqliteStateStore(self.path)
+        try:
+            return self._run(store.load())
+        finally:
+            self._run(store.close())
+
+    def test_checkpoint_bytes_round_trip(self):
+        with_key = statestore.OrderCheckpoint(
+            'dns:b.example.com', statestore.STAGE_FINALIZED,
+            'https://acme.example/order/2', private_key=b'-----BEGIN ...',
+            expires=1768003200.0,
+        )
+        for checkpoint in [CHECKPOINT, with_key]:
+            self.assertEqual(
+                checkpoint,
+                statestore.OrderCheckpoint.from_bytes(
+                    checkpoint.key, checkpoint.to_bytes(),
+                ),
+            )
+
+    def test_save_and_discard_survive_reopening(self):
+        other = statestore.OrderCheckpoint(
+            'dns:b.example.com', statestore.STAGE_ORDERED,
+            'https://acme.example/order/2',
+        )
+        store = statestore.SqliteStateStore(self.path)
+        store.save(CHECKPOINT)
+        store.save(other)
+        self._run(store.close())
+        self.assertEqual(
+            {CHECKPOINT.key: CHECKPOINT, other.key: other}, self._load(),
+        )
+
+        store = statestore.SqliteStateStore(self.path)
+        store.discard(other.key)
+        self._run(store.close())
+        self.assertEqual({CHECKPOINT.key: CHECKPOINT}, self._load())
+
+    def test_failed_write_is_raised_and_retried(self):
+        store = statestore.SqliteStateStore(self.path, flush_delay=0.0)
+        write = store._write
+        failures = [sqlite3.OperationalError('database is locked')]
+
+        def flaky_write(batch):
+            if failures:
+                raise failures.pop()
+            write(batch)
+
+        store._write = flaky_write
+        store.save(CHECKPOINT)
+        with self.assertLogs('aioacme.statestore', 'ERROR'):
+            with self.assertRaises(sqlite3.OperationalError):
+                self._run(store.flush())
+        self._run(store.close())
+        self.assertEqual({CHECKPOINT.key: CHECKPOINT}, self._load())
+
+    def test_issue_many_resumes_from_checkpoints(self):
+        account = FakeAccount()
+        broken = {'b.example.com'}
+
+        async def stage_hook(stage, value):
+            if stage == 'finalize' and \
+                    account.names[value.split('/')[-2]] in broken:
+                raise RuntimeError('finalize failed')
+
+        account.stage_hook = stage_hook
+        requests = [request('a.example.com'), request('b.example.com')]
+
+        store = statestore.SqliteStateStore(self.path)
+        results = self._run(collect(issuance.issue_many(
+            account, requests, AcceptingSolver(), state_store=store,
+        )))
+        self._run(store.close())
+        self.assertEqual(
+            {'a.example.com': True, 'b.example.com': False},
+            {result.request.tag: result.ok for result in results},
+        )
+        # Downloaded certificates are forgotten; the failed order is kept
+        # at the last stage it passed.
+        checkpoints = self._load()
+        self.assertEqual(['dns:b.example.com'], list(checkpoints))
+        self.assertEqual(
+            statestore.STAGE_AUTHORIZED,
+            checkpoints['dns:b.example.com'].stage,
+        )
+
+        broken.clear()
+        new_orders = account.calls['new_order']
+        store = statestore.SqliteStateStore(self.path)
+        results = self._run(collect(issuance.issue_many(
+            account, [request('b.example.com')], AcceptingSolver(),
+            state_store=store,
+        )))
+        self._run(store.close())
+        self.assertTrue(results[0].ok, results[0].error)
+        self.assertEqual(
+            checkpoints['dns:b.example.com'].order_url,
+            str(results[0].order_url),
+        )
+        self.assertEqual(new_orders, account.calls['new_order'])
+        self.assertEqual(1, account.calls['fetch_order'])
+        self.assertEqual({}, self._load())
+
+    def _issue(self, account, requests, csr_builder):
+        store = statestore.SqliteStateStore(self.path)
+        try:
+            return self._run(collect(issuance.issue_many(
+                account, requests, AcceptingSolver(), state_store=store,
+                csr_builder=csr_builder,
+            )))
+        finally:
+            self._run(store.close())
+
+    def test_resumed_order_keeps_its_generated_key(self):
+        account = FakeAccount()
+        failing = True
+
+        async def stage_hook(stage, value):
+            if stage == 'download' and failing:
+                raise RuntimeError('download failed')
+
+        account.stage_hook = stage_hook
+        builder = FakeCsrBuilder()
+        results = self._issue(account, [keyless('a.example.com')], builder)
+        self.assertFalse(results[0].ok)
+        self.assertEqual(
+            b'key 1', self._load()['dns:a.example.com'].private_key,
+        )
+
+        failing = False
+        results = self._issue(account, [keyless('a.example.com')], builder)
+        self.assertTrue(results[0].ok, results[0].error)
+        self.assertEqual(b'key 1', results[0].private_key)
+        self.assertEqual(1, account.calls['new_order'])
+        self.assertEqual(1, account.calls['finalize'])
+        self.assertEqual(1, builder.built)
+
+    def test_order_finalized_with_a_lost_key_is_replaced(self):
+        account = FakeAccount()
+
+        async def stage_hook(stage, value):
+            if stage == 'finalize' and account.calls['finalize'] == 1:
+                # The server finalizes the order, but the process dies
+                # before the key is checkpointed.
+                account.statuses[value.split('/')[-2]] = 'valid'
+                raise RuntimeError('died')
+
+        account.stage_hook = stage_hook
+        builder = FakeCsrBuilder()
+        results = self._issue(account, [keyless('a.example.com')], builder)
+        self.assertFalse(results[0].ok)
+        checkpoint = self._load()['dns:a.example.com']
+        self.assertEqual(statestore.STAGE_AUTHORIZED, checkpoint.stage)
+        self.assertIsNone(checkpoint.private_key)
+
+        results = self._issue(account, [keyless('a.example.com')], builder)
+        self.assertTrue(results[0].ok, results[0].error)
+        self.assertEqual(b'key 2', results[0].private_key)
+        self.assertNotEqual(checkpoint.order_url, str(results[0].order_url))
+        self.assertEqual(2, account.calls['new_order'])
+
+    def test_expired_checkpoints_are_discarded(self):
+        now = time.time()
+        expired = statestore.OrderCheckpoint(
+            'dns:b.example.com', statestore.STAGE_ORDERED,
+            'https://acme.example/order/2', expires=now - 1,
+        )
+        unexpired = statestore.OrderCheckpoint(
+            'dns:c.example.com', statestore.STAGE_ORDERED,
+            'https://acme.example/order/3', expires=now + 3600,
+        )
+        store = statestore.SqliteStateStore(self.path)
+        for checkpoint in [CHECKPOINT, expired, unexpired]:
+            store.save(checkpoint)
+        self._run(store.close())
+
+        # None of them is for a request in this run.
+        results = self._issue(
+            FakeAccount(), [request('d.example.com')], FakeCsrBuilder(),
+        )
+        self.assertTrue(results[0].ok, results[0].error)
+        self.assertEqual(
+            {CHECKPOINT.key: CHECKPOINT, unexpired.key: unexpired},
+            self._load(),
+        )
@@ -0,0 +1,129 @@
+"""Tests for aioacme.tlsalpn01."""
+
+import asyncio
+import hashlib
+import os
+import ssl
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from cryptography import x509
+
+from aioacme import tlsalpn01
+
+
+class ContextTest(unittest.TestCase):
+    def test_key_file_is_private_and_removed(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        modes = []
+        load_cert_chain = ssl.SSLContext.load_cert_chain
+
+        class RecordingContext(ssl.SSLContext):
+            def load_cert_chain(self, path):
+                parent = os.path.dirname(path)
+                modes.append((
+                    os.path.dirname(parent) == directory.name,
+                    stat.S_IMODE(os.stat(parent).st_mode),
+                    stat.S_IMODE(os.stat(path).st_mode),
+                ))
+                return load_cert_chain(self, path)
+
+        with mock.patch.object(tempfile, 'tempdir', directory.name), \
+                mock.patch.object(ssl, 'SSLContext', RecordingContext):
+            tlsalpn01._build_context(
+                'a.example.com', 'token.thumbprint', tlsalpn01._generate_key(),
+            )
+        # In a directory of its own, inside the temporary directory.
+        self.assertEqual([(True, 0o700, 0o600)], modes)
+        self.assertEqual([], os.listdir(directory.name))
+
+
+class TlsAlpn01ResponderTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.responder = tlsalpn01.TlsAlpn01Responder(
+            key_pool=tlsalpn01.KeyPool(2),
+        )
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.responder.close())
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 10))
+
+    async def _handshake(self, server_name):
+        port = self.responder._server.sockets[0].getsockname()[1]
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.set_alpn_protocols([tlsalpn01.ACME_TLS_PROTOCOL])
+        reader, writer = await asyncio.open_connection(
+            '127.0.0.1', port, ssl=context, server_hostname=server_name,
+        )
+        try:
+            ssl_object = writer.get_extra_info('ssl_object')
+            return (
+                ssl_object.selected_alpn_protocol(),
+                x509.load_der_x509_certificate(
+                    ssl_object.getpeercert(binary_form=True),
+                ),
+            )
+        finally:
+            writer.close()
+
+    def test_handshake_presents_validation_certificate(self):
+        names = [f'host{i}.example.com' for i in range(5)]
+
+        async def test():
+            await self.responder.start('127.0.0.1', 0)
+            loop_thread = threading.get_ident()
+            built_on = set()
+            build = tlsalpn01._build_context
+
+            def recording_build(*args):
+                built_on.add(threading.get_ident())
+                return build(*args)
+
+            with mock.patch.object(
+                    tlsalpn01, '_build_context', recording_build,
+            ):
+                await self.responder.prepare(
+                    (name, f'token-{name}.thumbprint') for name in names
+                )
+            self.assertNotIn(loop_thread, built_on)
+            return await self._handshake('host3.example.com')
+
+        protocol, cert = self._run(test())
+        self.assertEqual(tlsalpn01.ACME_TLS_PROTOCOL, protocol)
+        self.assertEqual(
+            ['host3.example.com'],
+            cert.extensions.get_extension_for_class(
+                x509.SubjectAlternativeName,
+            ).value.get_values_for_type(x509.DNSName),
+        )
+        extension = cert.extensions.get_extension_for_oid(
+            tlsalpn01.ID_PE_ACME_IDENTIFIER,
+        )
+        self.assertTrue(extension.critical)
+        digest = hashlib.sha256(
+            b'token-host3.example.com.thumbprint',
+        ).digest()
+        self.assertEqual(b'\x04\x20' + digest, extension.value.value)
+
+    def test_unknown_name_is_refused(self):
+        async def test():
+            await self.responder.start('127.0.0.1', 0)
+            await self.responder.prepare([('a.example.com', 'ka')])
+            self.responder.remove('a.example.com')
+            with self.assertRaises((ssl.SSLError, ConnectionError)):
+                await self._handshake('a.example.com')
+
+        self._run(test())
+        self.assertEqual(0, len(self.responder))
@@ -1,5 +1,7 @@
 """Tests for aioacme.util."""
 
+import asyncio
+from datetime import datetime, timezone
 import unittest
 
 from aioacme import util
@@ -31,3 +33,71 @@ class UtilTest(unittest.TestCase):
     def test_acme_b64decode(self):
         self.assertEqual(b'\x01\x02\x03', util.acme_b64decode('AQID'))
         self.assertEqual(b'\xfb\xf0', util.acme_b64decode('-_A'))
+
+    def test_map_ordered(self):
+        async def slow_double(value):
+            # Later items finish first.
+            await asyncio.sleep(0.001 * (5 - value))
+            return value * 2
+
+        loop = asyncio.new_event_loop()
+        try:
+            actual = loop.run_until_complete(
+                util.map_ordered(slow_double, range(5), 2)
+            )
+        finally:
+            loop.close()
+        self.assertEqual([0, 2, 4, 6, 8], actual)
+
+    def test_map_unordered_limits_concurrency(self):
+        running = 0
+        max_running = 0
+
+        async def track(value):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return value
+
+        async def collect():
+            return [
+                idx async for idx, _ in util.map_unordered(track, range(10), 3)
+            ]
+
+        loop = asyncio.new_event_loop()
+        try:
+            indexes = loop.run_until_complete(collect())
+        finally:
+            loop.close()
+        self.assertEqual(list(range(10)), sorted(indexes))
+        self.assertEqual(3, max_running)
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(util.parse_retry_after(None))
+        self.assertIsNone(util.parse_retry_after('soon'))
+        self.assertEqual(120.0, util.parse_retry_after('120'))
+        now = datetime(2019, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(30.0, util.parse_retry_after(
+            'Wed, 01 May 2019 12:00:30 GMT', now,
+        ))
+        # Dates in the past mean "retry now".
+        self.assertEqual(0.0, util.parse_retry_after(
+            'Wed, 01 May 2019 11:00:00 GMT', now,
+        ))
+
+    def test_parse_link_headers(self):
+        self.assertEqual(
+            [
+                ('https://a.example/cert/1', {'rel': 'alternate'}),
+                ('https://a.example/cert/2', {'rel': 'alternate'}),
+                ('https://a.example/dir', {'rel': 'index', 'title': 'x, y'}),
+            ],
+            util.parse_link_headers([
+                '<https://a.example/cert/1>;rel="alternate",'
+                ' <https://a.example/cert/2>; REL=alternate',
+                '<https://a.example/dir>; rel="index"; title="x, y"',
+            ]),
+        )
+        self.assertEqual([], util.parse_link_headers([]))
@@ -0,0 +1,246 @@
+"""Tests for aioacme.validation."""
+
+import copy
+import pickle
+import unittest
+
+from aioacme import authorization
+from aioacme import challenge
+from aioacme import order
+from aioacme import validation
+from aioacme.order import LazyOrder, Order, OrderStatus
+
+
+ORDER_JSON = {
+    'status': 'pending',
+    'identifiers': [{'type': 'dns', 'value': 'a.example.com'}],
+    'authorizations': ['https://acme.example/authz/1'],
+    'finalize': 'https://acme.example/order/1/finalize',
+}
+
+
+class LazyViewTest(unittest.TestCase):
+    def test_copy_and_pickle(self):
+        order = LazyOrder(ORDER_JSON)
+        self.assertIs(OrderStatus.PENDING, order.status)
+        for duplicate in (
+                copy.copy(order),
+                copy.deepcopy(order),
+                pickle.loads(pickle.dumps(order)),
+        ):
+            self.assertEqual(ORDER_JSON, duplicate.json)
+            self.assertIs(OrderStatus.PENDING, duplicate.status)
+            self.assertEqual(order.resolve(), duplicate.resolve())
+
+    def test_uninitialized_instance_raises_attribute_error(self):
+        order = LazyOrder.__new__(LazyOrder)
+        for name in ('status', '_values', 'json', '__setstate__'):
+            with self.subTest(name=name):
+                with self.assertRaises(AttributeError):
+                    getattr(order, name)
+
+
+# The parsers as they were before schemas were compiled, built on
+# deserialize_dict, to check the compiled ones against.
+
+def _legacy_challenge(json_):
+    validated_base = validation.deserialize_dict(
+        json_,
+        challenge._CHALLENGE_BASE_SCHEMA,
+        lambda **dct: dct,
+        'Challenge',
+    )
+    typed = {
+        'http-01': (
+            challenge._HTTP_01_SCHEMA, challenge.Http01Challenge,
+            'Http01Challenge',
+        ),
+        'dns-01': (
+            challenge._DNS_01_SCHEMA, challenge.Dns01Challenge,
+            'Dns01Challenge',
+        ),
+        'tls-alpn-01': (
+            challenge._TLS_ALPN_01_SCHEMA, challenge.TlsAlpn01Challenge,
+            'TlsAlpn01Challenge',
+        ),
+    }.get(validated_base['type'])
+    if typed is None:
+        extra_json = {
+            key: value for key, value in json_.items()
+            if key not in challenge._CHALLENGE_BASE_FIELDS
+        }
+        return challenge.UnknownChallenge(
+            extra_json=extra_json, **validated_base,
+        )
+    schema, challenge_cls, obj_type_name = typed
+    return validation.deserialize_dict(
+        json_,
+        schema,
+        lambda **dct: challenge_cls(**validated_base, **dct),
+        obj_type_name,
+    )
+
+
+def _legacy_authorization(json_):
+    schema = dict(
+        authorization._AUTHORIZATION_SCHEMA,
+        challenges=lambda json_: tuple(validation.deserialize_list(
+            json_, _legacy_challenge, 'challenge',
+        )),
+    )
+    return validation.deserialize_dict(
+        json_, schema, authorization.Authorization, 'Authorization',
+    )
+
+
+def _legacy_order(json_):
+    def make_order(**validated):
+        rename_key(validated, 'finalize', 'finalize_url')
+        rename_key(validated, 'certificate', 'certificate_url')
+        rename_key(validated, 'authorizations', 'authorization_urls')
+        return Order(**validated)
+
+    return validation.deserialize_dict(
+        json_, order._ORDER_SCHEMA, make_order, 'Order',
+    )
+
+
+def rename_key(dct, old, new):
+    if old in dct:
+        dct[new] = dct.pop(old)
+
+
+def _messages(err):
+    messages = []
+    while err is not None:
+        messages.append(f'{type(err).__name__}: {err}')
+        err = err.__cause__
+    return messages
+
+
+CHALLENGE_JSON = {
+    'type': 'http-01',
+    'url': 'https://acme.example/chall/1',
+    'status': 'pending',
+    'token': 'token1',
+}
+AUTHORIZATION_JSON = {
+    'identifier': {'type': 'dns', 'value': 'a.example.com'},
+    'status': 'valid',
+    'expires': '2026-01-10T00:00:00Z',
+    'challenges': [
+        CHALLENGE_JSON,
+        dict(CHALLENGE_JSON, type='dns-01', url='https://acme.example/c/2'),
+        dict(
+            CHALLENGE_JSON, type='tls-alpn-01', status='valid',
+            validated='2026-01-09T00:00:00Z',
+        ),
+        {
+            'type': 'x-new-01',
+            'url': 'https://acme.example/chall/4',
+            'status': 'invalid',
+            'error': {
+                'type': 'urn:ietf:params:acme:error:connection',
+                'detail': 'Timed out',
+            },
+            'nonce': 'abc',
+        },
+    ],
+}
+
+
+def _without(dct, key):
+    return {k: v for k, v in dct.items() if k != key}
+
+
+class CompiledSchemaParityTest(unittest.TestCase):
+    """The compiled parsers accept and reject what ``deserialize_dict``
+    did, with the same results and error messages.
+    """
+
+    def assert_same(self, legacy, compiled, json_):
+        try:
+            expected = legacy(copy.deepcopy(json_))
+        except validation.ValidationError as err:
+            with self.assertRaises(validation.ValidationError) as caught:
+                compiled(copy.deepcopy(json_))
+            self.assertEqual(_messages(err), _messages(caught.exception))
+        else:
+            self.assertEqual(expected, compiled(copy.deepcopy(json_)))
+
+    def test_orders(self):
+        valid = dict(
+            ORDER_JSON,
+            status='valid',
+            expires='2026-01-10T00:00:00Z',
+            certificate='https://acme.example/cert/1',
+        )
+        cases = [
+            ORDER_JSON,
+            valid,
+            dict(ORDER_JSON, status='invalid', error={
+                'type': 'urn:ietf:params:acme:error:malformed',
+                'status': 400,
+            }),
+            [],
+            _without(ORDER_JSON, 'status'),
+            _without(ORDER_JSON, 'finalize'),
+            dict(ORDER_JSON, status='bogus'),
+            dict(ORDER_JSON, expires='not a date'),
+            dict(ORDER_JSON, identifiers={}),
+            dict(ORDER_JSON, identifiers=[{'type': 'dns'}]),
+            dict(ORDER_JSON, authorizations=['https://a/1', 2]),
+            dict(ORDER_JSON, finalize=5),
+            dict(ORDER_JSON, error={'status': 'four hundred'}),
+        ]
+        for json_ in cases:
+            with self.subTest(json=json_):
+                self.assert_same(_legacy_order, Order.from_json, json_)
+
+    def test_authorizations(self):
+        challenges = AUTHORIZATION_JSON['challenges']
+        cases = [
+            AUTHORIZATION_JSON,
+            dict(AUTHORIZATION_JSON, wildcard=True),
+            'authorization',
+            _without(AUTHORIZATION_JSON, 'identifier'),
+            _without(AUTHORIZATION_JSON, 'challenges'),
+            dict(AUTHORIZATION_JSON, status='gone'),
+            dict(AUTHORIZATION_JSON, wildcard=False),
+            dict(AUTHORIZATION_JSON, wildcard='yes'),
+            dict(AUTHORIZATION_JSON, challenges=[
+                challenges[0], _without(challenges[1], 'url'),
+            ]),
+            dict(AUTHORIZATION_JSON, challenges=[
+                _without(challenges[0], 'token'),
+            ]),
+            dict(AUTHORIZATION_JSON, challenges=[
+                dict(challenges[2], token=7),
+            ]),
+            dict(AUTHORIZATION_JSON, challenges=[
+                dict(challenges[3], status='later'),
+            ]),
+        ]
+        for json_ in cases:
+            with self.subTest(json=json_):
+                self.assert_same(
+                    _legacy_authorization,
+                    authorization.authorization_from_json,
+                    json_,
+                )
+
+    def test_challenges(self):
+        cases = AUTHORIZATION_JSON['challenges'] + [
+            None,
+            _without(CHALLENGE_JSON, 'type'),
+            dict(CHALLENGE_JSON, type=1),
+            dict(CHALLENGE_JSON, url=None),
+            dict(CHALLENGE_JSON, validated=17),
+            dict(CHALLENGE_JSON, type='dns-01', token=['t']),
+            _without(dict(CHALLENGE_JSON, type='tls-alpn-01'), 'token'),
+        ]
+        for json_ in cases:
+            with self.subTest(json=json_):
+                self.assert_same(
+                    _legacy_challenge, challenge.challenge_from_json, json_,
+                )